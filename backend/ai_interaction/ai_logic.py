@@ -1,48 +1,60 @@
 import os
+import hashlib
 import datetime as dt
 import requests
-import pkg_resources
 import pytz
 import pandas as pd
-import pandas_ta as ta
-from flask import request, jsonify
 from dotenv import load_dotenv
-from openai import OpenAI
-from neuralforecast import NeuralForecast
-from neuralforecast.models import LSTM
-from neuralforecast.utils import AirPassengersDF
+from ai_interaction.market_data import get_market_data_client
+from ai_interaction.bar_store import BAR_STORE_ENABLED, get_bar_store
+from ai_interaction.timeframes import EOD_TIMEFRAME_DAYS, TimeframeResolver
+from ai_interaction.data_context import DataContext
+from ai_interaction.indicator_engine import INDICATOR_ENGINE_ENABLED, get_indicator_engine
+from ai_interaction.prompt_builder import build_analysis_messages, build_feature_digest
+from ai_interaction.llm_dispatch import get_llm_dispatcher
+from ai_interaction.local_analysis import local_analysis
+from ai_interaction.model_client import MODEL_SERVER_FALLBACK, ModelServerUnavailable, get_model_client
+from ai_interaction.training_scheduler import TrainingSlotTimeout
 
 # Load environment variables
 load_dotenv()
 MARKETSTACK_API_KEY = os.getenv("MARKETSTACK_API_KEY")
 MARKETSTACK_BASE_URL = "http://api.marketstack.com/v1"
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-
-#Setup Open AI Client
-client = OpenAI(
-    api_key=os.getenv("OPENAI_API_KEY"),
-)
-
-# This function fetches stock data depending on the timeframe passed (15min, weekly, monthly)
-def visualization_intent(symbol, timeframe):
+# "llm" always asks the model, "local" always uses the template analyzer, "auto" asks the
+# model but answers from the template when it misses the latency SLO or fails
+ANALYSIS_ENGINES = ("llm", "local", "auto")
+ANALYSIS_ENGINE = os.getenv("ANALYSIS_ENGINE", "auto")
+ANALYSIS_LLM_SLO_SECONDS = float(os.getenv("ANALYSIS_LLM_SLO_SECONDS", 8))
+
+# Loads the bars for a (symbol, timeframe) pair once and wraps them in a DataContext
+# that all three intents can share. Returns None for an unknown timeframe
+def load_data_context(symbol, timeframe):
     # Determine which data function to call based on timeframe
     if timeframe == "15min":
-        dataframe = get_intraday_data(symbol=symbol, interval="15min")
+        bars = get_intraday_data(symbol=symbol, interval="15min")
     elif timeframe == "1W":
-        dataframe = get_weekly_data(symbol)
+        bars = get_weekly_data(symbol)
     elif timeframe == "1M":
-        dataframe = get_monthly_data(symbol)
+        bars = get_monthly_data(symbol)
     elif timeframe == "YTD":
-        dataframe = get_yearly_data(symbol)
+        bars = get_yearly_data(symbol)
     elif timeframe == "1D":
-        end_date = dt.datetime.now().date()
-        start_date = end_date - dt.timedelta(days=60)
-        dataframe = get_historical_data(symbol, date_from=str(start_date), date_to=str(end_date))
+        bars = get_daily_data(symbol)
     else:
         print("Invalid timeframe. Use '15min', '1W', '1M', 'YTD', or '1D'.")
         return None
 
-    if dataframe is None or dataframe.empty:
+    return DataContext(symbol, timeframe, bars)
+
+# This function fetches stock data depending on the timeframe passed (15min, weekly, monthly)
+def visualization_intent(symbol, timeframe, context=None):
+    context = context or load_data_context(symbol, timeframe)
+    if context is None:
+        return None
+
+    dataframe = context.bars
+    if context.empty:
         print(f"Error: No data retrieved for {symbol} ({timeframe})")
         return None
 
@@ -52,6 +64,9 @@ def visualization_intent(symbol, timeframe):
 # This computes common technical indicators like SMA, RSI, MACD, Fibonacci
 # I'm using pandas_ta and some math here to prep data to be passed to Open AI
 def compute_technical_indicators(df):
+    # Imported here since pandas_ta is slow to load and only this fallback path needs it
+    import pandas_ta as ta
+
     df = df.copy()
 
     df["SMA_10"] = df["close"].rolling(window=10).mean()
@@ -78,27 +93,27 @@ def compute_technical_indicators(df):
 
     return df, fib_levels
 
-# This function sends the computed data to GPT and asks it to summarize the technical analysis in plain English
-def ai_analysis_intent(symbol, timeframe):
+# compute_technical_indicators through the incremental engine, so a refresh that only
+# appends bars runs just those (same numbers either way, see IndicatorEngine). EOD bars
+# arrive newest first, so both paths get them in chronological order before the rolling
+# windows run
+def compute_indicators_for(symbol, timeframe, df):
+    if "date" in df.columns:
+        df = df.iloc[pd.to_datetime(df["date"], utc=True).argsort(kind="stable")].reset_index(drop=True)
+    if not INDICATOR_ENGINE_ENABLED:
+        return compute_technical_indicators(df)
+    return get_indicator_engine().compute(symbol, timeframe, df)
+
+# Loads the bars, computes indicators and builds the feature digest and chat messages
+# for an analysis. Returns (features, messages), or None when there is no data
+def prepare_analysis(symbol, timeframe, context=None):
     try:
-        # Handle timeframe
-        if timeframe == "15min":
-            df = get_intraday_data(symbol=symbol, interval="15min")
-        elif timeframe == "1W":
-            df = get_weekly_data(symbol)
-        elif timeframe == "1M":
-            df = get_monthly_data(symbol)
-        elif timeframe == "YTD":
-            df = get_yearly_data(symbol)
-        elif timeframe == "1D":
-            end_date = dt.datetime.now().date()
-            start_date = end_date - dt.timedelta(days=60)
-            df = get_historical_data(symbol, date_from=str(start_date), date_to=str(end_date))
-        else:
-            print("Invalid timeframe. Use '15min', '1W', '1M', 'YTD', or '1D'.")
+        context = context or load_data_context(symbol, timeframe)
+        if context is None:
             return None
 
-        if df is None or df.empty:
+        df = context.bars
+        if context.empty:
             print(f"No valid data available for {symbol} ({timeframe})")
             return None
 
@@ -109,87 +124,102 @@ def ai_analysis_intent(symbol, timeframe):
         print(f"Error loading stock data: {e}")
         return None
 
-    # Compute technical indicators
-    df, fib_levels = compute_technical_indicators(df)
-    dataframe_string = df.to_string(index=False)
-    fib_string = "\n".join([f"{k}: {v:.2f}" for k, v in fib_levels.items()])
-
-    prompt_template = f"""
-    You are a financial analysis assistant. Your goal is to analyze stock market data and provide a simple, non-technical summary that anyone can understand. Follow these steps:
-
-    Step 1: Explain Market Concepts in a Simple Way
-    Describe the key technical indicators and why they matter in plain language:
-    - Simple Moving Average (SMA): Tracks the stock's average price over time to show trends.
-    - Exponential Moving Average (EMA): Similar to SMA, but reacts faster to price changes.
-    - Relative Strength Index (RSI): Shows whether a stock is overbought (above 70) or oversold (below 30).
-    - MACD (Moving Average Convergence Divergence): Helps identify if a trend is strengthening or weakening.
-    - Fibonacci Retracement Levels: Helps find price points where a stock might reverse direction.
-    - Average True Range (ATR): Measures volatility—how much a stock's price moves.
-
-    Step 2: Analyze the Provided Data
-    - Identify trends using SMA and EMA.
-    - Check RSI to determine if the stock is overbought or oversold.
-    - Use MACD to confirm whether the trend is gaining strength.
-    - Examine Fibonacci levels to detect key support and resistance levels.
-    - Assess volatility using ATR.
-
-    Step 3: Provide a Short Market Outlook
-    - Summarize if the stock is trending up (bullish), down (bearish), or sideways (neutral).
-    - Mention if the trend is strong or weak.
-    - Avoid complex numbers—keep the explanation clear and general.
-
-    Here is the stock data you need to analyze:
-    ```
-    {dataframe_string}
-    ```
-    Fibonacci Levels:
-    ```
-    {fib_string}
-    ```
-
-    Generate a short, **easy-to-read** summary in plain text format. Keep it brief and clear, avoiding unnecessary technical details.
-    """
+    # Compute technical indicators (reused if another intent already built them)
+    df, fib_levels = context.artifact("indicators", lambda bars: compute_indicators_for(symbol, timeframe, bars))
+    # Summarize the frame into a fixed-size digest instead of pasting every row
+    features = build_feature_digest(df, fib_levels)
+    messages = build_analysis_messages(symbol, timeframe, df, fib_levels, features=features)
+    return features, messages
+
+# This function sends the computed data to GPT and asks it to summarize the technical analysis in plain English
+def ai_analysis_intent(symbol, timeframe, context=None, cache=None, engine="llm"):
+    return run_analysis(symbol, timeframe, engine=engine, context=context, cache=cache)[0]
+
+# Produces an analysis with the chosen engine (see ANALYSIS_ENGINES).
+# Returns (analysis, engine that produced it), or (None, None) when there is no data.
+# In auto mode a completion that misses the SLO keeps running; on_late(analysis, features)
+# gets it when it arrives, so the caller can store it for the next request
+def run_analysis(symbol, timeframe, engine=ANALYSIS_ENGINE, context=None, cache=None, on_late=None):
+    prepared = prepare_analysis(symbol, timeframe, context)
+    if prepared is None:
+        return None, None
+    features, messages = prepared
+
+    if engine == "local":
+        return local_analysis(symbol, timeframe, features), "local"
+
+    # Skip the completion when an analysis for the same (or an immaterially different) picture exists
+    if cache is not None:
+        cached_analysis = cache.get(symbol, timeframe, features)
+        if cached_analysis:
+            return cached_analysis, "llm"
 
     try:
-        response = client.chat.completions.create(
-            model="gpt-4-turbo",
-            messages=[
-                {"role": "system", "content": "You are a financial market analyst providing easy-to-understand stock insights"},
-                {"role": "user", "content": prompt_template}
-            ],
-            max_tokens=700,
-            temperature=0.7
-        )
-        generated_code = response.choices[0].message.content
-        return generated_code
+        # Bounded by the dispatcher's deadline and circuit breaker; in auto mode the
+        # deadline is the SLO, since the template answer is waiting as a fallback
+        timeout = ANALYSIS_LLM_SLO_SECONDS if engine == "auto" else None
+
+        def keep_late(analysis):
+            if analysis:
+                on_late(analysis, features)
+
+        late = keep_late if engine == "auto" and on_late is not None else None
+        generated_code = get_llm_dispatcher().complete(messages, timeout=timeout, on_late=late)
+        if cache is not None and generated_code:
+            cache.put(symbol, timeframe, features, generated_code)
+        if generated_code or engine != "auto":
+            return generated_code, "llm"
 
     except Exception as e:
         print(f"Error in AI Visualization Intent: {e}")
-        return None
+        if engine != "auto":
+            return None, None
+
+    print(f"[WARNING] No LLM analysis for {symbol} ({timeframe}) within the {ANALYSIS_LLM_SLO_SECONDS:.0f}s SLO, answering from the local analyzer.")
+    return local_analysis(symbol, timeframe, features), "local"
+
+# Streams the completion for prepared analysis messages, yielding text as it arrives
+def stream_analysis_completion(messages):
+    return get_llm_dispatcher().stream(messages)
+
+# Batch version of ai_analysis_intent for the precompute job. Takes (symbol, timeframe, context)
+# tuples, answers what it can from the cache and sends every remaining completion out at once.
+# Returns {(symbol, timeframe): analysis or None}
+def ai_analysis_batch(items, cache=None):
+    results = {}
+    pending = []
+    for symbol, timeframe, context in items:
+        prepared = prepare_analysis(symbol, timeframe, context)
+        if prepared is None:
+            results[(symbol, timeframe)] = None
+            continue
+        features, messages = prepared
+
+        cached_analysis = cache.get(symbol, timeframe, features) if cache is not None else None
+        if cached_analysis:
+            results[(symbol, timeframe)] = cached_analysis
+        else:
+            pending.append((symbol, timeframe, features, messages))
+
+    print(f"[INFO] Dispatching {len(pending)} analysis completions ({len(results)} answered without one).")
+    completions = get_llm_dispatcher().complete_many([messages for _, _, _, messages in pending])
+    for (symbol, timeframe, features, _), analysis in zip(pending, completions):
+        if cache is not None and analysis:
+            cache.put(symbol, timeframe, features, analysis)
+        results[(symbol, timeframe)] = analysis
+    return results
 
 # Forecasting logic using NeuralForecast's LSTM model
-def forecasting_intent(symbol, timeframe):
+def forecasting_intent(symbol, timeframe, context=None):
     try:
         print(f"\n[DEBUG] Starting Forecasting for {symbol} on {timeframe}...\n")
 
-        # Determine which data function to call based on timeframe
-        if timeframe == "15min":
-            df = get_intraday_data(symbol=symbol, interval="15min")
-        elif timeframe == "1W":
-            df = get_weekly_data(symbol)
-        elif timeframe == "1M":
-            df = get_monthly_data(symbol)
-        elif timeframe == "YTD":
-            df = get_yearly_data(symbol)
-        elif timeframe == "1D":
-            end_date = dt.datetime.now().date()
-            start_date = end_date - dt.timedelta(days=60)
-            df = get_historical_data(symbol, date_from=str(start_date), date_to=str(end_date))
-        else:
-            print("[ERROR] Invalid timeframe. Use '15min', '1W', '1M', 'YTD', or '1D'.")
+        context = context or load_data_context(symbol, timeframe)
+        if context is None:
             return None
 
-        if df is None or df.empty:
+        df = context.bars
+        if context.empty:
             print(f"[ERROR] No valid data available for {symbol} ({timeframe})")
             return None
 
@@ -203,40 +233,24 @@ def forecasting_intent(symbol, timeframe):
     # Preprocess DataFrame
     try:
         print("\n[DEBUG] Preprocessing DataFrame...")
-        df = preprocess_dataframe(df, symbol)
+        df = context.artifact("forecast_frame", lambda bars: preprocess_dataframe(bars, symbol))
         print("[DEBUG] Preprocessed DataFrame:")
         print(df.head())
     except Exception as e:
         print(f"[ERROR] Error during preprocessing: {e}")
         return None
 
-    # Define forecasting model
-    try:
-        print("\n[DEBUG] Initializing LSTM Model...")
-        forecast_model = NeuralForecast(
-            models=[LSTM(h=10, input_size=60)],
-            freq="D"
-        )
-        print("[DEBUG] Model initialized successfully.")
-    except Exception as e:
-        print(f"[ERROR] Error initializing LSTM model: {e}")
-        return None
-
-    # Train model on historical data
-    try:
-        print("\n[DEBUG] Training the model...")
-        forecast_model.fit(df)
-        print("[DEBUG] Model training completed.")
-    except Exception as e:
-        print(f"[ERROR] Error during model training: {e}")
-        return None
-
-    # Generate predictions
+    # Load the saved model for this stock/timeframe (on the model server when there is one)
+    # and only train as much as the new bars need
     try:
         print("\n[DEBUG] Generating predictions...")
-        predictions = forecast_model.predict()
+        predictions = predict_forecast(symbol, timeframe, df)
         print("[DEBUG] Predictions generated successfully.")
         print(predictions.head())
+    except TrainingSlotTimeout:
+        # Training is backed up and there is no saved model to fall back on; the caller
+        # decides whether to answer busy or try again later
+        raise
     except Exception as e:
         print(f"[ERROR] Error generating predictions: {e}")
         return None
@@ -259,6 +273,63 @@ def forecasting_intent(symbol, timeframe):
         "forecast": forecast_results
     }
 
+# Predictions for a preprocessed frame from the registered model under `key`. Goes through
+# the resident model server when one is configured, so this process never loads torch
+def predict_forecast(key, timeframe, df):
+    model_client = get_model_client()
+    if model_client is not None:
+        try:
+            return model_client.predict(key, timeframe, df)
+        except ModelServerUnavailable as e:
+            if not MODEL_SERVER_FALLBACK:
+                raise
+            print(f"[WARNING] {e}. Forecasting in-process instead.")
+
+    # Imported on first use so workers that only talk to the model server skip torch
+    from ai_interaction.model_registry import get_model_registry
+    return get_model_registry().predict(key, timeframe, df)
+
+# Forecasts a whole universe with one global model: all symbols of a timeframe go into a
+# single fit and a single predict. Returns {symbol: forecasting_intent-style result or None}
+def forecast_universe(symbols, timeframe, contexts=None):
+    contexts = contexts or load_data_contexts(symbols, [timeframe])
+    results = {symbol: None for symbol in symbols}
+
+    frames = []
+    for symbol in symbols:
+        context = contexts.get((symbol, timeframe))
+        if context is None or context.empty:
+            print(f"[ERROR] No valid data available for {symbol} ({timeframe})")
+            continue
+        try:
+            frames.append(context.artifact("forecast_frame", lambda bars, symbol=symbol: preprocess_dataframe(bars, symbol)))
+        except Exception as e:
+            print(f"[ERROR] Error during preprocessing for {symbol}: {e}")
+
+    if not frames:
+        return results
+    df = pd.concat(frames, ignore_index=True)
+    series = sorted(df["unique_id"].unique())
+
+    try:
+        print(f"\n[DEBUG] Preparing one {timeframe} model for {len(series)} series...")
+        # Saved under a key that changes whenever the set of series does
+        universe_key = "UNIVERSE-" + hashlib.sha256(",".join(series).encode()).hexdigest()[:8]
+        predictions = predict_forecast(universe_key, timeframe, df)
+    except Exception as e:
+        print(f"[ERROR] Error during universe forecasting for {timeframe}: {e}")
+        return results
+
+    if "unique_id" not in predictions.columns:
+        predictions = predictions.reset_index()
+    for symbol, symbol_predictions in predictions.groupby("unique_id"):
+        results[symbol] = {
+            "symbol": symbol,
+            "timeframe": timeframe,
+            "forecast": format_predictions(symbol_predictions)
+        }
+    return results
+
 # Clean and rename columns so the LSTM model understands the format
 def preprocess_dataframe(df, symbol):
     if "date" in df.columns:
@@ -287,64 +358,63 @@ def format_predictions(predictions):
 # =========== MARKETSTACK API UTILS ===========
 
 # This part is where the Marketstack API is utilized and called for timeframe historical market data
-# It loops to get as much data as allowed by pagination
+# The shared client pulls the first page, then the rest of the pages in parallel.
+# Bounded requests go through the local bar store, so only the missing ends of the range hit the API
 def get_historical_data(symbol, date_from=None, date_to=None, limit=1000):
-    endpoint = "https://api.marketstack.com/v1/eod"
-    all_data = pd.DataFrame()
-    offset = 0
-
-    while True:
-        params = {
-            "access_key": MARKETSTACK_API_KEY,
-            "symbols": symbol,
-            "date_from": date_from,
-            "date_to": date_to,
-            "limit": limit,
-            "offset": offset,
-        }
+    client = get_market_data_client()
+    if not BAR_STORE_ENABLED or date_from is None or date_to is None:
+        return client.fetch_eod(symbol, date_from=date_from, date_to=date_to, limit=limit)
 
+    store = get_bar_store()
+    for gap_from, gap_to in store.missing_ranges(symbol, date_from, date_to):
         try:
-            response = requests.get(endpoint, params=params)
-            print(f"Request URL: {response.url}")
-            print(f"Response Status Code: {response.status_code}")
-            response.raise_for_status()
-
-            data = response.json()
-            if "data" in data and data["data"]:
-                current_page = pd.DataFrame(data["data"])
-                all_data = pd.concat([all_data, current_page], ignore_index=True)
-                print(f"Fetched {len(current_page)} rows. Total so far: {len(all_data)}.")
-
-                pagination = data.get("pagination", {})
-                if pagination.get("count", 0) < pagination.get("limit", 0):
-                    print("No more data available.")
-                    break
-
-                offset += limit
-            else:
-                print("No valid data returned.")
-                break
-        except requests.exceptions.RequestException as e:
-            print(f"API request error: {e}")
-            break
+            bars = client.fetch_eod(symbol, date_from=gap_from, date_to=gap_to, limit=limit, raise_errors=True)
+        except requests.exceptions.RequestException:
+            print(f"[WARNING] Could not fill {gap_from} to {gap_to} for {symbol}, serving stored bars only.")
+            continue
+        store.write(symbol, bars, gap_from, gap_to)
+
+    return store.read(symbol, date_from=date_from, date_to=date_to)
+
+# Batched version of get_historical_data for a whole universe. Symbols that are missing
+# the same date range in the bar store share one comma-separated request
+def get_historical_data_batch(symbols, date_from, date_to, limit=1000):
+    client = get_market_data_client()
+    if not BAR_STORE_ENABLED:
+        return client.fetch_eod_batch(symbols, date_from=date_from, date_to=date_to, limit=limit)
+
+    store = get_bar_store()
+    gaps = {}
+    for symbol in symbols:
+        for gap in store.missing_ranges(symbol, date_from, date_to):
+            gaps.setdefault(gap, []).append(symbol)
+
+    for (gap_from, gap_to), gap_symbols in gaps.items():
+        try:
+            frames = client.fetch_eod_batch(gap_symbols, date_from=gap_from, date_to=gap_to, limit=limit, raise_errors=True)
+        except requests.exceptions.RequestException:
+            print(f"[WARNING] Could not fill {gap_from} to {gap_to} for {len(gap_symbols)} symbols, serving stored bars only.")
+            continue
+        for symbol, bars in frames.items():
+            store.write(symbol, bars, gap_from, gap_to)
+
+    return {symbol: store.read(symbol, date_from=date_from, date_to=date_to) for symbol in symbols}
 
-    return all_data
+# Every EOD timeframe is served as a slice of one widest series per symbol
+timeframe_resolver = TimeframeResolver(fetch=get_historical_data, fetch_batch=get_historical_data_batch)
 
-# These helper functions just wrap the historical fetcher with pre-built date ranges
+# These helper functions just hand out pre-built date ranges from the shared series
 def get_weekly_data(symbol):
-    today = dt.datetime.now().date()
-    week_ago = today - dt.timedelta(days=10)
-    return get_historical_data(symbol, date_from=str(week_ago), date_to=str(today))
+    return timeframe_resolver.resolve(symbol, "1W")
 
 def get_monthly_data(symbol):
-    today = dt.datetime.now().date()
-    month_ago = today - dt.timedelta(days=45)
-    return get_historical_data(symbol, date_from=str(month_ago), date_to=str(today))
+    return timeframe_resolver.resolve(symbol, "1M")
 
 def get_yearly_data(symbol):
-    today = dt.datetime.now().date()
-    year_ago = today - dt.timedelta(days=519)
-    return get_historical_data(symbol, date_from=str(year_ago), date_to=str(today))
+    return timeframe_resolver.resolve(symbol, "YTD")
+
+def get_daily_data(symbol):
+    return timeframe_resolver.resolve(symbol, "1D")
 
 
 # Market is closed if it's weekend or not between 9:30am and 4pm EST
@@ -360,8 +430,8 @@ def is_market_closed():
     # If before open or after close
     return now < market_open_time or now >= market_close_time
 
-# This grabs intraday data like 15min candles, and falls back to previous day if market is closed
-def get_intraday_data(symbol, interval="15min", limit=100):
+# Works out which trading day to pull intraday candles for
+def get_last_trading_day():
     today = dt.datetime.now().date()
 
     if is_market_closed():
@@ -376,33 +446,15 @@ def get_intraday_data(symbol, interval="15min", limit=100):
     while last_trading_day.weekday() > 4:  # Roll back if weekend
         last_trading_day -= dt.timedelta(days=1)
 
+    return last_trading_day
+
+# This grabs intraday data like 15min candles, and falls back to previous day if market is closed
+def get_intraday_data(symbol, interval="15min", limit=100):
+    last_trading_day = get_last_trading_day()
     last_trading_day_str = last_trading_day.strftime("%Y-%m-%d")
 
     def fetch_data(trading_day):
-        endpoint = f"https://api.marketstack.com/v1/intraday/{trading_day}"
-        params = {
-            "access_key": MARKETSTACK_API_KEY,
-            "symbols": symbol,
-            "interval": interval,
-            "limit": limit,
-        }
-        try:
-            response = requests.get(endpoint, params=params)
-            print(f"Request URL: {response.url}")
-            print(f"Response Status Code: {response.status_code}")
-            response.raise_for_status()
-
-            data = response.json()
-            if "data" in data and data["data"]:
-                intraday_data = pd.DataFrame(data["data"])
-                if not intraday_data.empty and "date" in intraday_data.columns:
-                    intraday_data["date"] = pd.to_datetime(intraday_data["date"])
-                return intraday_data.sort_values(by="date").reset_index(drop=True)
-        except requests.exceptions.RequestException as e:
-            print(f"API request error: {e}")
-            return pd.DataFrame()
-
-        return pd.DataFrame()
+        return get_market_data_client().fetch_intraday(symbol, trading_day, interval=interval, limit=limit)
 
     data = fetch_data(last_trading_day_str)
     if data.empty:
@@ -412,3 +464,34 @@ def get_intraday_data(symbol, interval="15min", limit=100):
         data = fetch_data(last_trading_day_str)
 
     return data
+
+# Batched version of get_intraday_data. Symbols that came back empty get one more
+# batched try on the previous day, same as the single-symbol fallback
+def get_intraday_data_batch(symbols, interval="15min", limit=100):
+    client = get_market_data_client()
+    last_trading_day = get_last_trading_day()
+
+    frames = client.fetch_intraday_batch(symbols, last_trading_day.strftime("%Y-%m-%d"), interval=interval, limit=limit)
+    missing = [symbol for symbol, frame in frames.items() if frame.empty]
+    if missing:
+        previous_day = (last_trading_day - dt.timedelta(days=1)).strftime("%Y-%m-%d")
+        print(f"No intraday data for {len(missing)} symbols. Trying {previous_day}...")
+        frames.update(client.fetch_intraday_batch(missing, previous_day, interval=interval, limit=limit))
+
+    return frames
+
+# Builds data contexts for every (symbol, timeframe) pair of a universe with a handful
+# of batched requests instead of one download per symbol
+def load_data_contexts(symbols, timeframes):
+    if any(timeframe in EOD_TIMEFRAME_DAYS for timeframe in timeframes):
+        timeframe_resolver.prefetch(symbols)
+    intraday = get_intraday_data_batch(symbols, interval="15min") if "15min" in timeframes else {}
+
+    contexts = {}
+    for symbol in symbols:
+        for timeframe in timeframes:
+            if timeframe == "15min":
+                contexts[(symbol, timeframe)] = DataContext(symbol, timeframe, intraday.get(symbol, pd.DataFrame()))
+            else:
+                contexts[(symbol, timeframe)] = load_data_context(symbol, timeframe)
+    return contexts
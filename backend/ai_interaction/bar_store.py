@@ -0,0 +1,292 @@
+import os
+import re
+import json
+import time
+import tempfile
+import threading
+from contextlib import contextmanager
+import datetime as dt
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from dotenv import load_dotenv
+
+try:
+    import fcntl
+except ImportError:
+    # Windows has no flock. There the store falls back to a lock per symbol inside this
+    # process, which is enough for the single-process `flask run` setup
+    fcntl = None
+
+# Load environment variables
+load_dotenv()
+BAR_STORE_DIR = os.getenv(
+    "BAR_STORE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "bars"),
+)
+BAR_STORE_ENABLED = os.getenv("BAR_STORE_ENABLED", "True") == "True"
+# Once a symbol has this many un-merged segments we fold them back into one file
+BAR_STORE_COMPACT_SEGMENTS = int(os.getenv("BAR_STORE_COMPACT_SEGMENTS", 8))
+# How long today's still-changing bar is served from the store before it's fetched again
+BAR_STORE_PARTIAL_TTL = int(os.getenv("BAR_STORE_PARTIAL_TTL", 900))
+
+BASE_FILE = "bars.parquet"
+COVERAGE_FILE = "coverage.json"
+LOCK_FILE = ".lock"
+SEGMENT_PREFIX = "segment-"
+# Symbols and timeframes end up as folder names here, in the indicator engine and in the
+# model registry, and they come straight from requests: only plain tickers (and names
+# like UNIVERSE-1a2b3c4d or 15min) get through
+PATH_PART_PATTERN = re.compile(r"[A-Za-z0-9][A-Za-z0-9.\-]{0,19}")
+
+
+class InvalidSymbol(ValueError):
+    pass
+
+
+# Returns value as a string if it is safe to use as one folder or file name, raises InvalidSymbol otherwise
+def checked_path_part(value):
+    value = str(value)
+    if not PATH_PART_PATTERN.fullmatch(value):
+        raise InvalidSymbol(f"Invalid symbol or timeframe {value!r}")
+    return value
+
+_process_locks = {}
+_process_locks_guard = threading.Lock()
+
+def _process_lock(folder):
+    with _process_locks_guard:
+        return _process_locks.setdefault(folder, threading.Lock())
+
+
+# Marketstack dates look like 2024-01-05T00:00:00+0000, the first 10 chars are the trading day
+def _day_key(dates):
+    return dates.astype(str).str.slice(0, 10)
+
+def _to_date(value):
+    if isinstance(value, dt.datetime):
+        return value.date()
+    if isinstance(value, dt.date):
+        return value
+    return dt.date.fromisoformat(str(value)[:10])
+
+# Writes through a temp file of its own and renames it over path, so two processes
+# writing the same file never share a temp name and readers never see half a file
+def _replace_atomically(path, write):
+    handle, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=os.path.basename(path) + ".", suffix=".tmp")
+    os.close(handle)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+# On-disk, per-symbol EOD bar store. Each symbol gets its own folder holding a
+# compacted Parquet file plus small append-only segments from later gap fills,
+# and a coverage.json that remembers which date range we already asked the API for.
+# Workers share the folder, so reads hold a shared flock on it and writes and
+# compaction an exclusive one
+class BarStore:
+    def __init__(self, root=BAR_STORE_DIR, compact_segments=BAR_STORE_COMPACT_SEGMENTS, partial_ttl=BAR_STORE_PARTIAL_TTL):
+        self.root = root
+        self.compact_segments = compact_segments
+        self.partial_ttl = partial_ttl
+
+    def _symbol_dir(self, symbol):
+        return os.path.join(self.root, checked_path_part(str(symbol).upper()))
+
+    # flock on the symbol's lock file. It isn't re-entrant, so callers take it once at the top.
+    # Reads of a symbol we hold nothing for don't lock, so they never create its folder
+    @contextmanager
+    def _locked(self, symbol, exclusive=False):
+        folder = self._symbol_dir(symbol)
+        if fcntl is None:
+            with _process_lock(folder):
+                yield
+            return
+        if not exclusive and not os.path.isdir(folder):
+            yield
+            return
+        os.makedirs(folder, exist_ok=True)
+        with open(os.path.join(folder, LOCK_FILE), "a") as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def _segment_files(self, symbol):
+        folder = self._symbol_dir(symbol)
+        if not os.path.isdir(folder):
+            return []
+        return sorted(
+            os.path.join(folder, name) for name in os.listdir(folder)
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(".parquet")
+        )
+
+    # Base file first, then segments oldest to newest, so later writes win on dedupe
+    def _data_files(self, symbol):
+        base = os.path.join(self._symbol_dir(symbol), BASE_FILE)
+        files = [base] if os.path.exists(base) else []
+        return files + self._segment_files(symbol)
+
+    def _load_coverage(self, symbol):
+        path = os.path.join(self._symbol_dir(symbol), COVERAGE_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def _save_coverage(self, symbol, coverage):
+        def write(path):
+            with open(path, "w") as f:
+                json.dump(coverage, f)
+        _replace_atomically(os.path.join(self._symbol_dir(symbol), COVERAGE_FILE), write)
+
+    # Reads every file for the symbol through a memory map and returns one
+    # de-duplicated frame, newest bar first like the Marketstack API
+    def _read_all(self, symbol):
+        frames = [
+            pq.read_table(path, memory_map=True).to_pandas()
+            for path in self._data_files(symbol)
+        ]
+        frames = [frame for frame in frames if not frame.empty]
+        if not frames:
+            return pd.DataFrame()
+
+        bars = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+        bars = bars.drop_duplicates(subset="date", keep="last")
+        return bars.sort_values("date", ascending=False).reset_index(drop=True)
+
+    # Returns the stored bars between date_from and date_to (inclusive)
+    def read(self, symbol, date_from=None, date_to=None):
+        with self._locked(symbol):
+            bars = self._read_all(symbol)
+        if bars.empty:
+            return bars
+
+        days = _day_key(bars["date"])
+        mask = pd.Series(True, index=bars.index)
+        if date_from is not None:
+            mask &= days >= str(_to_date(date_from))
+        if date_to is not None:
+            mask &= days <= str(_to_date(date_to))
+        return bars[mask].reset_index(drop=True)
+
+    # Works out which date ranges still have to come from the API. Gaps are only
+    # ever filled at either end of what we hold, so coverage stays one contiguous range.
+    # Today's bar counts as held for partial_ttl seconds after it was last fetched
+    def missing_ranges(self, symbol, date_from, date_to):
+        date_from, date_to = _to_date(date_from), _to_date(date_to)
+        with self._locked(symbol):
+            coverage = self._load_coverage(symbol)
+        if not coverage:
+            return [(str(date_from), str(date_to))]
+
+        covered_from = _to_date(coverage["from"])
+        covered_to = _to_date(coverage["to"])
+        partial = coverage.get("partial")
+        if (
+            partial
+            and _to_date(partial["day"]) == covered_to + dt.timedelta(days=1)
+            and time.time() - partial["fetched_at"] < self.partial_ttl
+        ):
+            covered_to = _to_date(partial["day"])
+        gaps = []
+        if date_from < covered_from:
+            gaps.append((str(date_from), str(covered_from - dt.timedelta(days=1))))
+        if date_to > covered_to:
+            gaps.append((str(covered_to + dt.timedelta(days=1)), str(date_to)))
+        return gaps
+
+    # Appends freshly fetched bars as a new segment and widens the coverage range.
+    # Today's bar may still change, so coverage never claims anything past yesterday;
+    # a fetch that reached today is remembered separately with its time, see missing_ranges
+    def write(self, symbol, bars, date_from, date_to):
+        folder = self._symbol_dir(symbol)
+        os.makedirs(folder, exist_ok=True)
+        with self._locked(symbol, exclusive=True):
+            if bars is not None and not bars.empty:
+                segment = os.path.join(folder, f"{SEGMENT_PREFIX}{time.time_ns()}-{os.getpid()}.parquet")
+                table = pa.Table.from_pandas(bars, preserve_index=False)
+                _replace_atomically(segment, lambda path: pq.write_table(table, path))
+
+            today = dt.date.today()
+            fetched_to = _to_date(date_to)
+            date_from = _to_date(date_from)
+            date_to = min(fetched_to, today - dt.timedelta(days=1))
+
+            coverage = self._load_coverage(symbol)
+            partial = coverage.get("partial") if coverage else None
+            if coverage:
+                date_from = min(date_from, _to_date(coverage["from"]))
+                date_to = max(date_to, _to_date(coverage["to"]))
+            if fetched_to >= today:
+                partial = {"day": str(today), "fetched_at": time.time()}
+            if partial and _to_date(partial["day"]) <= date_to:
+                partial = None
+            if date_to >= date_from:
+                coverage = {"from": str(date_from), "to": str(date_to)}
+                if partial:
+                    coverage["partial"] = partial
+                self._save_coverage(symbol, coverage)
+            compact = len(self._segment_files(symbol)) >= self.compact_segments
+
+        if compact:
+            self.compact(symbol)
+
+    # Folds the base file and all segments into a single sorted, de-duplicated file
+    def compact(self, symbol):
+        with self._locked(symbol, exclusive=True):
+            segments = self._segment_files(symbol)
+            if not segments:
+                return
+
+            bars = self._read_all(symbol)
+            table = pa.Table.from_pandas(bars, preserve_index=False)
+            _replace_atomically(os.path.join(self._symbol_dir(symbol), BASE_FILE), lambda path: pq.write_table(table, path))
+
+            for segment in segments:
+                os.remove(segment)
+        print(f"[INFO] Compacted {len(segments)} segments for {symbol} ({len(bars)} bars).")
+
+    def compact_all(self):
+        for symbol in self.symbols():
+            self.compact(symbol)
+
+    def symbols(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(
+            name for name in os.listdir(self.root)
+            if os.path.isdir(os.path.join(self.root, name))
+        )
+
+    # Summarizes what we hold for a symbol: covered range, bar count, files and size
+    def coverage(self, symbol):
+        with self._locked(symbol):
+            coverage = self._load_coverage(symbol) or {}
+            files = self._data_files(symbol)
+            rows = sum(pq.ParquetFile(path).metadata.num_rows for path in files)
+            size = sum(os.path.getsize(path) for path in files)
+        return {
+            "symbol": str(symbol).upper(),
+            "from": coverage.get("from"),
+            "to": coverage.get("to"),
+            "rows": rows,
+            "segments": len(self._segment_files(symbol)),
+            "bytes": size,
+        }
+
+
+_store = None
+
+# Returns the process-wide bar store
+def get_bar_store():
+    global _store
+    if _store is None:
+        _store = BarStore()
+    return _store
@@ -0,0 +1,22 @@
+# Holds the bars for one (symbol, timeframe) pair so the visualization, analysis and
+# forecasting intents can share a single download. Anything derived from the bars
+# (indicator frame, LSTM input frame, ...) is built once and kept on the context too
+class DataContext:
+    def __init__(self, symbol, timeframe, bars):
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.bars = bars
+        self._artifacts = {}
+
+    @property
+    def empty(self):
+        return self.bars is None or self.bars.empty
+
+    # Returns a derived artifact, building it from the bars the first time it is asked for
+    def artifact(self, name, build):
+        if name not in self._artifacts:
+            self._artifacts[name] = build(self.bars)
+        return self._artifacts[name]
+
+    def has_artifact(self, name):
+        return name in self._artifacts
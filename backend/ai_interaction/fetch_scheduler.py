@@ -0,0 +1,217 @@
+import os
+import json
+import time
+import random
+import threading
+from contextlib import contextmanager
+import requests
+from dotenv import load_dotenv
+
+try:
+    import fcntl
+except ImportError:
+    # Windows has no flock, so the limits there are kept per process (see SharedState)
+    fcntl = None
+
+# Load environment variables
+load_dotenv()
+# Sized to our Marketstack plan: steady request rate and how many we may burst at once
+MARKETSTACK_RATE_PER_SECOND = float(os.getenv("MARKETSTACK_RATE_PER_SECOND", 5))
+MARKETSTACK_BURST = int(os.getenv("MARKETSTACK_BURST", 5))
+MARKETSTACK_TIMEOUT = float(os.getenv("MARKETSTACK_TIMEOUT", 10))
+MARKETSTACK_MAX_RETRIES = int(os.getenv("MARKETSTACK_MAX_RETRIES", 4))
+MARKETSTACK_BACKOFF_BASE = float(os.getenv("MARKETSTACK_BACKOFF_BASE", 0.5))
+MARKETSTACK_BACKOFF_CAP = float(os.getenv("MARKETSTACK_BACKOFF_CAP", 8))
+# At most this many retries can be banked, and each successful request earns back this fraction of one
+MARKETSTACK_RETRY_BUDGET = int(os.getenv("MARKETSTACK_RETRY_BUDGET", 10))
+MARKETSTACK_RETRY_RATIO = float(os.getenv("MARKETSTACK_RETRY_RATIO", 0.2))
+# The rate limit and retry budget are for the whole machine, not each worker: every
+# process on it shares their state through small flocked files here. Empty = per process
+MARKETSTACK_LIMITS_DIR = os.getenv(
+    "MARKETSTACK_LIMITS_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "marketstack_limits"),
+)
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+# A small dict of limiter state. With a path it lives in a JSON file that every process
+# reads and rewrites under an exclusive flock, otherwise (or without flock) just in this process
+class SharedState:
+    def __init__(self, path, initial):
+        self.path = path if fcntl is not None else None
+        self.initial = initial
+        self.state = dict(initial)
+        self.lock = threading.Lock()
+        if self.path:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+    # Yields the state for the caller to change in place, and stores it afterwards
+    @contextmanager
+    def update(self):
+        with self.lock:
+            if not self.path:
+                yield self.state
+                return
+            with open(self.path, "a+") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    f.seek(0)
+                    try:
+                        state = dict(self.initial, **json.loads(f.read()))
+                    except ValueError:
+                        state = dict(self.initial)
+                    yield state
+                    f.seek(0)
+                    f.truncate()
+                    json.dump(state, f)
+                    f.flush()
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+
+# Classic token bucket: refills at `rate` tokens per second up to `capacity`,
+# and acquire() blocks until a token is available. Wall-clock time, since the
+# state may be shared with other processes
+class TokenBucket:
+    def __init__(self, rate, capacity, path=None):
+        self.rate = rate
+        self.capacity = capacity
+        self.shared = SharedState(path, {"tokens": capacity, "updated": time.time()})
+
+    def acquire(self):
+        while True:
+            with self.shared.update() as state:
+                now = time.time()
+                elapsed = max(0.0, now - state["updated"])
+                tokens = min(self.capacity, state["tokens"] + elapsed * self.rate)
+                state["updated"] = now
+                if tokens >= 1:
+                    state["tokens"] = tokens - 1
+                    return
+                state["tokens"] = tokens
+                wait = (1 - tokens) / self.rate
+            time.sleep(wait)
+
+
+# Cap on retries. Every successful request earns back a fraction of a retry, so a
+# provider outage can't turn into an endless retry storm
+class RetryBudget:
+    def __init__(self, capacity, ratio, path=None):
+        self.capacity = capacity
+        self.ratio = ratio
+        self.shared = SharedState(path, {"balance": float(capacity)})
+
+    def deposit(self):
+        with self.shared.update() as state:
+            state["balance"] = min(self.capacity, state["balance"] + self.ratio)
+
+    def withdraw(self):
+        with self.shared.update() as state:
+            if state["balance"] < 1:
+                return False
+            state["balance"] -= 1
+            return True
+
+
+# Every Marketstack call goes through here: rate limited by the token bucket,
+# with per-request timeouts and bounded, jittered exponential backoff on 429s,
+# 5xx responses and network errors. With limits_dir set, the bucket and the retry
+# budget are shared by every process using that folder
+class FetchScheduler:
+    def __init__(
+        self,
+        rate=MARKETSTACK_RATE_PER_SECOND,
+        burst=MARKETSTACK_BURST,
+        timeout=MARKETSTACK_TIMEOUT,
+        max_retries=MARKETSTACK_MAX_RETRIES,
+        backoff_base=MARKETSTACK_BACKOFF_BASE,
+        backoff_cap=MARKETSTACK_BACKOFF_CAP,
+        retry_budget=MARKETSTACK_RETRY_BUDGET,
+        retry_ratio=MARKETSTACK_RETRY_RATIO,
+        limits_dir=MARKETSTACK_LIMITS_DIR,
+    ):
+        self.bucket = TokenBucket(rate, burst, path=os.path.join(limits_dir, "token_bucket.json") if limits_dir else None)
+        self.budget = RetryBudget(retry_budget, retry_ratio, path=os.path.join(limits_dir, "retry_budget.json") if limits_dir else None)
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.counters = {
+            "requests": 0,
+            "succeeded": 0,
+            "throttled": 0,
+            "retried": 0,
+            "timeouts": 0,
+            "failed": 0,
+            "budget_exhausted": 0,
+        }
+        self.lock = threading.Lock()
+
+    def _count(self, name):
+        with self.lock:
+            self.counters[name] += 1
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counters)
+
+    # Full jitter: sleep a random amount up to the capped exponential delay,
+    # but never less than what the provider asked for in Retry-After
+    def _backoff(self, attempt, retry_after=None):
+        delay = random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
+        if retry_after is not None:
+            delay = max(delay, min(self.backoff_cap, retry_after))
+        time.sleep(delay)
+
+    # Sends a GET and returns the response once it succeeds. Raises the last
+    # error once retries or the retry budget run out
+    def get(self, session, url, params=None):
+        attempt = 0
+        while True:
+            self.bucket.acquire()
+            self._count("requests")
+            retry_after = None
+
+            try:
+                response = session.get(url, params=params, timeout=self.timeout)
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    response.raise_for_status()
+                    self._count("succeeded")
+                    self.budget.deposit()
+                    return response
+
+                if response.status_code == 429:
+                    self._count("throttled")
+                    retry_after = _parse_retry_after(response.headers.get("Retry-After"))
+                error = requests.exceptions.HTTPError(
+                    f"{response.status_code} Error for url: {response.url}", response=response
+                )
+            except requests.exceptions.Timeout as e:
+                self._count("timeouts")
+                error = e
+            except requests.exceptions.ConnectionError as e:
+                error = e
+            except requests.exceptions.RequestException:
+                self._count("failed")
+                raise
+
+            if attempt >= self.max_retries:
+                self._count("failed")
+                raise error
+            if not self.budget.withdraw():
+                self._count("budget_exhausted")
+                self._count("failed")
+                raise error
+
+            self._count("retried")
+            print(f"[WARNING] Marketstack request failed ({error}), retrying (attempt {attempt + 1})...")
+            self._backoff(attempt, retry_after)
+            attempt += 1
+
+
+def _parse_retry_after(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,243 @@
+import os
+import json
+import math
+import tempfile
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from dotenv import load_dotenv
+from ai_interaction.bar_store import BAR_STORE_DIR, checked_path_part
+
+# Load environment variables
+load_dotenv()
+INDICATOR_ENGINE_ENABLED = os.getenv("INDICATOR_ENGINE_ENABLED", "True") == "True"
+
+INDICATOR_COLUMNS = ["SMA_10", "SMA_50", "EMA_10", "EMA_50", "RSI", "MACD", "ATR"]
+RSI_LENGTH = 14
+ATR_LENGTH = 14
+
+NAN = float("nan")
+STATE_METADATA_KEY = b"indicator_state"
+
+
+# Running state of an EWM with adjust=False (pandas .ewm(span=..., adjust=False)),
+# seeded with the first observation
+def _ewm_step(previous, value, alpha):
+    if previous is None:
+        return value
+    return alpha * value + (1 - alpha) * previous
+
+# Running state of pandas_ta's rma (.ewm(alpha=1/length, min_periods=length), adjust=True):
+# the adjusted mean is a decayed weighted sum divided by the decayed weight total
+def _rma_step(state, value, length):
+    decay = 1 - 1.0 / length
+    state["sum"] = value + decay * state["sum"]
+    state["weight"] = 1 + decay * state["weight"]
+    state["count"] += 1
+    if state["count"] < length:
+        return NAN
+    return state["sum"] / state["weight"]
+
+def _new_rma():
+    return {"sum": 0.0, "weight": 0.0, "count": 0}
+
+
+class IndicatorState:
+    """
+    Everything compute_technical_indicators needs to extend its output by one bar:
+    the last 50 closes with running sums for the SMAs, the EMA accumulators, Wilder
+    RSI/ATR accumulators, plus the date and close of the last bar it took in.
+    Each update() is O(1).
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.first_date = None
+        self.last_date = None
+        self.closes = []
+        self.sum_10 = 0.0
+        self.sum_50 = 0.0
+        self.ema = {"10": None, "50": None, "12": None, "26": None}
+        self.prev_close = None
+        self.rsi_gain = _new_rma()
+        self.rsi_loss = _new_rma()
+        self.atr = _new_rma()
+
+    def update(self, date, high, low, close):
+        if self.rows == 0:
+            self.first_date = date
+        self.rows += 1
+        self.last_date = date
+
+        # Simple moving averages over the last 10 / 50 closes
+        self.closes.append(close)
+        self.sum_10 += close
+        self.sum_50 += close
+        if len(self.closes) > 10:
+            self.sum_10 -= self.closes[-11]
+        if len(self.closes) > 50:
+            self.sum_50 -= self.closes.pop(0)
+        sma_10 = self.sum_10 / 10 if self.rows >= 10 else NAN
+        sma_50 = self.sum_50 / 50 if self.rows >= 50 else NAN
+
+        for span in self.ema:
+            self.ema[span] = _ewm_step(self.ema[span], close, 2.0 / (int(span) + 1))
+
+        # RSI and ATR both start from the second bar, the first diff / true range is undefined
+        if self.prev_close is None:
+            rsi = NAN
+            atr = NAN
+        else:
+            change = close - self.prev_close
+            gain_avg = _rma_step(self.rsi_gain, max(change, 0.0), RSI_LENGTH)
+            loss_avg = _rma_step(self.rsi_loss, min(change, 0.0), RSI_LENGTH)
+            total = gain_avg + abs(loss_avg)
+            rsi = 100 * gain_avg / total if total else NAN
+
+            true_range = max(abs(high - low), abs(high - self.prev_close), abs(self.prev_close - low))
+            atr = _rma_step(self.atr, true_range, ATR_LENGTH)
+        self.prev_close = close
+
+        return {
+            "SMA_10": sma_10,
+            "SMA_50": sma_50,
+            "EMA_10": self.ema["10"],
+            "EMA_50": self.ema["50"],
+            "RSI": rsi,
+            "MACD": self.ema["12"] - self.ema["26"],
+            "ATR": atr,
+        }
+
+    def to_dict(self):
+        return dict(self.__dict__)
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls()
+        state.__dict__.update(data)
+        return state
+
+
+# Fibonacci retracements over the window's high and low, as in compute_technical_indicators
+def fib_levels(df):
+    high = df["high"].max()
+    low = df["low"].min()
+    return {
+        "23.6%": high - (0.236 * (high - low)),
+        "38.2%": high - (0.382 * (high - low)),
+        "50%":  high - (0.50  * (high - low)),
+        "61.8%": high - (0.618 * (high - low)),
+        "78.6%": high - (0.786 * (high - low)),
+    }
+
+# Writes through a uniquely named temp file in the same folder, so concurrent workers
+# saving the same series never write into each other's file before the rename
+def _replace_atomically(path, write):
+    handle, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=os.path.basename(path) + ".", suffix=".tmp")
+    os.close(handle)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+class IndicatorEngine:
+    """
+    Keeps one IndicatorState per (symbol, series) next to the symbol's bars in the bar
+    store, with the indicator rows it produced keyed by bar date. A frame extends the
+    saved state only when it is a pure append: it starts at the same first bar, holds
+    every bar the state took in, and only adds bars after the last one. Those bars are
+    run through the state; anything else (a window that slid forward, a gap, a revised
+    last bar) is recomputed cold from the frame. Every window is therefore computed
+    from its own first bar, exactly like compute_technical_indicators, whatever was
+    asked for before.
+
+    State and rows are written together as one Parquet file (the state rides in the
+    schema metadata), so a reader never pairs the state of one run with the rows of another.
+    """
+
+    def __init__(self, root=BAR_STORE_DIR):
+        self.root = root
+
+    def _path(self, symbol, series):
+        return os.path.join(self.root, checked_path_part(str(symbol).upper()), "indicators", f"{checked_path_part(series)}.parquet")
+
+    def load(self, symbol, series):
+        path = self._path(symbol, series)
+        if not os.path.exists(path):
+            return None, None
+        table = pq.read_table(path, memory_map=True)
+        metadata = table.schema.metadata or {}
+        # Files from before the state was stored alongside the rows are rebuilt
+        if STATE_METADATA_KEY not in metadata or "date" not in table.column_names:
+            return None, None
+        state = IndicatorState.from_dict(json.loads(metadata[STATE_METADATA_KEY]))
+        return state, table.to_pandas()
+
+    def save(self, symbol, series, state, rows):
+        path = self._path(symbol, series)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        table = pa.Table.from_pandas(rows, preserve_index=False)
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), STATE_METADATA_KEY: json.dumps(state.to_dict())})
+        _replace_atomically(path, lambda tmp_path: pq.write_table(table, tmp_path))
+
+    # Position in dates of the last bar the state took in, when df is a pure append to it
+    @staticmethod
+    def _resume_at(state, rows, dates, closes):
+        if state is None or not dates or state.first_date != dates[0]:
+            return None
+        last = state.rows - 1
+        if last >= len(dates) or dates[last] != state.last_date:
+            return None
+        # The newest bar may have been partial when we saw it (intraday, today's EOD bar)
+        if closes[last] != state.prev_close:
+            return None
+        if rows["date"].tolist() != dates[:last + 1]:
+            return None
+        return last
+
+    # Returns (indicator frame, fib levels) for df, with bars taken in row order
+    def compute(self, symbol, series, df):
+        dates = df["date"].astype(str).tolist()
+        highs = df["high"].to_numpy(dtype=float)
+        lows = df["low"].to_numpy(dtype=float)
+        closes = df["close"].to_numpy(dtype=float)
+        state, rows = self.load(symbol, series)
+
+        last = self._resume_at(state, rows, dates, closes)
+        if last is None:
+            state, rows = IndicatorState(), pd.DataFrame(columns=["date"] + INDICATOR_COLUMNS)
+            start = 0
+        else:
+            start = last + 1
+
+        new_rows = [
+            dict(state.update(dates[i], highs[i], lows[i], closes[i]), date=dates[i])
+            for i in range(start, len(dates))
+        ]
+
+        if new_rows:
+            new_frame = pd.DataFrame(new_rows, columns=["date"] + INDICATOR_COLUMNS)
+            rows = new_frame if rows.empty else pd.concat([rows, new_frame], ignore_index=True)
+            self.save(symbol, series, state, rows)
+            print(f"[INFO] Indicators for {symbol} ({series}): {len(new_rows)} new bars, {start} reused.")
+
+        # rows line up with df bar for bar now
+        result = df.copy()
+        for column in INDICATOR_COLUMNS:
+            result[column] = rows[column].to_numpy(dtype=float)
+        return result, fib_levels(df)
+
+
+_engine = None
+
+# Returns the process-wide indicator engine
+def get_indicator_engine():
+    global _engine
+    if _engine is None:
+        _engine = IndicatorEngine()
+    return _engine
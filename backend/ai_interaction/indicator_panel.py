@@ -0,0 +1,124 @@
+import numpy as np
+
+# Same windows as compute_technical_indicators
+SMA_WINDOWS = (10, 50)
+EMA_SPANS = (10, 50)
+MACD_SPANS = (12, 26)
+RSI_LENGTH = 14
+ATR_LENGTH = 14
+FIB_RATIOS = {"23.6%": 0.236, "38.2%": 0.382, "50%": 0.50, "61.8%": 0.618, "78.6%": 0.786}
+
+
+# Moves each symbol's bars to the top of its column, keeping their order, so a symbol
+# that started later or missed days in between is laid out like its own bar frame.
+# Returns the row every packed value came from, for _unpack
+def _pack(valid, *arrays):
+    order = np.argsort(~valid, axis=0, kind="stable")
+    return order, [np.take_along_axis(values, order, axis=0) for values in arrays]
+
+def _unpack(order, packed):
+    out = np.empty_like(packed)
+    np.put_along_axis(out, order, packed, axis=0)
+    return out
+
+# Rolling mean down each column. Trailing NaNs (rows past a packed symbol's last bar)
+# come out as NaN
+def _rolling_mean(values, window):
+    valid = ~np.isnan(values)
+    sums = np.cumsum(np.where(valid, values, 0.0), axis=0)
+    counts = np.cumsum(valid, axis=0)
+
+    window_sums = sums.copy()
+    window_sums[window:] -= sums[:-window]
+    window_counts = counts.copy()
+    window_counts[window:] -= counts[:-window]
+
+    out = window_sums / window
+    out[(window_counts < window) | ~valid] = np.nan
+    return out
+
+
+def compute_indicator_panel(high, low, close):
+    """
+    Computes every indicator from compute_technical_indicators for a whole universe
+    at once. high/low/close are 2-D (time x symbol) arrays in chronological order,
+    with NaN wherever a symbol has no bar: before its first one, or on dates in
+    between that it skipped. Returns (indicators, fib_levels) where indicators maps
+    each column name to a (time x symbol) array, NaN on those missing rows, and
+    fib_levels maps each level to one value per symbol.
+
+    Each symbol's indicators only see its own bars, as if its missing rows were
+    dropped: windows and the previous close reach back over a gap, exactly like
+    compute_technical_indicators on that symbol's frame. Nothing is forward-filled.
+
+    The EMA, RSI and ATR recursions walk the time axis once, updating every symbol
+    in the same vectorized step.
+    """
+    close = np.asarray(close, dtype=float)
+    order, (high, low, close) = _pack(~np.isnan(close), np.asarray(high, dtype=float), np.asarray(low, dtype=float), close)
+    steps, symbols = close.shape
+
+    indicators = {f"SMA_{window}": _rolling_mean(close, window) for window in SMA_WINDOWS}
+
+    ema_spans = sorted(set(EMA_SPANS + MACD_SPANS))
+    ema_alpha = {span: 2.0 / (span + 1) for span in ema_spans}
+    ema_state = {span: np.full(symbols, np.nan) for span in ema_spans}
+    ema_out = {span: np.full((steps, symbols), np.nan) for span in ema_spans}
+
+    # RSI and ATR use pandas_ta's rma: an adjusted EWM with alpha=1/length and
+    # min_periods=length, which we carry as decayed sums / decayed weights / counts
+    change = np.full_like(close, np.nan)
+    change[1:] = close[1:] - close[:-1]
+    gains = np.where(change > 0, change, np.where(np.isnan(change), np.nan, 0.0))
+    losses = np.where(change < 0, change, np.where(np.isnan(change), np.nan, 0.0))
+
+    prev_close = np.full_like(close, np.nan)
+    prev_close[1:] = close[:-1]
+    true_range = np.fmax(np.abs(high - low), np.fmax(np.abs(high - prev_close), np.abs(prev_close - low)))
+    true_range[np.isnan(prev_close)] = np.nan
+
+    rma_inputs = {"gain": (gains, RSI_LENGTH), "loss": (losses, RSI_LENGTH), "atr": (true_range, ATR_LENGTH)}
+    rma_sum = {name: np.zeros(symbols) for name in rma_inputs}
+    rma_weight = {name: np.zeros(symbols) for name in rma_inputs}
+    rma_count = {name: np.zeros(symbols) for name in rma_inputs}
+    rma_out = {name: np.full((steps, symbols), np.nan) for name in rma_inputs}
+
+    for t in range(steps):
+        price = close[t]
+        has_price = ~np.isnan(price)
+        for span in ema_spans:
+            state = ema_state[span]
+            updated = np.where(np.isnan(state), price, ema_alpha[span] * price + (1 - ema_alpha[span]) * state)
+            ema_state[span] = np.where(has_price, updated, state)
+            ema_out[span][t] = np.where(has_price, ema_state[span], np.nan)
+
+        for name, (series, length) in rma_inputs.items():
+            value = series[t]
+            has_value = ~np.isnan(value)
+            decay = 1 - 1.0 / length
+            rma_sum[name] = np.where(has_value, np.nan_to_num(value) + decay * rma_sum[name], rma_sum[name])
+            rma_weight[name] = np.where(has_value, 1 + decay * rma_weight[name], rma_weight[name])
+            rma_count[name] = rma_count[name] + has_value
+            ready = has_value & (rma_count[name] >= length)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                rma_out[name][t] = np.where(ready, rma_sum[name] / rma_weight[name], np.nan)
+
+    for span in EMA_SPANS:
+        indicators[f"EMA_{span}"] = ema_out[span]
+
+    gain_avg, loss_avg = rma_out["gain"], rma_out["loss"]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        indicators["RSI"] = 100 * gain_avg / (gain_avg + np.abs(loss_avg))
+    indicators["MACD"] = ema_out[MACD_SPANS[0]] - ema_out[MACD_SPANS[1]]
+    indicators["ATR"] = rma_out["atr"]
+    indicators = {name: _unpack(order, values) for name, values in indicators.items()}
+
+    with np.errstate(invalid="ignore"):
+        period_high = np.nanmax(high, axis=0)
+        period_low = np.nanmin(low, axis=0)
+    fib_levels = {
+        level: period_high - ratio * (period_high - period_low)
+        for level, ratio in FIB_RATIOS.items()
+    }
+    return indicators, fib_levels
+
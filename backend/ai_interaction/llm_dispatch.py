@@ -0,0 +1,323 @@
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+LLM_MODEL = os.getenv("LLM_MODEL", "gpt-4-turbo")
+# Leave unset for api.openai.com; point it at any OpenAI-compatible server (e.g. a local fake) otherwise
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL")
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 8))
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", 45))
+# Fire a second identical request if the first hasn't answered after this long (0 turns hedging off)
+LLM_HEDGE_AFTER_SECONDS = float(os.getenv("LLM_HEDGE_AFTER_SECONDS", 0))
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", 5))
+LLM_BREAKER_COOLDOWN_SECONDS = float(os.getenv("LLM_BREAKER_COOLDOWN_SECONDS", 30))
+
+
+class CircuitOpenError(Exception):
+    pass
+
+class LLMTimeoutError(Exception):
+    pass
+
+
+class CircuitBreaker:
+    """
+    Counts consecutive failures. Once there are `failure_threshold` of them the
+    breaker opens and calls fail straight away for `cooldown` seconds; after that a
+    single trial call is let through, and its outcome closes or re-opens the breaker.
+    """
+
+    def __init__(self, failure_threshold=LLM_BREAKER_FAILURES, cooldown=LLM_BREAKER_COOLDOWN_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self.lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self.lock:
+            return self._state()
+
+    def _state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.cooldown:
+            return "half_open"
+        return "open"
+
+    # True while failing fast; unlike allow() this never claims the half-open trial
+    def is_open(self):
+        return self.state == "open"
+
+    # Returns the state the call was let through in ("closed", or "half_open" for the
+    # trial call), or False when it has to fail fast
+    def allow(self):
+        with self.lock:
+            state = self._state()
+            if state == "closed":
+                return state
+            if state == "half_open" and not self.trial_in_flight:
+                self.trial_in_flight = True
+                return state
+            return False
+
+    # Hands the half-open trial back without a verdict, e.g. when the caller walked away mid-stream
+    def release_trial(self):
+        with self.lock:
+            self.trial_in_flight = False
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.trial_in_flight or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self.trial_in_flight = False
+
+
+class LLMDispatcher:
+    """
+    Runs chat completions on a bounded pool with a deadline per call, optional
+    hedged retries for slow tails and a circuit breaker that fails fast while the
+    provider is degraded. complete_many() fans a whole batch out at once.
+    """
+
+    def __init__(
+        self,
+        client=None,
+        model=LLM_MODEL,
+        max_concurrency=LLM_MAX_CONCURRENCY,
+        timeout=LLM_TIMEOUT_SECONDS,
+        hedge_after=LLM_HEDGE_AFTER_SECONDS,
+        breaker=None,
+    ):
+        if client is None:
+            # The SDK takes a while to import, so processes that never call the model don't pay for it
+            from openai import OpenAI
+
+            client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"), base_url=OPENAI_BASE_URL)
+        # The dispatcher owns retries and deadlines, so the SDK shouldn't retry on its own
+        self.client = client.with_options(max_retries=0, timeout=timeout)
+        self.model = model
+        self.timeout = timeout
+        self.hedge_after = hedge_after
+        self.breaker = breaker or CircuitBreaker()
+        self.max_concurrency = max_concurrency
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="llm")
+        self.counters = {"calls": 0, "succeeded": 0, "failed": 0, "timeouts": 0, "queued_out": 0, "hedged": 0, "rejected": 0, "late": 0}
+        self.lock = threading.Lock()
+
+    def _count(self, name):
+        with self.lock:
+            self.counters[name] += 1
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counters, breaker=self.breaker.state)
+
+    def _create(self, messages, max_tokens, temperature, request_timeout):
+        # Calls that were queued behind a slot when the breaker opened shouldn't go out
+        if self.breaker.is_open():
+            raise CircuitOpenError("LLM circuit breaker opened while the call was queued")
+        response = self.client.with_options(timeout=request_timeout).chat.completions.create(
+            model=self.model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature
+        )
+        return response.choices[0].message.content
+
+    # Queues one attempt on the pool. `started` is set once it holds a slot, which tells a
+    # provider that is slow apart from a pool that is busy
+    def _submit(self, started, messages, max_tokens, temperature, request_timeout):
+        def attempt():
+            started.set()
+            return self._create(messages, max_tokens, temperature, request_timeout)
+        return self.executor.submit(attempt)
+
+    # Hands the first successful answer among calls still running after the deadline to on_late,
+    # so a caller that stopped waiting can still keep the completion it paid for
+    def _deliver_late(self, pending, on_late):
+        lock = threading.Lock()
+        delivered = []
+
+        def deliver(future):
+            if future.cancelled() or future.exception() is not None:
+                return
+            with lock:
+                if delivered:
+                    return
+                delivered.append(future)
+            self._count("late")
+            self.breaker.record_success()
+            try:
+                on_late(future.result())
+            except Exception as e:
+                print(f"[ERROR] Handling a late LLM completion failed: {e}")
+
+        for future in pending:
+            future.add_done_callback(deliver)
+
+    # Returns the completion text for one set of messages, or raises
+    # CircuitOpenError / LLMTimeoutError / the provider's error. When the deadline passes
+    # while a call is still running, on_late (if given) gets its text once it arrives
+    def complete(self, messages, max_tokens=700, temperature=0.7, timeout=None, on_late=None):
+        if not self.breaker.allow():
+            self._count("rejected")
+            raise CircuitOpenError("LLM circuit breaker is open")
+
+        self._count("calls")
+        deadline = time.monotonic() + (timeout or self.timeout)
+        # The HTTP call gives up at the same deadline, so a timed-out call frees its pool slot.
+        # Only a caller waiting for a late answer lets it run to the dispatcher's full timeout
+        request_timeout = self.timeout if on_late is not None else (timeout or self.timeout)
+        attempts = [threading.Event()]
+        pending = {self._submit(attempts[0], messages, max_tokens, temperature, request_timeout)}
+        hedged = self.hedge_after <= 0
+        last_error = None
+
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            wait_for = remaining if hedged else min(remaining, self.hedge_after)
+            done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                if future.exception() is None:
+                    self._count("succeeded")
+                    self.breaker.record_success()
+                    return future.result()
+                last_error = future.exception()
+
+            # First attempt is slow (or failed): race a second one against it
+            if not hedged:
+                hedged = True
+                self._count("hedged")
+                attempts.append(threading.Event())
+                pending.add(self._submit(attempts[-1], messages, max_tokens, temperature, request_timeout))
+
+        if isinstance(last_error, CircuitOpenError) and not pending:
+            self._count("rejected")
+            raise last_error
+        # Never got a slot before the deadline: our own pool was full, which says nothing
+        # about the provider, so the breaker isn't told. cancel() fails for one that just started
+        if pending and not any(started.is_set() for started in attempts):
+            if all([future.cancel() for future in pending]):
+                self._count("queued_out")
+                raise LLMTimeoutError(f"LLM call waited {timeout or self.timeout:g}s for a free slot")
+        self.breaker.record_failure()
+        if last_error is not None and not pending:
+            self._count("failed")
+            raise last_error
+        self._count("timeouts")
+        if on_late is not None:
+            self._deliver_late(pending, on_late)
+        else:
+            # Calls still queued behind a slot never start
+            for future in pending:
+                future.cancel()
+        raise LLMTimeoutError(f"LLM call exceeded {timeout or self.timeout:g}s")
+
+    # Fans a batch of message lists out, as many at a time as the pool has slots. Each
+    # call's deadline starts when it is picked up, so the tail of a large batch isn't
+    # timed out by waiting behind the head. Returns one result per input, with None for
+    # calls that failed, timed out or were rejected by the breaker
+    def complete_many(self, batch, max_tokens=700, temperature=0.7, timeout=None):
+        if not batch:
+            return []
+
+        def run(messages):
+            try:
+                return self.complete(messages, max_tokens=max_tokens, temperature=temperature, timeout=timeout)
+            except Exception as e:
+                print(f"[ERROR] Batched LLM call failed: {e}")
+                return None
+
+        # Waiting happens on a separate pool so it never blocks the slots doing the actual calls
+        with ThreadPoolExecutor(max_workers=min(len(batch), self.max_concurrency)) as waiters:
+            return list(waiters.map(run, batch))
+
+    # Streams the completion text piece by piece through the same breaker. The whole
+    # stream has to finish within the timeout: a watchdog closes the response at the
+    # deadline, so a stalled provider can't hold the caller past it
+    def stream(self, messages, max_tokens=700, temperature=0.7, timeout=None):
+        admitted = self.breaker.allow()
+        if not admitted:
+            self._count("rejected")
+            raise CircuitOpenError("LLM circuit breaker is open")
+
+        self._count("calls")
+        timeout = timeout or self.timeout
+        deadline = time.monotonic() + timeout
+        outcome = None
+        stream = None
+        watchdog = None
+        try:
+            stream = self.client.with_options(timeout=timeout).chat.completions.create(
+                model=self.model,
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                stream=True
+            )
+            watchdog = threading.Timer(max(0.0, deadline - time.monotonic()), stream.close)
+            watchdog.daemon = True
+            watchdog.start()
+            for chunk in stream:
+                if time.monotonic() >= deadline:
+                    break
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+            # A stream cut by the watchdog can end without an error, so check the clock too
+            if time.monotonic() >= deadline:
+                raise LLMTimeoutError(f"LLM stream exceeded {timeout:g}s")
+            outcome = "succeeded"
+        except LLMTimeoutError:
+            outcome = "timeouts"
+            raise
+        except Exception as e:
+            if time.monotonic() >= deadline:
+                outcome = "timeouts"
+                raise LLMTimeoutError(f"LLM stream exceeded {timeout:g}s") from e
+            outcome = "failed"
+            raise
+        finally:
+            if watchdog is not None:
+                watchdog.cancel()
+            if stream is not None:
+                # Frees the HTTP connection when the caller stopped reading early
+                stream.close()
+            if outcome is None:
+                # The consumer went away (e.g. the SSE client disconnected): no verdict on the provider
+                if admitted == "half_open":
+                    self.breaker.release_trial()
+            else:
+                self._count(outcome)
+                if outcome == "succeeded":
+                    self.breaker.record_success()
+                else:
+                    self.breaker.record_failure()
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+# Returns the process-wide dispatcher
+def get_llm_dispatcher():
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = LLMDispatcher()
+    return _dispatcher
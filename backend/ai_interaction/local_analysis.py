@@ -0,0 +1,120 @@
+# Deterministic, template-driven stand-in for the LLM analysis. It reads the same
+# feature digest the prompt is built from (prompt_builder.build_feature_digest), so it
+# needs no extra data and answers in microseconds.
+
+# ATR percentile cut-offs for the volatility buckets
+LOW_VOLATILITY_PERCENTILE = 33
+HIGH_VOLATILITY_PERCENTILE = 67
+
+
+def _price(value):
+    return f"${value:,.2f}"
+
+# Bullish / bearish / neutral from the moving average crossovers, and how strong it is
+def classify_trend(features):
+    crossovers = features.get("crossovers") or {}
+    votes = 0
+    counted = 0
+    for name in ("ema_10_vs_50", "sma_10_vs_50", "close_vs_sma_50"):
+        crossover = crossovers.get(name)
+        if crossover:
+            votes += 1 if crossover["position"] == "above" else -1
+            counted += 1
+
+    if counted == 0:
+        # Too few bars for the 50-period averages, fall back to the price slope
+        slope = (features.get("slopes") or {}).get("close")
+        if not slope:
+            return "neutral", "weak"
+        return ("bullish" if slope > 0 else "bearish"), "weak"
+
+    if votes == counted:
+        return "bullish", "strong"
+    if votes == -counted:
+        return "bearish", "strong"
+    if votes > 0:
+        return "bullish", "weak"
+    if votes < 0:
+        return "bearish", "weak"
+    return "neutral", "weak"
+
+def volatility_bucket(atr_percentile):
+    if atr_percentile is None:
+        return None
+    if atr_percentile < LOW_VOLATILITY_PERCENTILE:
+        return "low"
+    if atr_percentile >= HIGH_VOLATILITY_PERCENTILE:
+        return "high"
+    return "moderate"
+
+
+def local_analysis(symbol, timeframe, features):
+    """
+    Writes a short plain-English summary of a feature digest: the trend from the
+    SMA/EMA crossovers, the RSI regime, MACD momentum, an ATR volatility bucket and
+    the nearest Fibonacci support and resistance. Same input, same text.
+    """
+    latest = features.get("latest") or {}
+    slopes = features.get("slopes") or {}
+    crossovers = features.get("crossovers") or {}
+    trend, strength = classify_trend(features)
+
+    sentences = []
+    change = features.get("period_change_pct")
+    if features.get("close") is not None:
+        moved = ""
+        if change is not None:
+            moved = f", {'up' if change >= 0 else 'down'} {abs(change):.1f}% over this period"
+        sentences.append(f"{symbol} last closed at {_price(features['close'])}{moved}.")
+
+    if trend == "neutral":
+        sentences.append("The moving averages don't agree on a direction, so the stock looks to be moving sideways (neutral).")
+    else:
+        direction = "up" if trend == "bullish" else "down"
+        sentences.append(f"The moving averages point {direction}, a {strength} {trend} trend.")
+    if any(crossover and crossover["crossed_recently"] for crossover in crossovers.values()):
+        sentences.append("There was a moving average crossover in the last few bars, so the trend may be changing.")
+
+    rsi = latest.get("RSI")
+    regime = features.get("rsi_regime")
+    if regime == "overbought":
+        sentences.append(f"RSI is {rsi:.0f}, which is overbought: the price has risen fast and could cool off.")
+    elif regime == "oversold":
+        sentences.append(f"RSI is {rsi:.0f}, which is oversold: the price has fallen fast and could bounce.")
+    elif regime == "neutral":
+        sentences.append(f"RSI is {rsi:.0f}, neither overbought nor oversold.")
+
+    macd_sign = features.get("macd_sign")
+    if macd_sign:
+        building = (slopes.get("MACD") or 0) > 0
+        if macd_sign == "positive":
+            sentences.append("MACD is positive and " + ("rising, so upward momentum is building." if building else "falling, so upward momentum is fading."))
+        else:
+            sentences.append("MACD is negative and " + ("rising, so downward pressure is easing." if building else "falling, so downward pressure is building."))
+
+    bucket = volatility_bucket(features.get("atr_percentile"))
+    if bucket:
+        swings = {"low": "calmer than usual", "moderate": "about normal", "high": "bigger than usual"}[bucket]
+        sentences.append(f"Volatility is {bucket}: price swings are {swings} for this period.")
+
+    support, resistance = features.get("fib_support"), features.get("fib_resistance")
+    if support and resistance:
+        sentences.append(
+            f"Nearby support is around {_price(support['price'])} ({support['level']} Fibonacci level) "
+            f"and resistance around {_price(resistance['price'])} ({resistance['level']})."
+        )
+    elif support:
+        sentences.append(f"Nearby support is around {_price(support['price'])} ({support['level']} Fibonacci level).")
+    elif resistance:
+        sentences.append(f"Nearby resistance is around {_price(resistance['price'])} ({resistance['level']} Fibonacci level).")
+
+    outlook = {
+        "bullish": "Overall outlook: bullish",
+        "bearish": "Overall outlook: bearish",
+        "neutral": "Overall outlook: neutral",
+    }[trend]
+    if trend != "neutral":
+        outlook += f", with a {strength} trend"
+    sentences.append(f"{outlook} ({timeframe}).")
+
+    return " ".join(sentences)
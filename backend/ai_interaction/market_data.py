@@ -0,0 +1,177 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+import pandas as pd
+from dotenv import load_dotenv
+from ai_interaction.fetch_scheduler import FetchScheduler
+
+# Load environment variables
+load_dotenv()
+MARKETSTACK_API_KEY = os.getenv("MARKETSTACK_API_KEY")
+MARKETSTACK_EOD_ENDPOINT = "https://api.marketstack.com/v1/eod"
+MARKETSTACK_INTRADAY_ENDPOINT = "https://api.marketstack.com/v1/intraday"
+
+# How many pages we are allowed to have in flight at once for a single backfill
+MARKETSTACK_MAX_WORKERS = int(os.getenv("MARKETSTACK_MAX_WORKERS", 4))
+# Provider caps: symbols per comma-separated request and rows per page
+MARKETSTACK_MAX_SYMBOLS = int(os.getenv("MARKETSTACK_MAX_SYMBOLS", 100))
+MARKETSTACK_MAX_PAGE_LIMIT = 1000
+
+
+# Keeps one keep-alive HTTP session around for every Marketstack call so we
+# stop paying a fresh TCP/TLS handshake for each page
+class MarketDataClient:
+    def __init__(self, api_key=MARKETSTACK_API_KEY, max_workers=MARKETSTACK_MAX_WORKERS, scheduler=None):
+        self.api_key = api_key
+        self.max_workers = max(1, int(max_workers))
+        self.scheduler = scheduler or FetchScheduler()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.max_workers, pool_maxsize=self.max_workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    # Sends one GET through the shared session and returns the decoded JSON body.
+    # The scheduler handles rate limiting, timeouts and retries
+    def get_json(self, endpoint, params):
+        params = dict(params, access_key=self.api_key)
+        response = self.scheduler.get(self.session, endpoint, params=params)
+        print(f"Request URL: {response.url}")
+        print(f"Response Status Code: {response.status_code}")
+        return response.json()
+
+    # Fetches every EOD page for a symbol. The first page tells us pagination.total,
+    # then the remaining offsets are pulled concurrently and the frame is built once.
+    # With raise_errors the caller gets the RequestException instead of an empty frame
+    def fetch_eod(self, symbol, date_from=None, date_to=None, limit=1000, raise_errors=False):
+        params = {
+            "symbols": symbol,
+            "date_from": date_from,
+            "date_to": date_to,
+        }
+        records = self._fetch_all(MARKETSTACK_EOD_ENDPOINT, params, limit, raise_errors)
+        return pd.DataFrame(records)
+
+    # Fetches EOD bars for many symbols at once. Symbols are packed into as few
+    # comma-separated requests as the provider allows and the combined response
+    # is split back into one frame per symbol
+    def fetch_eod_batch(self, symbols, date_from=None, date_to=None, limit=1000, raise_errors=False):
+        frames = {}
+        for chunk in _chunks(symbols, MARKETSTACK_MAX_SYMBOLS):
+            params = {
+                "symbols": ",".join(chunk),
+                "date_from": date_from,
+                "date_to": date_to,
+            }
+            records = self._fetch_all(MARKETSTACK_EOD_ENDPOINT, params, limit, raise_errors)
+            frames.update(_split_by_symbol(pd.DataFrame(records), chunk))
+        return frames
+
+    # Walks every page of a paginated endpoint and returns the raw records in API order
+    def _fetch_all(self, endpoint, params, limit, raise_errors=False):
+        params = dict(params, limit=limit)
+        try:
+            first_page = self.get_json(endpoint, dict(params, offset=0))
+        except requests.exceptions.RequestException as e:
+            print(f"API request error: {e}")
+            if raise_errors:
+                raise
+            return []
+
+        records = first_page.get("data") or []
+        if not records:
+            print("No valid data returned.")
+            return []
+
+        pagination = first_page.get("pagination", {})
+        total = pagination.get("total", len(records))
+        offsets = list(range(limit, total, limit))
+
+        if offsets:
+            print(f"Fetched {len(records)} of {total} rows. Pulling {len(offsets)} more pages...")
+            pages = self._fetch_pages(endpoint, params, offsets)
+            for page in pages:
+                if page is None:
+                    if raise_errors:
+                        raise requests.exceptions.RequestException(f"Incomplete backfill for {params['symbols']}")
+                    break
+                records.extend(page)
+
+        print(f"Fetched {len(records)} rows in total.")
+        return records
+
+    # Pulls the given offsets in parallel, capped at max_workers. Results come back
+    # in offset order so the final frame keeps the API's row order
+    def _fetch_pages(self, endpoint, params, offsets):
+        def fetch_page(offset):
+            try:
+                return self.get_json(endpoint, dict(params, offset=offset)).get("data") or []
+            except requests.exceptions.RequestException as e:
+                print(f"API request error at offset {offset}: {e}")
+                return None
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(offsets))) as executor:
+            return list(executor.map(fetch_page, offsets))
+
+    # Fetches intraday candles for a single trading day
+    def fetch_intraday(self, symbol, trading_day, interval="15min", limit=100):
+        params = {
+            "symbols": symbol,
+            "interval": interval,
+            "limit": limit,
+        }
+        try:
+            data = self.get_json(f"{MARKETSTACK_INTRADAY_ENDPOINT}/{trading_day}", params)
+        except requests.exceptions.RequestException as e:
+            print(f"API request error: {e}")
+            return pd.DataFrame()
+
+        if "data" in data and data["data"]:
+            return _sort_intraday(pd.DataFrame(data["data"]))
+
+        return pd.DataFrame()
+
+    # Fetches intraday candles for many symbols on one trading day. Each symbol
+    # keeps at most `limit` of its most recent candles, like the single-symbol call
+    def fetch_intraday_batch(self, symbols, trading_day, interval="15min", limit=100):
+        endpoint = f"{MARKETSTACK_INTRADAY_ENDPOINT}/{trading_day}"
+        frames = {}
+        for chunk in _chunks(symbols, MARKETSTACK_MAX_SYMBOLS):
+            params = {
+                "symbols": ",".join(chunk),
+                "interval": interval,
+            }
+            page_limit = min(MARKETSTACK_MAX_PAGE_LIMIT, limit * len(chunk))
+            records = self._fetch_all(endpoint, params, page_limit)
+            for symbol, frame in _split_by_symbol(pd.DataFrame(records), chunk).items():
+                frames[symbol] = _sort_intraday(frame.head(limit).copy()) if not frame.empty else frame
+        return frames
+
+
+# Splits a multi-symbol response into one frame per requested symbol
+def _split_by_symbol(combined, symbols):
+    frames = {symbol: pd.DataFrame() for symbol in symbols}
+    if combined.empty or "symbol" not in combined.columns:
+        return frames
+    for symbol, frame in combined.groupby("symbol", sort=False):
+        frames[symbol] = frame.reset_index(drop=True)
+    return frames
+
+def _sort_intraday(intraday_data):
+    if not intraday_data.empty and "date" in intraday_data.columns:
+        intraday_data["date"] = pd.to_datetime(intraday_data["date"])
+    return intraday_data.sort_values(by="date").reset_index(drop=True)
+
+def _chunks(items, size):
+    items = list(items)
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+_client = None
+
+# Returns the process-wide client so all callers share one connection pool
+def get_market_data_client():
+    global _client
+    if _client is None:
+        _client = MarketDataClient()
+    return _client
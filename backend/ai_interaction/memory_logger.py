@@ -0,0 +1,29 @@
+from pytorch_lightning.loggers.logger import Logger
+
+
+class InMemoryLogger(Logger):
+    """
+    Lightning logger that keeps the last value of every metric (and the
+    hyperparameters) on the object instead of writing event files.
+    """
+
+    def __init__(self, run_name):
+        super().__init__()
+        self.run_name = run_name
+        self.metrics = {}
+        self.hyperparameters = {}
+
+    @property
+    def name(self):
+        return "memory"
+
+    @property
+    def version(self):
+        return self.run_name
+
+    def log_hyperparams(self, params, *args, **kwargs):
+        self.hyperparameters = {key: str(value) for key, value in dict(params).items()}
+
+    def log_metrics(self, metrics, step=None):
+        for key, value in metrics.items():
+            self.metrics[key] = float(value)
@@ -0,0 +1,109 @@
+import os
+import threading
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client
+from dotenv import load_dotenv
+from ai_interaction.training_scheduler import TrainingSlotTimeout
+
+# Load environment variables
+load_dotenv()
+# Where model_server.py listens: a socket path, or host:port. Unset = forecast in-process
+MODEL_SERVER_ADDRESS = os.getenv("MODEL_SERVER_ADDRESS")
+# Required by both sides. Requests are pickled, so without it anyone who can reach the
+# socket can run code in the server
+MODEL_SERVER_AUTHKEY = os.getenv("MODEL_SERVER_AUTHKEY", "").encode() or None
+# A request can include a full retrain, so this is generous
+MODEL_SERVER_TIMEOUT = float(os.getenv("MODEL_SERVER_TIMEOUT", 900))
+# Train in-process when the server can't be reached, instead of failing the forecast
+MODEL_SERVER_FALLBACK = os.getenv("MODEL_SERVER_FALLBACK", "True") == "True"
+
+
+class ModelServerUnavailable(Exception):
+    pass
+
+class ModelServerError(Exception):
+    pass
+
+
+# Refuses to talk to (or run) a model server without a shared secret
+def require_authkey(authkey):
+    if not authkey:
+        raise ModelServerError("MODEL_SERVER_AUTHKEY must be set to use the model server")
+    return authkey
+
+# "host:port" means TCP, anything else is a Unix socket path
+def parse_address(address):
+    host, _, port = address.rpartition(":")
+    if host and port.isdigit():
+        return host, int(port)
+    return address
+
+
+class ModelClient:
+    """
+    Thin client for model_server.py. Each thread keeps one open connection and
+    reuses it, so a predict for a resident model costs one round trip.
+    """
+
+    def __init__(self, address=MODEL_SERVER_ADDRESS, authkey=MODEL_SERVER_AUTHKEY, timeout=MODEL_SERVER_TIMEOUT):
+        self.address = parse_address(address)
+        self.authkey = require_authkey(authkey)
+        self.timeout = timeout
+        self.local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            try:
+                connection = Client(self.address, authkey=self.authkey)
+            except AuthenticationError:
+                raise ModelServerError("Model server rejected our MODEL_SERVER_AUTHKEY")
+            except (OSError, EOFError) as e:
+                raise ModelServerUnavailable(f"Model server at {self.address} is not reachable: {e}")
+            self.local.connection = connection
+        return connection
+
+    def _drop_connection(self):
+        connection = getattr(self.local, "connection", None)
+        self.local.connection = None
+        if connection is not None:
+            connection.close()
+
+    def request(self, op, **params):
+        connection = self._connection()
+        try:
+            connection.send({"op": op, **params})
+            if not connection.poll(self.timeout):
+                raise ModelServerError(f"Model server did not answer '{op}' within {self.timeout:.0f}s")
+            response = connection.recv()
+        except (OSError, EOFError) as e:
+            # The server restarted or dropped us; the next call reconnects
+            self._drop_connection()
+            raise ModelServerUnavailable(f"Lost the connection to the model server: {e}")
+        except ModelServerError:
+            # A late answer would arrive out of order, so don't reuse this connection
+            self._drop_connection()
+            raise
+
+        if not response.get("ok"):
+            if response.get("busy"):
+                raise TrainingSlotTimeout(response["error"])
+            raise ModelServerError(response.get("error", "unknown model server error"))
+        return response.get("result")
+
+    # Predictions for a preprocessed frame (one or more series), as a NeuralForecast predict() frame
+    def predict(self, key, timeframe, df):
+        return self.request("predict", key=key, timeframe=timeframe, df=df)
+
+    def stats(self):
+        return self.request("stats")
+
+
+_client = None
+
+# Returns the process-wide model server client, or None when no server is configured
+def get_model_client():
+    global _client
+    if _client is None and MODEL_SERVER_ADDRESS:
+        _client = ModelClient()
+    return _client
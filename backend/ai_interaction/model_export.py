@@ -0,0 +1,167 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+import torch
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+# Also write a TorchScript copy of each fitted model and predict with it when nothing changed.
+# Off by default; an export is only kept once it reproduced predict() on the training frame
+MODEL_EXPORT_ENABLED = os.getenv("MODEL_EXPORT_ENABLED", "False") == "True"
+# Dynamic int8 quantization of the LSTM and Linear layers (smaller and faster, slightly less exact)
+MODEL_EXPORT_QUANTIZE = os.getenv("MODEL_EXPORT_QUANTIZE", "False") == "True"
+# Largest difference from predict() an export may show, relative to the forecast's scale.
+# float32 only differs by rounding; int8 gets the looser bound
+MODEL_EXPORT_TOLERANCE = float(os.getenv("MODEL_EXPORT_TOLERANCE", 1e-3))
+MODEL_EXPORT_QUANTIZED_TOLERANCE = float(os.getenv("MODEL_EXPORT_QUANTIZED_TOLERANCE", 5e-2))
+
+EXPORT_FILE = "model.torchscript.pt"
+EXPORT_METADATA_FILE = "export.json"
+
+
+class _ForecastGraph(torch.nn.Module):
+    """
+    The part of NeuralForecast's predict() that actually computes something, for one
+    fitted model: scale the input window with the model's own scaler, run the network,
+    undo the scaling. Takes the last `input_size` values and their mask, [batch, input_size].
+    """
+
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+        self.scaler = model.scaler
+        self.h = model.h
+
+    def forward(self, insample_y, insample_mask):
+        y = insample_y.unsqueeze(-1)
+        mask = insample_mask.unsqueeze(-1)
+        scaled = self.scaler.transform(x=y, mask=mask)
+        shift, scale = self.scaler.x_shift, self.scaler.x_scale
+
+        windows_batch = {
+            "insample_y": scaled,
+            "insample_mask": insample_mask,
+            "futr_exog": None,
+            "hist_exog": None,
+            "stat_exog": None,
+        }
+        output = self.model(windows_batch)
+        # Older recurrent models return a forecast for every position of the window; keep the last
+        if output.dim() == 4:
+            output = output[:, -1]
+        output = output.reshape(output.shape[0], self.h, -1)[..., 0]
+        return output * scale[..., 0] + shift[..., 0]
+
+
+# Writes the fitted model's TorchScript graph and what the predictor needs to feed it into `folder`
+def export_model(nf, folder, quantize=MODEL_EXPORT_QUANTIZE):
+    model = nf.models[0]
+    model.eval()
+    graph = _ForecastGraph(model).eval()
+    if quantize:
+        graph = torch.ao.quantization.quantize_dynamic(graph, {torch.nn.LSTM, torch.nn.Linear}, dtype=torch.qint8)
+
+    example = (torch.randn(2, model.input_size), torch.ones(2, model.input_size))
+    with torch.no_grad():
+        scripted = torch.jit.trace(graph, example, check_trace=False)
+    scripted = torch.jit.freeze(scripted.eval()) if not quantize else scripted
+    os.makedirs(folder, exist_ok=True)
+    torch.jit.save(scripted, os.path.join(folder, EXPORT_FILE))
+
+    with open(os.path.join(folder, EXPORT_METADATA_FILE), "w") as f:
+        json.dump({
+            "model": type(model).__name__,
+            "input_size": int(model.input_size),
+            "h": int(model.h),
+            "freq": nf.freq if isinstance(nf.freq, str) else str(nf.freq),
+            "quantized": bool(quantize),
+        }, f, indent=2)
+
+class ExportMismatch(Exception):
+    pass
+
+
+# Largest absolute difference between two predict() frames, relative to the forecasts' scale
+def export_error(expected, got, column):
+    expected = expected.reset_index() if "unique_id" not in expected.columns else expected
+    expected = expected.sort_values(["unique_id", "ds"]).reset_index(drop=True)
+    got = got.sort_values(["unique_id", "ds"]).reset_index(drop=True)
+    if len(expected) != len(got) or not (expected["ds"].to_numpy() == got["ds"].to_numpy()).all():
+        return float("inf")
+    want = expected[column].to_numpy(dtype=float)
+    diff = np.abs(want - got[column].to_numpy(dtype=float))
+    return float(diff.max() / max(1.0, np.abs(want).max()))
+
+# Exports the model and checks the export against nf.predict(df=df) before keeping it.
+# A mismatch deletes the export again and raises ExportMismatch, so predict() stays on
+# the full NeuralForecast path for this model
+def export_verified(nf, folder, df, quantize=MODEL_EXPORT_QUANTIZE):
+    export_model(nf, folder, quantize=quantize)
+    tolerance = MODEL_EXPORT_QUANTIZED_TOLERANCE if quantize else MODEL_EXPORT_TOLERANCE
+    error = export_error(nf.predict(df=df), ExportedForecaster(folder).predict(df), type(nf.models[0]).__name__)
+    if not error <= tolerance:
+        remove_export(folder)
+        raise ExportMismatch(f"export differs from predict() by {error:.2e} (tolerance {tolerance:g})")
+    with open(os.path.join(folder, EXPORT_METADATA_FILE)) as f:
+        metadata = json.load(f)
+    with open(os.path.join(folder, EXPORT_METADATA_FILE), "w") as f:
+        json.dump(dict(metadata, verified_error=error, tolerance=tolerance), f, indent=2)
+    return error
+
+def remove_export(folder):
+    for name in (EXPORT_FILE, EXPORT_METADATA_FILE):
+        path = os.path.join(folder, name)
+        if os.path.exists(path):
+            os.remove(path)
+
+# Only exports that passed export_verified count; older unchecked ones are ignored
+def has_export(folder):
+    metadata_path = os.path.join(folder, EXPORT_METADATA_FILE)
+    if not os.path.exists(os.path.join(folder, EXPORT_FILE)) or not os.path.exists(metadata_path):
+        return False
+    with open(metadata_path) as f:
+        return "verified_error" in json.load(f)
+
+
+class ExportedForecaster:
+    """
+    Predicts straight from an exported graph: no Trainer, no data module. predict()
+    takes the same preprocessed frame as NeuralForecast.predict(df=...) and returns
+    the same columns (unique_id, ds, <model name>).
+    """
+
+    def __init__(self, folder):
+        with open(os.path.join(folder, EXPORT_METADATA_FILE)) as f:
+            self.metadata = json.load(f)
+        self.graph = torch.jit.load(os.path.join(folder, EXPORT_FILE))
+        self.graph.eval()
+        self.input_size = self.metadata["input_size"]
+        self.h = self.metadata["h"]
+
+    # Last input_size values of every series, left-padded with zeros (mask 0) like NeuralForecast does
+    def _windows(self, df):
+        ordered = df.sort_values(["unique_id", "ds"])
+        series, last_dates = [], []
+        insample_y = np.zeros((ordered["unique_id"].nunique(), self.input_size), dtype=np.float32)
+        insample_mask = np.zeros_like(insample_y)
+        for row, (unique_id, group) in enumerate(ordered.groupby("unique_id", sort=True)):
+            values = group["y"].to_numpy(dtype=np.float32)[-self.input_size:]
+            insample_y[row, -len(values):] = values
+            insample_mask[row, -len(values):] = 1.0
+            series.append(unique_id)
+            last_dates.append(group["ds"].iloc[-1])
+        return series, last_dates, torch.from_numpy(insample_y), torch.from_numpy(insample_mask)
+
+    def predict(self, df):
+        series, last_dates, insample_y, insample_mask = self._windows(df)
+        with torch.no_grad():
+            forecast = self.graph(insample_y, insample_mask).numpy()
+
+        offset = pd.tseries.frequencies.to_offset(self.metadata["freq"])
+        rows = []
+        for row, unique_id in enumerate(series):
+            dates = pd.date_range(last_dates[row] + offset, periods=self.h, freq=offset)
+            rows.append(pd.DataFrame({"unique_id": unique_id, "ds": dates, self.metadata["model"]: forecast[row]}))
+        return pd.concat(rows, ignore_index=True)
@@ -0,0 +1,311 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+from collections import OrderedDict
+import datetime as dt
+import pandas as pd
+from dotenv import load_dotenv
+from ai_interaction.model_export import MODEL_EXPORT_ENABLED, ExportedForecaster, export_verified, has_export
+from ai_interaction.training_policy import architecture, fit_report, trainer_kwargs, training_config
+from ai_interaction.training_artifacts import NO_ARTIFACTS, record_run, training_run
+from ai_interaction.training_scheduler import TrainingSlotTimeout, training_slot
+from ai_interaction.bar_store import checked_path_part
+
+# Load environment variables
+load_dotenv()
+MODEL_REGISTRY_DIR = os.getenv(
+    "MODEL_REGISTRY_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "models"),
+)
+MODEL_REGISTRY_ENABLED = os.getenv("MODEL_REGISTRY_ENABLED", "True") == "True"
+# How many training steps a warm-start refit gets on top of the saved weights
+FORECAST_REFIT_STEPS = int(os.getenv("FORECAST_REFIT_STEPS", 50))
+# A saved model is retrained from scratch once any of these is exceeded
+FORECAST_FULL_RETRAIN_DAYS = int(os.getenv("FORECAST_FULL_RETRAIN_DAYS", 7))
+FORECAST_MAX_REFITS = int(os.getenv("FORECAST_MAX_REFITS", 20))
+FORECAST_MAX_NEW_BARS = int(os.getenv("FORECAST_MAX_NEW_BARS", 60))
+# How many fitted models to keep in memory (0 = always read them back from disk)
+MODEL_REGISTRY_RESIDENT_MODELS = int(os.getenv("MODEL_REGISTRY_RESIDENT_MODELS", 0))
+
+METADATA_FILE = "metadata.json"
+
+
+# Models are keyed by their architecture only, a different training budget reuses the same model
+def config_hash(config):
+    return hashlib.sha256(json.dumps(architecture(config), sort_keys=True).encode()).hexdigest()[:12]
+
+# config comes from training_policy.training_config
+def build_forecast_model(config):
+    # NeuralForecast (and with it Lightning) is imported where a model is built or loaded,
+    # so serving an exported model never pulls it in
+    from neuralforecast import NeuralForecast
+    from neuralforecast.models import LSTM
+
+    return NeuralForecast(
+        models=[LSTM(
+            h=config["h"],
+            input_size=config["input_size"],
+            start_padding_enabled=config["start_padding_enabled"],
+            **trainer_kwargs(config),
+            **NO_ARTIFACTS
+        )],
+        freq=config["freq"]
+    )
+
+def _now():
+    return dt.datetime.now(dt.timezone.utc)
+
+# Most bars any one series gained after `last_ds` (a global model covers several series)
+def _new_bars(df, last_ds):
+    fresh = df[df["ds"] > last_ds]
+    return int(fresh.groupby("unique_id").size().max()) if not fresh.empty else 0
+
+
+class ModelRegistry:
+    """
+    Keeps fitted NeuralForecast models on disk, one per (symbol, timeframe, model
+    config), next to a metadata.json recording when and on what they were trained.
+    fitted_model() decides per refresh whether the saved model can be reused as is,
+    fine-tuned for a few steps on the new bars, or has to be retrained from scratch.
+    With `resident_models` set, the most recently used models also stay in memory.
+    """
+
+    def __init__(self, root=MODEL_REGISTRY_DIR, resident_models=MODEL_REGISTRY_RESIDENT_MODELS):
+        self.root = root
+        self.resident_models = resident_models
+        self.resident = OrderedDict()
+        # Loaded TorchScript graphs, keyed and bounded like the resident models
+        self.exported = OrderedDict()
+        self.lock = threading.Lock()
+
+    def _resident_key(self, symbol, timeframe, config):
+        return (str(symbol).upper(), timeframe, config_hash(config))
+
+    def _recall(self, symbol, timeframe, config):
+        key = self._resident_key(symbol, timeframe, config)
+        with self.lock:
+            if key not in self.resident:
+                return None
+            self.resident.move_to_end(key)
+            return self.resident[key]
+
+    # Least recently used models are dropped once we hold more than resident_models
+    def _remember(self, symbol, timeframe, config, model, metadata):
+        if self.resident_models <= 0:
+            return
+        key = self._resident_key(symbol, timeframe, config)
+        with self.lock:
+            self.resident[key] = (model, metadata)
+            self.resident.move_to_end(key)
+            while len(self.resident) > self.resident_models:
+                evicted, _ = self.resident.popitem(last=False)
+                self.exported.pop(evicted, None)
+                print(f"[INFO] Evicted resident model {evicted[0]} ({evicted[1]})")
+
+    # Same bound and order as _remember; with resident_models 0 the graph is read back each time
+    def _remember_exported(self, key, fit_at, forecaster):
+        if self.resident_models <= 0:
+            return
+        with self.lock:
+            self.exported[key] = (fit_at, forecaster)
+            self.exported.move_to_end(key)
+            while len(self.exported) > self.resident_models:
+                self.exported.popitem(last=False)
+
+    def resident_count(self):
+        with self.lock:
+            return len(self.resident)
+
+    def _model_dir(self, symbol, timeframe, config):
+        return os.path.join(self.root, checked_path_part(str(symbol).upper()), checked_path_part(timeframe), config_hash(config))
+
+    def metadata(self, symbol, timeframe, config):
+        path = os.path.join(self._model_dir(symbol, timeframe, config), METADATA_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def load(self, symbol, timeframe, config):
+        folder = self._model_dir(symbol, timeframe, config)
+        metadata = self.metadata(symbol, timeframe, config)
+        if metadata is None:
+            return None
+        try:
+            from neuralforecast import NeuralForecast
+
+            model = NeuralForecast.load(path=folder)
+            # Models saved before the artifact policy still carry Lightning's default logger
+            for fitted in model.models:
+                fitted.trainer_kwargs.update(NO_ARTIFACTS)
+            return model, metadata
+        except Exception as e:
+            print(f"[WARNING] Could not load saved model for {symbol} ({timeframe}), retraining: {e}")
+            return None
+
+    # Saves into a scratch folder first and swaps it in, so readers never see half a model.
+    # The export, when on, is checked against predict() on `df` (the frame just trained on)
+    def save(self, symbol, timeframe, config, model, metadata, df=None):
+        folder = self._model_dir(symbol, timeframe, config)
+        scratch = f"{folder}.tmp-{os.getpid()}"
+        shutil.rmtree(scratch, ignore_errors=True)
+        model.save(path=scratch, save_dataset=False, overwrite=True)
+        if MODEL_EXPORT_ENABLED and df is not None:
+            try:
+                error = export_verified(model, scratch, df)
+                print(f"[INFO] Exported model for {symbol} ({timeframe}), {error:.2e} from predict()")
+            except Exception as e:
+                # predict() just keeps using the full NeuralForecast stack for this model
+                print(f"[WARNING] Could not export model for {symbol} ({timeframe}): {e}")
+        with open(os.path.join(scratch, METADATA_FILE), "w") as f:
+            json.dump(metadata, f, indent=2)
+
+        retired = f"{folder}.old-{os.getpid()}"
+        if os.path.exists(folder):
+            os.replace(folder, retired)
+        os.replace(scratch, folder)
+        shutil.rmtree(retired, ignore_errors=True)
+
+    # "predict" (nothing new to learn), "refit" (fine-tune on the new bars) or "full"
+    def plan(self, metadata, df):
+        if metadata is None:
+            return "full", "no saved model"
+
+        last_ds = pd.Timestamp(metadata["last_ds"])
+        latest = df["ds"].max()
+        if latest < last_ds:
+            return "full", "history no longer reaches the trained range"
+
+        trained_at = dt.datetime.fromisoformat(metadata["full_fit_at"])
+        if _now() - trained_at > dt.timedelta(days=FORECAST_FULL_RETRAIN_DAYS):
+            return "full", f"last full fit is older than {FORECAST_FULL_RETRAIN_DAYS} days"
+        if metadata["refits_since_full"] >= FORECAST_MAX_REFITS:
+            return "full", f"{metadata['refits_since_full']} refits since the last full fit"
+
+        new_bars = _new_bars(df, last_ds)
+        if new_bars == 0:
+            return "predict", "no new bars"
+        if new_bars > FORECAST_MAX_NEW_BARS:
+            return "full", f"{new_bars} new bars since the last fit"
+        return "refit", f"{new_bars} new bars"
+
+    def fitted_model(self, symbol, timeframe, df, config=None):
+        """
+        Returns a NeuralForecast model ready to predict on `df` (a preprocessed frame
+        with unique_id/ds/y), training only as much as the saved state requires.
+        `df` may hold several series, `symbol` is then just the key the model is saved under.
+        """
+        config = config or training_config(timeframe, df)
+        run_name = f"{str(symbol).upper()}-{timeframe}-{_now().strftime('%Y%m%dT%H%M%S%f')}"
+        if not MODEL_REGISTRY_ENABLED:
+            model = build_forecast_model(config)
+            with training_slot(run_name, timeout=config["max_wait_seconds"]), training_run(model, run_name):
+                model.fit(df, val_size=config["val_size"])
+            return model
+
+        loaded = self._recall(symbol, timeframe, config) or self.load(symbol, timeframe, config)
+        model, metadata = loaded if loaded else (None, None)
+        action, reason = self.plan(metadata, df)
+        print(f"[INFO] Forecast model for {symbol} ({timeframe}): {action} ({reason})")
+        if action == "predict":
+            self._remember(symbol, timeframe, config, model, metadata)
+            return model
+
+        try:
+            return self._fit(symbol, timeframe, df, config, run_name, action, model, metadata)
+        except TrainingSlotTimeout as e:
+            # The request budget ran out in line for a slot: a model that is only behind on a
+            # few bars, or due for a full retrain, still answers, otherwise the caller backs off
+            if model is None:
+                raise
+            print(f"[WARNING] {e}. Predicting with the saved model for {symbol} ({timeframe}) as it is.")
+            self._remember(symbol, timeframe, config, model, metadata)
+            return model
+
+    def _fit(self, symbol, timeframe, df, config, run_name, action, model, metadata):
+        start = time.perf_counter()
+        now = _now().isoformat()
+        # last_fit_seconds is what the caller waited, including any wait for a training slot
+        if action == "refit":
+            new_bars = _new_bars(df, pd.Timestamp(metadata["last_ds"]))
+            # Enough history for the new bars to appear in at least one training window of every
+            # series, plus the validation split
+            tail_size = new_bars + config["input_size"] + config["h"] + config["val_size"]
+            tail = df.sort_values(["unique_id", "ds"]).groupby("unique_id").tail(tail_size)
+            with training_slot(run_name, timeout=config["max_wait_seconds"]), training_run(model, run_name) as logger:
+                for fitted in model.models:
+                    fitted.max_steps = FORECAST_REFIT_STEPS
+                    fitted.trainer_kwargs["max_steps"] = FORECAST_REFIT_STEPS
+                model.fit(tail, val_size=config["val_size"], use_init_models=False)
+            metadata = dict(metadata, refits_since_full=metadata["refits_since_full"] + 1)
+        else:
+            model = build_forecast_model(config)
+            with training_slot(run_name, timeout=config["max_wait_seconds"]), training_run(model, run_name) as logger:
+                model.fit(df, val_size=config["val_size"])
+            metadata = {"config": config, "full_fit_at": now, "refits_since_full": 0}
+
+        report = fit_report(model.models[0])
+        metadata.update(
+            last_fit_at=now,
+            last_fit_action=action,
+            last_fit_seconds=round(time.perf_counter() - start, 3),
+            last_fit_steps=report["steps"],
+            last_train_loss=report["train_loss"],
+            last_valid_loss=report["valid_loss"],
+            last_ds=str(df["ds"].max()),
+            bars=int(len(df)),
+        )
+        print(
+            f"[INFO] {action} for {symbol} ({timeframe}) took {metadata['last_fit_seconds']}s: "
+            f"input_size {config['input_size']}, {report['steps']} of {config['max_steps'] if action == 'full' else FORECAST_REFIT_STEPS} steps, "
+            f"valid loss {report['valid_loss']} (best {report['best_valid_loss']})"
+        )
+        record_run(dict(
+            report,
+            run=run_name,
+            symbol=symbol,
+            timeframe=timeframe,
+            action=action,
+            input_size=config["input_size"],
+            fit_seconds=metadata["last_fit_seconds"],
+            logged=getattr(logger, "metrics", None),
+        ))
+        try:
+            self.save(symbol, timeframe, config, model, metadata, df)
+        except Exception as e:
+            print(f"[WARNING] Could not save model for {symbol} ({timeframe}): {e}")
+        self._remember(symbol, timeframe, config, model, metadata)
+        return model
+
+    # Predictions for `df`. When nothing new has to be learned and the model was exported,
+    # the TorchScript graph answers without loading NeuralForecast or Lightning at all
+    def predict(self, symbol, timeframe, df, config=None):
+        config = config or training_config(timeframe, df)
+        if MODEL_REGISTRY_ENABLED and MODEL_EXPORT_ENABLED:
+            folder = self._model_dir(symbol, timeframe, config)
+            metadata = self.metadata(symbol, timeframe, config)
+            if self.plan(metadata, df)[0] == "predict" and has_export(folder):
+                key = self._resident_key(symbol, timeframe, config)
+                with self.lock:
+                    fit_at, forecaster = self.exported.get(key, (None, None))
+                    if forecaster is not None:
+                        self.exported.move_to_end(key)
+                if fit_at != metadata["last_fit_at"]:
+                    forecaster = ExportedForecaster(folder)
+                    self._remember_exported(key, metadata["last_fit_at"], forecaster)
+                return forecaster.predict(df)
+
+        return self.fitted_model(symbol, timeframe, df, config).predict(df=df)
+
+
+_registry = None
+
+# Returns the process-wide model registry
+def get_model_registry():
+    global _registry
+    if _registry is None:
+        _registry = ModelRegistry()
+    return _registry
@@ -0,0 +1,195 @@
+import os
+import math
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+# Rough cap on how many tokens the data digest may add on top of the fixed instructions
+ANALYSIS_PROMPT_TOKEN_BUDGET = int(os.getenv("ANALYSIS_PROMPT_TOKEN_BUDGET", 300))
+# How many bars back we look when measuring slopes and recent crossovers
+SLOPE_LOOKBACK = 5
+
+SYSTEM_MESSAGE = "You are a financial market analyst providing easy-to-understand stock insights"
+
+# Everything that never changes between requests goes first, so the provider's
+# prefix cache can reuse it; only the digest at the end varies per stock
+STATIC_INSTRUCTIONS = """You are a financial analysis assistant. Your goal is to analyze stock market data and provide a simple, non-technical summary that anyone can understand. Follow these steps:
+
+Step 1: Explain Market Concepts in a Simple Way
+Describe the key technical indicators and why they matter in plain language:
+- Simple Moving Average (SMA): Tracks the stock's average price over time to show trends.
+- Exponential Moving Average (EMA): Similar to SMA, but reacts faster to price changes.
+- Relative Strength Index (RSI): Shows whether a stock is overbought (above 70) or oversold (below 30).
+- MACD (Moving Average Convergence Divergence): Helps identify if a trend is strengthening or weakening.
+- Fibonacci Retracement Levels: Helps find price points where a stock might reverse direction.
+- Average True Range (ATR): Measures volatility—how much a stock's price moves.
+
+Step 2: Analyze the Provided Data
+- Identify trends using SMA and EMA.
+- Check RSI to determine if the stock is overbought or oversold.
+- Use MACD to confirm whether the trend is gaining strength.
+- Examine Fibonacci levels to detect key support and resistance levels.
+- Assess volatility using ATR.
+
+Step 3: Provide a Short Market Outlook
+- Summarize if the stock is trending up (bullish), down (bearish), or sideways (neutral).
+- Mention if the trend is strong or weak.
+- Avoid complex numbers—keep the explanation clear and general.
+
+Generate a short, **easy-to-read** summary in plain text format. Keep it brief and clear, avoiding unnecessary technical details.
+
+The stock data comes as a digest of the latest indicator values, their recent slopes and crossovers, the RSI regime, where today's volatility ranks, and the nearest Fibonacci levels."""
+
+
+# We don't ship a tokenizer, ~4 characters per token is close enough for budgeting
+def estimate_tokens(text):
+    return int(math.ceil(len(text) / 4))
+
+def _latest(series):
+    values = series.dropna()
+    return float(values.iloc[-1]) if not values.empty else None
+
+def _slope(series, lookback=SLOPE_LOOKBACK):
+    values = series.dropna()
+    if len(values) < 2:
+        return None
+    window = values.iloc[-(lookback + 1):]
+    return float((window.iloc[-1] - window.iloc[0]) / (len(window) - 1))
+
+# Which side of `slow` the `fast` line is on now, and whether it switched within the lookback
+def _crossover(fast, slow, lookback=SLOPE_LOOKBACK):
+    spread = (fast - slow).dropna()
+    if spread.empty:
+        return None
+    position = "above" if spread.iloc[-1] > 0 else "below"
+    recent = np.sign(spread.iloc[-(lookback + 1):].to_numpy())
+    crossed = bool(len(recent) > 1 and (recent[1:] != recent[:-1]).any())
+    return {"position": position, "crossed_recently": crossed}
+
+def rsi_regime(rsi):
+    if rsi is None:
+        return None
+    if rsi >= 70:
+        return "overbought"
+    if rsi <= 30:
+        return "oversold"
+    return "neutral"
+
+
+def build_feature_digest(df, fib_levels):
+    """
+    Boils an indicator frame (compute_technical_indicators output) down to a
+    fixed-size set of features: latest values, slopes, crossovers, the RSI regime,
+    the ATR percentile and the Fibonacci levels either side of the last close.
+    """
+    if "date" in df.columns:
+        df = df.assign(_ts=pd.to_datetime(df["date"], utc=True)).sort_values("_ts")
+
+    close = _latest(df["close"])
+    atr_history = df["ATR"].dropna() if "ATR" in df.columns else pd.Series(dtype=float)
+    atr = float(atr_history.iloc[-1]) if not atr_history.empty else None
+
+    features = {
+        "bars": int(len(df)),
+        "first_date": str(df["date"].iloc[0])[:10] if "date" in df.columns else None,
+        "last_date": str(df["date"].iloc[-1])[:16] if "date" in df.columns else None,
+        "close": close,
+        "period_change_pct": None,
+        "latest": {},
+        "slopes": {},
+        "crossovers": {
+            "sma_10_vs_50": _crossover(df["SMA_10"], df["SMA_50"]),
+            "ema_10_vs_50": _crossover(df["EMA_10"], df["EMA_50"]),
+            "close_vs_sma_50": _crossover(df["close"], df["SMA_50"]),
+        },
+        "macd_sign": None,
+        "rsi_regime": None,
+        "atr_percentile": None,
+        "fib_support": None,
+        "fib_resistance": None,
+    }
+
+    closes = df["close"].dropna()
+    if close is not None and not closes.empty and closes.iloc[0]:
+        features["period_change_pct"] = float((close / closes.iloc[0] - 1) * 100)
+
+    for column in ["SMA_10", "SMA_50", "EMA_10", "EMA_50", "RSI", "MACD", "ATR"]:
+        features["latest"][column] = _latest(pd.to_numeric(df[column], errors="coerce"))
+    for column in ["close", "SMA_10", "EMA_10", "MACD", "RSI"]:
+        features["slopes"][column] = _slope(pd.to_numeric(df[column], errors="coerce"))
+
+    macd = features["latest"]["MACD"]
+    if macd is not None:
+        features["macd_sign"] = "positive" if macd > 0 else "negative"
+    features["rsi_regime"] = rsi_regime(features["latest"]["RSI"])
+
+    if atr is not None:
+        features["atr_percentile"] = float((atr_history <= atr).mean() * 100)
+
+    if close is not None:
+        below = {level: value for level, value in fib_levels.items() if value <= close}
+        above = {level: value for level, value in fib_levels.items() if value > close}
+        if below:
+            level = max(below, key=below.get)
+            features["fib_support"] = {"level": level, "price": float(below[level])}
+        if above:
+            level = min(above, key=above.get)
+            features["fib_resistance"] = {"level": level, "price": float(above[level])}
+
+    return features
+
+
+def _fmt(value, digits=2):
+    return "n/a" if value is None else f"{value:.{digits}f}"
+
+# Renders the digest as short lines, most important first, and stops adding
+# lines once the token budget is used up
+def render_digest(symbol, timeframe, features, token_budget=ANALYSIS_PROMPT_TOKEN_BUDGET):
+    latest = features["latest"]
+    slopes = features["slopes"]
+    lines = [
+        f"Stock: {symbol} ({timeframe}), {features['bars']} bars from {features['first_date']} to {features['last_date']}",
+        f"Last close: {_fmt(features['close'])} ({_fmt(features['period_change_pct'], 1)}% over the period)",
+        f"RSI: {_fmt(latest['RSI'], 1)} ({features['rsi_regime'] or 'n/a'}), slope {_fmt(slopes['RSI'])}/bar",
+        f"MACD: {_fmt(latest['MACD'], 3)} ({features['macd_sign'] or 'n/a'}), slope {_fmt(slopes['MACD'], 3)}/bar",
+    ]
+
+    for name, label in [("sma_10_vs_50", "SMA 10 vs 50"), ("ema_10_vs_50", "EMA 10 vs 50"), ("close_vs_sma_50", "Close vs SMA 50")]:
+        crossover = features["crossovers"][name]
+        if crossover:
+            recent = ", crossed in the last few bars" if crossover["crossed_recently"] else ""
+            lines.append(f"{label}: {crossover['position']}{recent}")
+
+    lines += [
+        f"SMA 10/50: {_fmt(latest['SMA_10'])} / {_fmt(latest['SMA_50'])}, EMA 10/50: {_fmt(latest['EMA_10'])} / {_fmt(latest['EMA_50'])}",
+        f"Close slope {_fmt(slopes['close'])}/bar, SMA 10 slope {_fmt(slopes['SMA_10'])}/bar, EMA 10 slope {_fmt(slopes['EMA_10'])}/bar",
+        f"ATR: {_fmt(latest['ATR'])} ({_fmt(features['atr_percentile'], 0)}th percentile of the period)",
+    ]
+
+    support, resistance = features["fib_support"], features["fib_resistance"]
+    if support:
+        lines.append(f"Nearest Fibonacci support: {support['level']} at {_fmt(support['price'])}")
+    if resistance:
+        lines.append(f"Nearest Fibonacci resistance: {resistance['level']} at {_fmt(resistance['price'])}")
+
+    digest = []
+    used = 0
+    for line in lines:
+        cost = estimate_tokens(line) + 1
+        if used + cost > token_budget:
+            break
+        digest.append(line)
+        used += cost
+    return "\n".join(digest)
+
+
+# Builds the chat messages for ai_analysis_intent: fixed instructions first, then the digest
+def build_analysis_messages(symbol, timeframe, df, fib_levels, token_budget=ANALYSIS_PROMPT_TOKEN_BUDGET, features=None):
+    features = features or build_feature_digest(df, fib_levels)
+    digest = render_digest(symbol, timeframe, features, token_budget)
+    return [
+        {"role": "system", "content": SYSTEM_MESSAGE},
+        {"role": "user", "content": f"{STATIC_INSTRUCTIONS}\n\nHere is the stock data you need to analyze:\n```\n{digest}\n```"},
+    ]
@@ -0,0 +1,107 @@
+import os
+import threading
+import datetime as dt
+from collections import OrderedDict
+import pandas as pd
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# How many calendar days of EOD bars each timeframe looks back over
+EOD_TIMEFRAME_DAYS = {
+    "1W": 10,
+    "1M": 45,
+    "1D": 60,
+    "YTD": 519,
+}
+INTRADAY_TIMEFRAMES = {"15min"}
+
+# How many symbols' widest series we keep around in this process
+TIMEFRAME_CACHE_SYMBOLS = int(os.getenv("TIMEFRAME_CACHE_SYMBOLS", 64))
+
+
+# Every EOD timeframe is just a slice of the same daily series, so we fetch the
+# widest window a symbol needs once per day and hand out slices of it
+class TimeframeResolver:
+    def __init__(self, fetch, fetch_batch=None, window_days=None, max_symbols=TIMEFRAME_CACHE_SYMBOLS):
+        self.fetch = fetch
+        self.fetch_batch = fetch_batch
+        self.window_days = window_days or max(EOD_TIMEFRAME_DAYS.values())
+        self.max_symbols = max_symbols
+        self._series = OrderedDict()
+        self._lock = threading.Lock()
+
+    # Returns (bars, trading days) for the widest window, fetching it on the first call of the day
+    def _widest_series(self, symbol):
+        today = dt.datetime.now().date()
+        with self._lock:
+            cached = self._series.get(symbol)
+            if cached and cached[0] == today:
+                self._series.move_to_end(symbol)
+                return cached[1], cached[2]
+
+        start_date = today - dt.timedelta(days=self.window_days)
+        bars = self.fetch(symbol, date_from=str(start_date), date_to=str(today))
+        return self._remember(symbol, today, bars)
+
+    # Caches the widest series for a symbol, newest bar first so a lookback window is always a head slice
+    def _remember(self, symbol, today, bars):
+        if bars is None or bars.empty:
+            return pd.DataFrame(), None
+
+        bars = bars.sort_values("date", ascending=False).reset_index(drop=True)
+        days = bars["date"].astype(str).str.slice(0, 10)
+
+        with self._lock:
+            self._series[symbol] = (today, bars, days)
+            self._series.move_to_end(symbol)
+            while len(self._series) > self.max_symbols:
+                self._series.popitem(last=False)
+        return bars, days
+
+    # Loads the widest series for every symbol not cached yet in one batched fetch
+    def prefetch(self, symbols):
+        if self.fetch_batch is None:
+            return
+
+        today = dt.datetime.now().date()
+        with self._lock:
+            missing = [
+                symbol for symbol in symbols
+                if symbol not in self._series or self._series[symbol][0] != today
+            ]
+        if not missing:
+            return
+
+        start_date = today - dt.timedelta(days=self.window_days)
+        frames = self.fetch_batch(missing, date_from=str(start_date), date_to=str(today))
+        for symbol, bars in frames.items():
+            self._remember(symbol, today, bars)
+
+    # Slices the last `days` calendar days out of the cached series without copying it
+    def eod_window(self, symbol, days):
+        if days > self.window_days:
+            today = dt.datetime.now().date()
+            start_date = today - dt.timedelta(days=days)
+            return self.fetch(symbol, date_from=str(start_date), date_to=str(today))
+
+        bars, trading_days = self._widest_series(symbol)
+        if bars.empty:
+            return bars
+
+        start_date = str(dt.datetime.now().date() - dt.timedelta(days=days))
+        rows = int((trading_days >= start_date).sum())
+        return bars.iloc[:rows]
+
+    # Returns the EOD bars for one of the EOD_TIMEFRAME_DAYS timeframes
+    def resolve(self, symbol, timeframe):
+        return self.eod_window(symbol, EOD_TIMEFRAME_DAYS[timeframe])
+
+    # Drops cached series, for one symbol or all of them
+    def invalidate(self, symbol=None):
+        with self._lock:
+            if symbol is None:
+                self._series.clear()
+            else:
+                self._series.pop(symbol, None)
@@ -0,0 +1,119 @@
+import os
+import json
+import shutil
+import threading
+from collections import deque
+from contextlib import contextmanager
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+# What a forecasting fit leaves behind:
+#   off    - nothing (no logger, no checkpoints)
+#   memory - metrics stay in this process, see recent_runs()
+#   dir    - a CSV log per run under TRAINING_ARTIFACTS_DIR, pruned to the caps below
+TRAINING_ARTIFACTS = os.getenv("TRAINING_ARTIFACTS", "off")
+TRAINING_ARTIFACTS_DIR = os.getenv(
+    "TRAINING_ARTIFACTS_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "training_runs"),
+)
+TRAINING_ARTIFACTS_KEEP_RUNS = int(os.getenv("TRAINING_ARTIFACTS_KEEP_RUNS", 50))
+TRAINING_ARTIFACTS_MAX_MB = float(os.getenv("TRAINING_ARTIFACTS_MAX_MB", 200))
+# Only written in dir mode, unless pointed somewhere explicitly
+TRAINING_ARTIFACTS_CHECKPOINTS = os.getenv("TRAINING_ARTIFACTS_CHECKPOINTS", "False") == "True"
+# One JSON line per fit, instead of one folder per fit. Defaults to <dir>/metrics.jsonl in dir mode
+TRAINING_METRICS_FILE = os.getenv("TRAINING_METRICS_FILE") or (
+    os.path.join(TRAINING_ARTIFACTS_DIR, "metrics.jsonl") if TRAINING_ARTIFACTS == "dir" else None
+)
+RECENT_RUNS = 200
+
+# Trainer settings that never touch the disk, used for predict() and for fits with the policy off
+NO_ARTIFACTS = {"logger": False, "enable_checkpointing": False}
+
+
+_recent_runs = deque(maxlen=RECENT_RUNS)
+_totals = {"runs": 0, "fit_seconds": 0.0}
+_lock = threading.Lock()
+
+# Latest fits and running totals across all of them in this process
+def recent_runs():
+    with _lock:
+        return {"totals": dict(_totals), "runs": list(_recent_runs)}
+
+def record_run(run):
+    with _lock:
+        _recent_runs.append(run)
+        _totals["runs"] += 1
+        _totals["fit_seconds"] += run.get("fit_seconds") or 0.0
+    if TRAINING_METRICS_FILE:
+        os.makedirs(os.path.dirname(os.path.abspath(TRAINING_METRICS_FILE)), exist_ok=True)
+        with open(TRAINING_METRICS_FILE, "a") as f:
+            f.write(json.dumps(run, default=str) + "\n")
+
+
+def _folder_size(path):
+    total = 0
+    for folder, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(folder, name))
+            except OSError:
+                pass
+    return total
+
+# Deletes the oldest run folders until at most keep_runs remain and they fit in max_mb
+def prune_artifacts(root=TRAINING_ARTIFACTS_DIR, keep_runs=TRAINING_ARTIFACTS_KEEP_RUNS, max_mb=TRAINING_ARTIFACTS_MAX_MB):
+    if not os.path.isdir(root):
+        return 0
+    runs = sorted(
+        (os.path.join(root, name) for name in os.listdir(root) if os.path.isdir(os.path.join(root, name))),
+        key=os.path.getmtime,
+    )
+    sizes = {run: _folder_size(run) for run in runs}
+    total = sum(sizes.values())
+    removed = 0
+    while runs and (len(runs) > keep_runs or total > max_mb * 1024 * 1024):
+        oldest = runs.pop(0)
+        shutil.rmtree(oldest, ignore_errors=True)
+        total -= sizes[oldest]
+        removed += 1
+    return removed
+
+
+# Lightning is only imported once a fit actually asks for a logger, so the registry's
+# exported-model path can import this module without it
+def _trainer_kwargs(run_name):
+    if TRAINING_ARTIFACTS == "memory":
+        from ai_interaction.memory_logger import InMemoryLogger
+
+        return {"logger": InMemoryLogger(run_name), "enable_checkpointing": False}
+    if TRAINING_ARTIFACTS == "dir":
+        from pytorch_lightning.loggers import CSVLogger
+
+        return {
+            "logger": CSVLogger(save_dir=TRAINING_ARTIFACTS_DIR, name=run_name, version=""),
+            "enable_checkpointing": TRAINING_ARTIFACTS_CHECKPOINTS,
+            "default_root_dir": os.path.join(TRAINING_ARTIFACTS_DIR, run_name),
+        }
+    return dict(NO_ARTIFACTS)
+
+@contextmanager
+def training_run(nf, run_name):
+    """
+    Applies the artifact policy to every model of a NeuralForecast object for the
+    duration of one fit, then switches them back to NO_ARTIFACTS so the following
+    predict() calls don't log either. Yields the logger (or False).
+    """
+    kwargs = _trainer_kwargs(run_name)
+    for model in nf.models:
+        model.trainer_kwargs.update(kwargs)
+    try:
+        yield kwargs["logger"]
+    finally:
+        for model in nf.models:
+            model.trainer_kwargs.update(NO_ARTIFACTS)
+            model.trainer_kwargs.pop("default_root_dir", None)
+        if TRAINING_ARTIFACTS == "dir":
+            removed = prune_artifacts()
+            if removed:
+                print(f"[INFO] Pruned {removed} old training runs from {TRAINING_ARTIFACTS_DIR}")
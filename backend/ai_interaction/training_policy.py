@@ -0,0 +1,88 @@
+import os
+import datetime as dt
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+# Hard wall-clock cap per fit
+FORECAST_MAX_FIT_SECONDS = int(os.getenv("FORECAST_MAX_FIT_SECONDS", 60))
+# What one forecast may spend on waiting for a training slot plus fitting, so the worst
+# case of a cache miss is known up front. Whatever the fit cap leaves is the slot wait
+FORECAST_REQUEST_BUDGET_SECONDS = int(os.getenv("FORECAST_REQUEST_BUDGET_SECONDS", 90))
+# Validation checks without improvement before training stops early
+FORECAST_EARLY_STOP_PATIENCE = int(os.getenv("FORECAST_EARLY_STOP_PATIENCE", 3))
+FORECAST_VAL_CHECK_STEPS = int(os.getenv("FORECAST_VAL_CHECK_STEPS", 25))
+
+FORECAST_HORIZON = 10
+# input_size only ever takes one of these, so a series growing by a bar doesn't
+# change the model config (and with it the saved model)
+INPUT_SIZE_CHOICES = (8, 16, 32, 60)
+
+# (preferred input_size, max_steps) per timeframe. The windows hold about 100 intraday
+# bars (15min), 7 (1W), 31 (1M), 42 (1D) and 358 (YTD) daily bars
+TIMEFRAME_BUDGETS = {
+    "15min": (32, 300),
+    "1W": (8, 100),
+    "1M": (16, 200),
+    "1D": (16, 200),
+    "YTD": (60, 500),
+}
+DEFAULT_BUDGET = (60, 500)
+
+
+def _series_length(df):
+    return int(df.groupby("unique_id").size().min())
+
+def training_config(timeframe, df):
+    """
+    Picks the model and training budget for a fit from the timeframe and the length
+    of the (shortest) series: input_size shrinks to what the history can fill, steps
+    follow the timeframe, a validation split and early stopping are used when the
+    series is long enough to spare one horizon, and every fit is capped at
+    FORECAST_MAX_FIT_SECONDS, after at most max_wait_seconds in line for a slot.
+    """
+    length = _series_length(df)
+    preferred_input, max_steps = TIMEFRAME_BUDGETS.get(timeframe, DEFAULT_BUDGET)
+
+    fitting = [size for size in INPUT_SIZE_CHOICES if size <= preferred_input and size + FORECAST_HORIZON <= length]
+    input_size = max(fitting) if fitting else min(INPUT_SIZE_CHOICES)
+    # Too short for even one full window (e.g. 1W): let NeuralForecast pad the start
+    start_padding = input_size + FORECAST_HORIZON > length
+
+    val_size = FORECAST_HORIZON if length >= input_size + 3 * FORECAST_HORIZON else 0
+    return {
+        "model": "LSTM",
+        "h": FORECAST_HORIZON,
+        "input_size": input_size,
+        "freq": "D",
+        "start_padding_enabled": start_padding,
+        "max_steps": max_steps,
+        "val_size": val_size,
+        "early_stop_patience_steps": FORECAST_EARLY_STOP_PATIENCE if val_size else -1,
+        "val_check_steps": FORECAST_VAL_CHECK_STEPS,
+        "max_fit_seconds": FORECAST_MAX_FIT_SECONDS,
+        "max_wait_seconds": max(0, FORECAST_REQUEST_BUDGET_SECONDS - FORECAST_MAX_FIT_SECONDS),
+    }
+
+# The parts of the config that define the network; the rest is just how long we train it
+def architecture(config):
+    return {key: config[key] for key in ("model", "h", "input_size", "freq", "start_padding_enabled")}
+
+def trainer_kwargs(config):
+    return {
+        "max_steps": config["max_steps"],
+        "val_check_steps": config["val_check_steps"],
+        "early_stop_patience_steps": config["early_stop_patience_steps"],
+        "max_time": dt.timedelta(seconds=config["max_fit_seconds"]),
+    }
+
+# What a finished fit achieved, for the logs and the registry metadata
+def fit_report(model):
+    valid = getattr(model, "valid_trajectories", None) or []
+    train = getattr(model, "train_trajectories", None) or []
+    return {
+        "steps": int(train[-1][0]) if train else None,
+        "train_loss": float(train[-1][1]) if train else None,
+        "valid_loss": float(valid[-1][1]) if valid else None,
+        "best_valid_loss": float(min(loss for _, loss in valid)) if valid else None,
+    }
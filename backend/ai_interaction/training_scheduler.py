@@ -0,0 +1,215 @@
+import os
+import time
+import tempfile
+import threading
+from contextlib import contextmanager
+from dotenv import load_dotenv
+
+try:
+    import fcntl
+except ImportError:
+    # Windows has no flock. Slots and tickets are then only coordinated between the
+    # threads of this process, through _held_paths
+    fcntl = None
+
+# Load environment variables
+load_dotenv()
+
+
+def available_cores():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+TRAINING_SCHEDULER_ENABLED = os.getenv("TRAINING_SCHEDULER_ENABLED", "True") == "True"
+TRAINING_CORES = int(os.getenv("TRAINING_CORES", available_cores()))
+# Fits allowed at once across every process on this machine; the rest wait for a slot
+TRAINING_MAX_CONCURRENT_FITS = int(os.getenv("TRAINING_MAX_CONCURRENT_FITS", max(1, TRAINING_CORES // 4)))
+# torch intra-op threads each fit gets, so all running fits together use the cores once
+TRAINING_THREADS_PER_FIT = int(os.getenv("TRAINING_THREADS_PER_FIT", max(1, TRAINING_CORES // TRAINING_MAX_CONCURRENT_FITS)))
+TRAINING_SLOT_TIMEOUT = float(os.getenv("TRAINING_SLOT_TIMEOUT", 600))
+TRAINING_SLOTS_DIR = os.getenv(
+    "TRAINING_SLOTS_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "training_slots"),
+)
+SLOT_POLL_SECONDS = 0.05
+TICKET_PREFIX = "wait-"
+
+
+class TrainingSlotTimeout(Exception):
+    pass
+
+
+# Lock files this process holds, standing in for flock where fcntl is missing
+_held_paths = set()
+_held_paths_guard = threading.Lock()
+
+# Non-blocking exclusive lock on the file at path, open here as handle (a file object or fd)
+def _try_lock(handle, path):
+    if fcntl is None:
+        with _held_paths_guard:
+            if path in _held_paths:
+                return False
+            _held_paths.add(path)
+            return True
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except BlockingIOError:
+        return False
+
+def _unlock(handle, path):
+    if fcntl is None:
+        with _held_paths_guard:
+            _held_paths.discard(path)
+        return
+    fcntl.flock(handle, fcntl.LOCK_UN)
+
+# True when nobody holds the lock on path any more (or it is already gone)
+def _abandoned(path):
+    if fcntl is None:
+        with _held_paths_guard:
+            return path not in _held_paths
+    try:
+        handle = os.open(path, os.O_RDONLY)
+    except FileNotFoundError:
+        return True
+    try:
+        return _try_lock(handle, path)
+    finally:
+        os.close(handle)
+
+
+class TrainingScheduler:
+    """
+    Hands out a fixed number of training slots shared by every process on the
+    machine (gunicorn workers, forecast workers, the model server). A slot is an
+    flock on a small file, so the kernel releases it if a process dies mid-fit.
+    While a process holds slots, torch gets `threads_per_fit` threads per slot.
+
+    Waiters are served first come, first served: each one drops a ticket file named
+    by its arrival time and only tries for a slot once no older ticket is left.
+    Tickets are flocked by their owner too, so one left behind by a dead process is
+    recognized and removed instead of blocking the line.
+    """
+
+    def __init__(self, slots=TRAINING_MAX_CONCURRENT_FITS, threads_per_fit=TRAINING_THREADS_PER_FIT, root=TRAINING_SLOTS_DIR):
+        self.slots = slots
+        self.threads_per_fit = threads_per_fit
+        self.root = root
+        self.lock = threading.Lock()
+        self.held = 0
+
+    def _slot_path(self, index):
+        return os.path.join(self.root, f"slot-{index}.lock")
+
+    def _try_acquire(self):
+        for index in range(self.slots):
+            path = self._slot_path(index)
+            handle = open(path, "a")
+            if _try_lock(handle, path):
+                return index, handle
+            handle.close()
+        return None
+
+    # The ticket is locked under a temp name and only then renamed into line, so nobody
+    # ever sees it unlocked and takes it for a dead waiter's. Without flock it is marked
+    # held before the file exists, and no handle stays open (Windows can't rename or
+    # delete open files)
+    def _take_ticket(self):
+        name = f"{TICKET_PREFIX}{time.time_ns():020d}-{os.getpid()}-{threading.get_ident()}.lock"
+        path = os.path.join(self.root, name)
+        if fcntl is None:
+            _try_lock(None, path)
+            open(path, "a").close()
+            return name, None
+        handle, tmp_path = tempfile.mkstemp(dir=self.root, prefix=".", suffix=".tmp")
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        os.rename(tmp_path, path)
+        return name, handle
+
+    def _drop_ticket(self, ticket):
+        name, handle = ticket
+        path = os.path.join(self.root, name)
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        if handle is None:
+            _unlock(None, path)
+        else:
+            os.close(handle)
+
+    # True once every ticket older than ours is gone. Older tickets nobody holds a lock
+    # on belong to waiters that died, and are cleared on the way
+    def _first_in_line(self, ticket):
+        waiting = sorted(name for name in os.listdir(self.root) if name.startswith(TICKET_PREFIX))
+        for name in waiting:
+            if name >= ticket[0]:
+                return True
+            path = os.path.join(self.root, name)
+            if not _abandoned(path):
+                return False
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+        return True
+
+    # torch's thread pool is per process, so size it for however many fits this process runs now
+    def _set_threads(self):
+        import torch
+
+        torch.set_num_threads(max(1, self.threads_per_fit * max(1, self.held)))
+
+    @contextmanager
+    def slot(self, label, timeout=TRAINING_SLOT_TIMEOUT):
+        os.makedirs(self.root, exist_ok=True)
+        start = time.perf_counter()
+        ticket = self._take_ticket()
+        try:
+            acquired = self._try_acquire() if self._first_in_line(ticket) else None
+            while acquired is None:
+                if time.perf_counter() - start > timeout:
+                    raise TrainingSlotTimeout(f"No training slot free for {label} after {timeout:g}s")
+                time.sleep(SLOT_POLL_SECONDS)
+                acquired = self._try_acquire() if self._first_in_line(ticket) else None
+        finally:
+            self._drop_ticket(ticket)
+
+        index, handle = acquired
+        waited = time.perf_counter() - start
+        with self.lock:
+            self.held += 1
+            self._set_threads()
+        print(f"[INFO] {label} got training slot {index}/{self.slots} after {waited:.2f}s ({self.threads_per_fit} threads)")
+        try:
+            yield index
+        finally:
+            with self.lock:
+                self.held -= 1
+                if self.held:
+                    self._set_threads()
+            _unlock(handle, self._slot_path(index))
+            handle.close()
+
+
+_scheduler = None
+
+# Returns the process-wide training scheduler
+def get_training_scheduler():
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = TrainingScheduler()
+    return _scheduler
+
+# Wraps one fit: waits up to `timeout` for a slot and pins torch's threads, or does
+# nothing when the scheduler is off
+@contextmanager
+def training_slot(label, timeout=TRAINING_SLOT_TIMEOUT):
+    if not TRAINING_SCHEDULER_ENABLED:
+        yield None
+        return
+    with get_training_scheduler().slot(label, timeout=timeout) as index:
+        yield index
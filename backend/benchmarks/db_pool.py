@@ -0,0 +1,64 @@
+# What a raw-SQL route pays for its database connection: psycopg2.connect per request
+# (the old get_db_connection) against a checkout from the pool, each followed by the
+# cache-hit lookup of an insight route. Runs against PSYCOPG2_DSN.
+#
+#   cd backend && python benchmarks/db_pool.py
+import os
+import sys
+import time
+import numpy as np
+import psycopg2
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cd.db_pool import DBPool
+
+REQUESTS = 500
+THREADS = 8
+QUERY = "SELECT last_updated FROM stock_insights WHERE symbol = %s AND timeframe = %s"
+
+
+def connect_per_request():
+    conn = psycopg2.connect(os.getenv("PSYCOPG2_DSN"))
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(QUERY, ("AAPL", "1M"))
+            cursor.fetchone()
+    finally:
+        conn.close()
+
+def pooled(pool):
+    def request():
+        conn = pool.getconn()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(QUERY, ("AAPL", "1M"))
+                cursor.fetchone()
+        finally:
+            pool.putconn(conn)
+    return request
+
+def latencies(fn, threads):
+    def one(_):
+        start = time.perf_counter()
+        fn()
+        return (time.perf_counter() - start) * 1000
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        return np.array(list(executor.map(one, range(REQUESTS))))
+
+
+def main():
+    pool = DBPool(min_size=THREADS, max_size=THREADS)
+    print(f"{'':24}  {'threads':>7}  {'p50 (ms)':>8}  {'p95 (ms)':>8}  {'max (ms)':>8}")
+    for threads in (1, THREADS):
+        for label, fn in [("connect per request", connect_per_request), ("pooled", pooled(pool))]:
+            samples = latencies(fn, threads)
+            print(f"{label:24}  {threads:7}  {np.percentile(samples, 50):8.2f}  "
+                  f"{np.percentile(samples, 95):8.2f}  {samples.max():8.2f}")
+    print(f"\npool stats: {pool.stats()}")
+    pool.close()
+
+
+if __name__ == "__main__":
+    main()
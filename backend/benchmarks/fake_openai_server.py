@@ -0,0 +1,128 @@
+# A tiny OpenAI-compatible chat completions server for exercising the LLM dispatcher
+# without a key or network access. Latency and failures are configurable so slow tails
+# and outages can be reproduced on demand.
+#
+#   cd backend && python benchmarks/fake_openai_server.py --port 8089 --latency 1.5 --slow-rate 0.1
+#   OPENAI_BASE_URL=http://127.0.0.1:8089/v1 OPENAI_API_KEY=fake flask run
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ANSWER = "The stock is trending up with moderate volatility. Momentum is neutral and support sits just below the last close."
+
+
+class FakeOpenAIServer:
+    """
+    Serves POST /v1/chat/completions (plain and stream=True). Each request sleeps
+    `latency` seconds; a `slow_rate` share of them sleeps `slow_latency` instead, and a
+    `fail_rate` share answers 500. All three can be changed while the server runs.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.5, slow_rate=0.0, slow_latency=10.0, fail_rate=0.0, seed=None):
+        self.latency = latency
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.fail_rate = fail_rate
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _plan(self):
+        with self.lock:
+            self.requests += 1
+            fail = self.random.random() < self.fail_rate
+            slow = self.random.random() < self.slow_rate
+        return fail, self.slow_latency if slow else self.latency
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send_json(self, status, payload):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                if not self.path.endswith("/chat/completions"):
+                    self._send_json(404, {"error": {"message": "not found"}})
+                    return
+
+                fail, delay = server._plan()
+                time.sleep(delay)
+                if fail:
+                    self._send_json(500, {"error": {"message": "fake upstream failure", "type": "server_error"}})
+                    return
+
+                created = int(time.time())
+                model = body.get("model", "fake")
+                try:
+                    if body.get("stream"):
+                        self.send_response(200)
+                        self.send_header("Content-Type", "text/event-stream")
+                        self.end_headers()
+                        for word in ANSWER.split(" "):
+                            chunk = {
+                                "id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": created, "model": model,
+                                "choices": [{"index": 0, "delta": {"content": word + " "}, "finish_reason": None}],
+                            }
+                            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                        self.wfile.write(b"data: [DONE]\n\n")
+                        return
+
+                    self._send_json(200, {
+                        "id": "chatcmpl-fake", "object": "chat.completion", "created": created, "model": model,
+                        "choices": [{"index": 0, "message": {"role": "assistant", "content": ANSWER}, "finish_reason": "stop"}],
+                        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+                    })
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client gave up on us (deadline or a hedge won the race)
+                    pass
+
+        return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake OpenAI-compatible chat completions server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--slow-rate", type=float, default=0.0)
+    parser.add_argument("--slow-latency", type=float, default=10.0)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    fake = FakeOpenAIServer(args.host, args.port, args.latency, args.slow_rate, args.slow_latency, args.fail_rate)
+    print(f"[INFO] Fake OpenAI server listening on {fake.base_url}")
+    try:
+        fake.httpd.serve_forever()
+    except KeyboardInterrupt:
+        fake.stop()
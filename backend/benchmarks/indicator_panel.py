@@ -0,0 +1,100 @@
+# Checks the vectorized indicator panel against compute_technical_indicators and
+# times both at 10, 100 and 1,000 symbols. The parity check also runs as a test
+# (tests/test_indicator_panel.py). Both need pandas_ta, which compute_technical_indicators
+# imports; without it they skip.
+#
+#   cd backend && python benchmarks/indicator_panel.py
+import os
+import sys
+import time
+import importlib.util
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_interaction.ai_logic import compute_technical_indicators
+from ai_interaction.indicator_panel import compute_indicator_panel
+
+INDICATOR_COLUMNS = ["SMA_10", "SMA_50", "EMA_10", "EMA_50", "RSI", "MACD", "ATR"]
+STEPS = 519
+UNIVERSE_SIZES = [10, 100, 1000]
+HAS_PANDAS_TA = importlib.util.find_spec("pandas_ta") is not None
+PANDAS_TA_MISSING = "pandas_ta is not installed, so compute_technical_indicators can't run to compare against"
+
+
+# Random-walk OHLC for n symbols; some symbols start late and some skip a few days
+# in between, to exercise the NaN handling
+def make_universe(n_symbols, steps=STEPS, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 + rng.normal(0, 1, (steps, n_symbols)).cumsum(axis=0)
+    high = close + rng.random((steps, n_symbols))
+    low = close - rng.random((steps, n_symbols))
+    open_ = close + rng.normal(0, 0.5, (steps, n_symbols))
+
+    starts = rng.integers(0, steps // 3, n_symbols)
+    starts[: n_symbols // 2] = 0
+    missing = rng.random((steps, n_symbols)) < 0.02
+    missing[:, : n_symbols // 4] = False
+    for column, start in enumerate(starts):
+        missing[:start, column] = True
+    for values in (open_, high, low, close):
+        values[missing] = np.nan
+    return open_, high, low, close, ~missing
+
+
+# One symbol's bars as compute_technical_indicators gets them, without the missing rows
+def symbol_frame(open_, high, low, close, column, rows):
+    return pd.DataFrame({
+        "open": open_[rows[:, column], column],
+        "high": high[rows[:, column], column],
+        "low": low[rows[:, column], column],
+        "close": close[rows[:, column], column],
+    })
+
+
+def check_parity(n_symbols=25, tolerance=1e-8):
+    open_, high, low, close, rows = make_universe(n_symbols, seed=1)
+    indicators, fib_levels = compute_indicator_panel(high, low, close)
+
+    worst = 0.0
+    for column in range(n_symbols):
+        expected, expected_fib = compute_technical_indicators(symbol_frame(open_, high, low, close, column, rows))
+        for name in INDICATOR_COLUMNS:
+            assert np.isnan(indicators[name][~rows[:, column], column]).all(), f"{name} set on a missing row for symbol {column}"
+            want = pd.to_numeric(expected[name], errors="coerce").to_numpy(dtype=float)
+            got = indicators[name][rows[:, column], column]
+            assert np.array_equal(np.isnan(want), np.isnan(got)), f"NaN mismatch in {name} for symbol {column}"
+            if np.isfinite(want).any():
+                worst = max(worst, float(np.nanmax(np.abs(want - got))))
+        for level, value in expected_fib.items():
+            worst = max(worst, abs(value - fib_levels[level][column]))
+
+    assert worst < tolerance, f"Panel differs from compute_technical_indicators by {worst}"
+    print(f"Parity OK across {n_symbols} symbols (max abs diff {worst:.2e})")
+
+
+def benchmark():
+    print(f"{'symbols':>8} {'per-symbol (s)':>15} {'panel (s)':>10} {'speedup':>8}")
+    for n_symbols in UNIVERSE_SIZES:
+        open_, high, low, close, rows = make_universe(n_symbols)
+        frames = [symbol_frame(open_, high, low, close, column, rows) for column in range(n_symbols)]
+
+        started = time.perf_counter()
+        for frame in frames:
+            compute_technical_indicators(frame)
+        per_symbol = time.perf_counter() - started
+
+        started = time.perf_counter()
+        compute_indicator_panel(high, low, close)
+        panel = time.perf_counter() - started
+
+        print(f"{n_symbols:>8} {per_symbol:>15.3f} {panel:>10.3f} {per_symbol / panel:>7.1f}x")
+
+
+if __name__ == "__main__":
+    if not HAS_PANDAS_TA:
+        print(f"[WARNING] Skipped: {PANDAS_TA_MISSING}")
+        sys.exit(0)
+    check_parity()
+    benchmark()
@@ -0,0 +1,56 @@
+# Cost of answering a cached /visualization_intent for YTD, before and after the insight
+# columns became JSONB: parsing the stored text and re-serializing it with jsonify,
+# against sending the text psycopg2 hands back for `visualization::text` as it is.
+# No database needed; both sides start from the stored document as a string.
+#
+#   cd backend && python benchmarks/insight_passthrough.py
+import os
+import sys
+import json
+import time
+import numpy as np
+import pandas as pd
+from flask import Flask, jsonify
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cd.insights import json_response
+
+BARS = 358  # a YTD window
+CALLS = 200
+
+
+def stored_visualization():
+    rng = np.random.default_rng(0)
+    close = 150 + rng.normal(0, 2, BARS).cumsum()
+    frame = pd.DataFrame({
+        "date": pd.date_range("2025-01-02", periods=BARS, freq="D").astype(str),
+        "open": close + rng.normal(0, 1, BARS),
+        "high": close + 2,
+        "low": close - 2,
+        "close": close,
+        "volume": rng.integers(1_000_000, 5_000_000, BARS),
+    })
+    return json.dumps(frame.to_dict(orient="records"), default=str)
+
+def timed(fn):
+    fn()
+    start = time.perf_counter()
+    for _ in range(CALLS):
+        fn()
+    return (time.perf_counter() - start) / CALLS * 1000
+
+
+def main():
+    app = Flask(__name__)
+    text = stored_visualization()
+    with app.app_context():
+        before = timed(lambda: jsonify(json.loads(text)).get_data())
+        after = timed(lambda: json_response(text).get_data())
+    print(f"YTD visualization, {len(text) / 1024:.0f} KB")
+    print(f"json.loads + jsonify   {before:7.3f} ms/hit")
+    print(f"JSONB text passthrough {after:7.3f} ms/hit  {before / after:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
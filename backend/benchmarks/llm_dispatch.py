@@ -0,0 +1,100 @@
+# Exercises the LLM dispatcher against the fake OpenAI-compatible server: the 40-call
+# precompute batch sequentially vs fanned out (also with a per-call deadline shorter
+# than the batch takes, which must not trip the breaker), a slow tail with and without hedging,
+# a provider outage tripping the breaker, a per-call deadline, and streaming.
+#
+#   cd backend && python benchmarks/llm_dispatch.py
+#
+# Sample run (0.3s per completion, 8 slots):
+#
+#   sequential, 40 calls                12.4s
+#   complete_many, 40 calls              1.7s
+#   complete_many, 0.5s deadline        1.7s  40 ok, breaker closed
+#   slow tail, no hedge    p50 0.31s  p95 0.53s  max 4.03s
+#   slow tail, hedge 0.6s  p50 0.32s  p95 0.91s  max 0.94s
+#   outage: 6 failed, 34 rejected by the breaker in 1.9s
+#   deadline: LLMTimeoutError after 1.00s
+#   stream: 19 pieces
+import os
+import sys
+import time
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from openai import OpenAI
+from benchmarks.fake_openai_server import FakeOpenAIServer
+from ai_interaction.llm_dispatch import LLMDispatcher, CircuitBreaker, LLMTimeoutError
+
+MESSAGES = [{"role": "user", "content": "Summarize AAPL (1M)"}]
+BATCH = 40  # TOP_10_SYMBOLS x TIMEFRAMES
+
+
+def make_dispatcher(server, **kwargs):
+    client = OpenAI(api_key="fake", base_url=server.base_url)
+    return LLMDispatcher(client=client, model="fake", **kwargs)
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+def latencies(dispatcher, calls):
+    def one(_):
+        start = time.perf_counter()
+        dispatcher.complete(MESSAGES)
+        return time.perf_counter() - start
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        return np.array(list(pool.map(one, range(calls))))
+
+
+def main():
+    server = FakeOpenAIServer(latency=0.3, seed=7).start()
+    try:
+        dispatcher = make_dispatcher(server, max_concurrency=8, timeout=10, hedge_after=0)
+        _, elapsed = timed(lambda: [dispatcher.complete(MESSAGES) for _ in range(BATCH)])
+        print(f"sequential, {BATCH} calls               {elapsed:5.1f}s")
+        results, elapsed = timed(lambda: dispatcher.complete_many([MESSAGES] * BATCH))
+        assert all(results), "every batched call should succeed"
+        print(f"complete_many, {BATCH} calls            {elapsed:5.1f}s")
+        tight = make_dispatcher(server, max_concurrency=8, timeout=0.5, hedge_after=0)
+        results, elapsed = timed(lambda: tight.complete_many([MESSAGES] * BATCH))
+        assert tight.stats()["breaker"] == "closed", "queueing inside a batch must not open the breaker"
+        print(f"complete_many, 0.5s deadline       {elapsed:5.1f}s  {sum(map(bool, results))} ok, breaker {tight.stats()['breaker']}")
+
+        server.slow_rate, server.slow_latency = 0.1, 4.0
+        for label, hedge_after in [("no hedge   ", 0), ("hedge 0.6s ", 0.6)]:
+            dispatcher = make_dispatcher(server, max_concurrency=16, timeout=10, hedge_after=hedge_after)
+            samples = latencies(dispatcher, 80)
+            print(f"slow tail, {label} p50 {np.percentile(samples, 50):.2f}s  "
+                  f"p95 {np.percentile(samples, 95):.2f}s  max {samples.max():.2f}s")
+        server.slow_rate = 0.0
+
+        server.fail_rate = 1.0
+        dispatcher = make_dispatcher(server, max_concurrency=1, timeout=10, breaker=CircuitBreaker(failure_threshold=5, cooldown=30))
+        results, elapsed = timed(lambda: dispatcher.complete_many([MESSAGES] * BATCH))
+        stats = dispatcher.stats()
+        assert not any(results) and stats["breaker"] == "open"
+        print(f"outage: {stats['failed']} failed, {stats['rejected']} rejected by the breaker in {elapsed:.1f}s")
+        server.fail_rate = 0.0
+
+        server.latency = 3.0
+        dispatcher = make_dispatcher(server, timeout=1.0)
+        start = time.perf_counter()
+        try:
+            dispatcher.complete(MESSAGES)
+        except LLMTimeoutError:
+            print(f"deadline: LLMTimeoutError after {time.perf_counter() - start:.2f}s")
+        server.latency = 0.3
+
+        dispatcher = make_dispatcher(server)
+        pieces = list(dispatcher.stream(MESSAGES))
+        assert "".join(pieces).strip().startswith("The stock")
+        print(f"stream: {len(pieces)} pieces")
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
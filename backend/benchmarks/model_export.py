@@ -0,0 +1,81 @@
+# Parity and latency of the TorchScript export against NeuralForecast's predict().
+#
+#   cd backend && python benchmarks/model_export.py
+#
+# Fits the forecasting LSTM with the YTD training config on synthetic daily closes for a
+# few series, exports it in float32 and dynamic int8, checks the exported predictions
+# match predict() and times both paths. Exits non-zero when parity fails.
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_interaction.model_registry import build_forecast_model
+from ai_interaction.training_policy import training_config
+from ai_interaction.model_export import ExportedForecaster, export_model
+
+SERIES = ["AAPL", "MSFT", "AMZN"]
+BARS = 358  # a YTD window
+TRAIN_STEPS = 100
+CALLS = 50
+# float32 should match to float rounding; int8 only approximately
+TOLERANCE = {"float32": 1e-3, "int8": 5e-2}
+
+
+def make_frame(seed=0):
+    rng = np.random.default_rng(seed)
+    frames = []
+    for index, symbol in enumerate(SERIES):
+        close = 150 + 20 * index + rng.normal(0, 2, BARS).cumsum()
+        frames.append(pd.DataFrame({
+            "unique_id": symbol,
+            "ds": pd.date_range("2024-01-02", periods=BARS, freq="D"),
+            "y": close,
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+def timed(fn, calls=CALLS):
+    fn()
+    start = time.perf_counter()
+    for _ in range(calls):
+        result = fn()
+    return result, (time.perf_counter() - start) / calls * 1000
+
+
+def main():
+    df = make_frame()
+    config = dict(training_config("YTD", df), max_steps=TRAIN_STEPS)
+    nf = build_forecast_model(config)
+    nf.fit(df, val_size=config["val_size"])
+
+    reference, reference_ms = timed(lambda: nf.predict(df=df))
+    if "unique_id" not in reference.columns:
+        reference = reference.reset_index()
+    reference = reference.sort_values(["unique_id", "ds"]).reset_index(drop=True)
+    print(f"NeuralForecast predict()      {reference_ms:8.2f} ms/call")
+
+    failed = False
+    for label, quantize in [("float32", False), ("int8", True)]:
+        with tempfile.TemporaryDirectory() as folder:
+            export_model(nf, folder, quantize=quantize)
+            size_kb = os.path.getsize(os.path.join(folder, "model.torchscript.pt")) / 1024
+            forecaster = ExportedForecaster(folder)
+            exported, exported_ms = timed(lambda: forecaster.predict(df))
+
+        exported = exported.sort_values(["unique_id", "ds"]).reset_index(drop=True)
+        same_dates = (pd.to_datetime(exported["ds"]).to_numpy() == pd.to_datetime(reference["ds"]).to_numpy()).all()
+        relative = np.abs(exported["LSTM"].to_numpy() - reference["LSTM"].to_numpy()) / np.abs(reference["LSTM"].to_numpy())
+        ok = bool(same_dates and relative.max() <= TOLERANCE[label])
+        failed |= not ok
+        print(f"exported {label:8s}  {exported_ms:8.2f} ms/call  {reference_ms / exported_ms:6.1f}x  "
+              f"{size_kb:7.1f} KB  max rel diff {relative.max():.2e}  {'OK' if ok else 'MISMATCH'}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# Compares the size of the ai_analysis_intent prompt before and after the digest
+# prompt builder, for each timeframe, on Marketstack-shaped synthetic bars.
+#
+#   cd backend && python benchmarks/prompt_sizes.py
+#
+# Estimated tokens (~4 chars/token) for the user message at the default 300-token
+# digest budget; the ~450 tokens of fixed instructions are included in both columns:
+#
+#   timeframe  bars  before (tok)  after (tok)  reduction
+#       15min   100          6753          556      12.1x
+#          1W     7           933          548       1.7x
+#          1M    31          2433          552       4.4x
+#          1D    42          3110          562       5.5x
+#         YTD   358         22813          564      40.4x
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_interaction.ai_logic import compute_technical_indicators
+from ai_interaction.prompt_builder import STATIC_INSTRUCTIONS, build_analysis_messages, estimate_tokens
+
+# Typical bar counts each timeframe ends up with
+TIMEFRAME_BARS = {"15min": 100, "1W": 7, "1M": 31, "1D": 42, "YTD": 358}
+
+
+def make_bars(timeframe, bars, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 180 + rng.normal(0, 2, bars).cumsum()
+    freq = "15min" if timeframe == "15min" else "B"
+    dates = pd.date_range("2025-01-02 14:30", periods=bars, freq=freq, tz="UTC")
+    frame = pd.DataFrame({
+        "open": close + rng.normal(0, 1, bars),
+        "high": close + rng.random(bars) * 2,
+        "low": close - rng.random(bars) * 2,
+        "close": close,
+        "volume": rng.integers(10_000_000, 90_000_000, bars).astype(float),
+        "adj_high": close + 1, "adj_low": close - 1, "adj_close": close, "adj_open": close,
+        "adj_volume": rng.integers(10_000_000, 90_000_000, bars).astype(float),
+        "split_factor": 1.0, "dividend": 0.0,
+        "symbol": "AAPL", "exchange": "XNAS",
+        "date": dates.strftime("%Y-%m-%dT%H:%M:%S+0000"),
+    })
+    return frame.iloc[::-1].reset_index(drop=True) if timeframe != "15min" else frame
+
+
+# What the prompt looked like when the whole indicator frame was pasted in
+def legacy_prompt(df, fib_levels):
+    fib_string = "\n".join([f"{k}: {v:.2f}" for k, v in fib_levels.items()])
+    return f"{STATIC_INSTRUCTIONS}\n\nHere is the stock data you need to analyze:\n```\n{df.to_string(index=False)}\n```\nFibonacci Levels:\n```\n{fib_string}\n```"
+
+
+if __name__ == "__main__":
+    print(f"{'timeframe':>9} {'bars':>5} {'before (tok)':>13} {'after (tok)':>12} {'reduction':>10}")
+    for timeframe, bars in TIMEFRAME_BARS.items():
+        df, fib_levels = compute_technical_indicators(make_bars(timeframe, bars))
+        before = estimate_tokens(legacy_prompt(df, fib_levels))
+        messages = build_analysis_messages("AAPL", timeframe, df, fib_levels)
+        after = estimate_tokens(messages[-1]["content"])
+        print(f"{timeframe:>9} {bars:>5} {before:>13} {after:>12} {before / after:>9.1f}x")
@@ -0,0 +1,67 @@
+# Cold-start cost of a web worker per serving profile: wall time to import app.py and
+# the process RSS right after, each measured in a fresh interpreter the way gunicorn
+# boots a worker. Also lists which of the heavy dependencies the import dragged in, so a
+# module-level import of torch or the OpenAI SDK sneaking back shows up here.
+#
+#   cd backend && python benchmarks/startup.py
+#
+# DATABASE_URL and OPENAI_API_KEY get placeholders when unset; nothing connects at import.
+#
+# Sample run (torch, neuralforecast and pandas_ta stay unloaded in both profiles now):
+#
+#   profile  import p50 (s)  max (s)  RSS (MB)  routes  heavy modules loaded
+#      slim            0.89     1.19        69      16  -
+#      full            1.40     2.28       162      25  numpy, pandas, pyarrow
+import os
+import sys
+import json
+import subprocess
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROFILES = ("slim", "full")
+RUNS = 5
+HEAVY_MODULES = ("numpy", "pandas", "pyarrow", "pandas_ta", "openai", "torch", "pytorch_lightning", "neuralforecast")
+
+# Runs inside the fresh interpreter and prints one JSON line
+CHILD = """
+import sys, time, json
+start = time.perf_counter()
+import app
+elapsed = time.perf_counter() - start
+rss_kb = 0
+with open("/proc/self/status") as f:
+    for line in f:
+        if line.startswith("VmRSS:"):
+            rss_kb = int(line.split()[1])
+heavy = [name for name in {heavy!r} if name in sys.modules]
+print(json.dumps({{"seconds": elapsed, "rss_mb": rss_kb / 1024, "heavy": heavy, "routes": len(list(app.app.url_map.iter_rules()))}}))
+"""
+
+def measure(profile):
+    env = dict(os.environ, MAGMA_PROFILE=profile, PYTHONDONTWRITEBYTECODE="1")
+    env.setdefault("DATABASE_URL", "postgresql+psycopg2://localhost/startup-benchmark")
+    env.setdefault("OPENAI_API_KEY", "startup-benchmark")
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD.format(heavy=HEAVY_MODULES)],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    print(f"{'profile':>7}  {'import p50 (s)':>14}  {'max (s)':>7}  {'RSS (MB)':>8}  {'routes':>6}  heavy modules loaded")
+    for profile in PROFILES:
+        # The first run also warms the OS file cache, so it isn't counted
+        measure(profile)
+        samples = [measure(profile) for _ in range(RUNS)]
+        seconds = np.array([sample["seconds"] for sample in samples])
+        rss = np.median([sample["rss_mb"] for sample in samples])
+        last = samples[-1]
+        print(f"{profile:>7}  {np.median(seconds):14.2f}  {seconds.max():7.2f}  {rss:8.0f}  {last['routes']:>6}  "
+              f"{', '.join(last['heavy']) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# Throughput of concurrent forecast trainings with and without the training scheduler.
+#
+#   cd backend && python benchmarks/training_concurrency.py
+#
+# Every request is a separate process, the way gunicorn workers are, fitting the 15min
+# LSTM config on its own synthetic series. With the scheduler off each process lets
+# torch take every core; with it on, fits wait for one of TRAINING_MAX_CONCURRENT_FITS
+# slots and get TRAINING_THREADS_PER_FIT threads each. Prints wall time and fits/minute
+# for 1, 4 and 16 concurrent requests.
+import os
+import sys
+import time
+import tempfile
+import multiprocessing as mp
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+CONCURRENCY = (1, 4, 16)
+BARS = 100
+TRAIN_STEPS = 150
+
+
+def make_frame(seed):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "unique_id": f"S{seed}",
+        "ds": pd.date_range("2025-01-02", periods=BARS, freq="D"),
+        "y": 150 + rng.normal(0, 1, BARS).cumsum(),
+    })
+
+# Runs in a fresh interpreter, so the scheduler settings are read from this process's environment
+def fit_one(seed, start_barrier):
+    from ai_interaction.model_registry import build_forecast_model
+    from ai_interaction.training_policy import training_config
+    from ai_interaction.training_scheduler import training_slot
+
+    df = make_frame(seed)
+    config = dict(training_config("15min", df), max_steps=TRAIN_STEPS, val_size=0, early_stop_patience_steps=-1)
+    model = build_forecast_model(config)
+    start_barrier.wait()
+    start = time.perf_counter()
+    with training_slot(f"request {seed}"):
+        model.fit(df)
+    return time.perf_counter() - start
+
+def run(concurrency, scheduler_on, slots_dir):
+    os.environ["TRAINING_SCHEDULER_ENABLED"] = "True" if scheduler_on else "False"
+    os.environ["TRAINING_SLOTS_DIR"] = slots_dir
+    context = mp.get_context("spawn")
+    manager = context.Manager()
+    barrier = manager.Barrier(concurrency + 1)
+    with context.Pool(concurrency) as pool:
+        pending = pool.starmap_async(fit_one, [(seed, barrier) for seed in range(concurrency)])
+        barrier.wait()
+        start = time.perf_counter()
+        latencies = pending.get()
+        wall = time.perf_counter() - start
+    manager.shutdown()
+    return wall, latencies
+
+
+def main():
+    from ai_interaction.training_scheduler import TRAINING_CORES, TRAINING_MAX_CONCURRENT_FITS, TRAINING_THREADS_PER_FIT
+
+    print(f"{TRAINING_CORES} cores, {TRAINING_MAX_CONCURRENT_FITS} slots x {TRAINING_THREADS_PER_FIT} threads\n")
+    print(f"{'requests':>8}  {'scheduler':>9}  {'wall (s)':>8}  {'fits/min':>8}  {'p50 (s)':>7}  {'max (s)':>7}")
+    with tempfile.TemporaryDirectory() as slots_dir:
+        for concurrency in CONCURRENCY:
+            for scheduler_on in (False, True):
+                wall, latencies = run(concurrency, scheduler_on, slots_dir)
+                print(f"{concurrency:>8}  {'on' if scheduler_on else 'off':>9}  {wall:8.1f}  "
+                      f"{concurrency / wall * 60:8.1f}  {np.median(latencies):7.1f}  {max(latencies):7.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+import os
+import json
+import hashlib
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+# A new completion is only paid for once the close has moved more than this many ATRs
+ANALYSIS_MATERIALITY_ATR = float(os.getenv("ANALYSIS_MATERIALITY_ATR", 0.5))
+ANALYSIS_MATERIALITY_ENABLED = os.getenv("ANALYSIS_MATERIALITY_ENABLED", "True") == "True"
+
+
+def _round_floats(value, digits=6):
+    if isinstance(value, float):
+        return round(value, digits)
+    if isinstance(value, dict):
+        return {key: _round_floats(item, digits) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_round_floats(item, digits) for item in value]
+    return value
+
+# Content address for an analysis: a hash of everything the prompt is built from
+def feature_hash(symbol, timeframe, features):
+    payload = json.dumps(
+        {"symbol": symbol, "timeframe": timeframe, "features": _round_floats(features)},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+# Which way the trend points: EMA 10 vs 50 when we have both, otherwise the close slope
+def trend_sign(features):
+    crossover = (features.get("crossovers") or {}).get("ema_10_vs_50")
+    if crossover:
+        return crossover["position"]
+    slope = (features.get("slopes") or {}).get("close")
+    if slope is None:
+        return None
+    return "above" if slope > 0 else "below"
+
+def is_material_change(cached, current, atr_multiple=ANALYSIS_MATERIALITY_ATR):
+    """
+    Decides whether the market picture moved enough since the cached analysis to
+    be worth a new completion. Nothing material changed when the RSI regime, the
+    trend direction and the MACD sign all match and the close is still within
+    `atr_multiple` ATRs of where it was.
+    """
+    if cached.get("rsi_regime") != current.get("rsi_regime"):
+        return True
+    if trend_sign(cached) != trend_sign(current):
+        return True
+    if cached.get("macd_sign") != current.get("macd_sign"):
+        return True
+
+    cached_close, close = cached.get("close"), current.get("close")
+    atr = (current.get("latest") or {}).get("ATR") or (cached.get("latest") or {}).get("ATR")
+    if cached_close is None or close is None or not atr:
+        return True
+    return abs(close - cached_close) > atr_multiple * atr
+
+
+class AnalysisCache:
+    """
+    Postgres-backed cache of AI analyses keyed by the hash of their input features.
+    get() returns an exact match first, then falls back to the newest analysis for
+    the same stock/timeframe if nothing material changed since it was written.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def get(self, symbol, timeframe, features):
+        key = feature_hash(symbol, timeframe, features)
+        with self.conn.cursor() as cursor:
+            cursor.execute(
+                "SELECT analysis FROM analysis_cache WHERE feature_hash = %s",
+                (key,)
+            )
+            exact = cursor.fetchone()
+            if exact:
+                print(f"[INFO] Reusing cached analysis for {symbol} ({timeframe}), identical inputs.")
+                return exact[0]
+
+            if not ANALYSIS_MATERIALITY_ENABLED:
+                return None
+
+            cursor.execute(
+                """
+                SELECT features, analysis FROM analysis_cache
+                WHERE symbol = %s AND timeframe = %s
+                ORDER BY created_at DESC
+                LIMIT 1
+                """,
+                (symbol, timeframe)
+            )
+            latest = cursor.fetchone()
+
+        if latest:
+            cached_features = latest[0] if isinstance(latest[0], dict) else json.loads(latest[0])
+            if not is_material_change(cached_features, features):
+                print(f"[INFO] Reusing cached analysis for {symbol} ({timeframe}), no material change.")
+                return latest[1]
+        return None
+
+    def put(self, symbol, timeframe, features, analysis):
+        with self.conn.cursor() as cursor:
+            cursor.execute(
+                """
+                INSERT INTO analysis_cache (feature_hash, symbol, timeframe, features, analysis, created_at)
+                VALUES (%s, %s, %s, %s, %s, NOW())
+                ON CONFLICT (feature_hash) DO UPDATE SET
+                    analysis = EXCLUDED.analysis,
+                    created_at = EXCLUDED.created_at
+                """,
+                (feature_hash(symbol, timeframe, features), symbol, timeframe,
+                 json.dumps(features, default=str), analysis)
+            )
+        self.conn.commit()
@@ -0,0 +1,173 @@
+import os
+import time
+import threading
+from contextlib import contextmanager
+import psycopg2
+from psycopg2.pool import ThreadedConnectionPool
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+# Connections opened up front and kept between requests, per worker process
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", 5))
+# Hard cap per worker process; connections above the min are closed when handed back
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", 15))
+# How long a request waits for a free connection before giving up
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+# Connections older than this are replaced instead of reused
+DB_POOL_RECYCLE_SECONDS = int(os.getenv("DB_POOL_RECYCLE_SECONDS", 1800))
+# Check a connection with SELECT 1 before handing it out, but only when it sat idle for a
+# while, so a busy worker doesn't pay a round trip per request
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "True") == "True"
+DB_POOL_PING_IDLE_SECONDS = float(os.getenv("DB_POOL_PING_IDLE_SECONDS", 10))
+
+
+class DBPoolTimeout(Exception):
+    pass
+
+
+class DBPool:
+    """
+    Thread-safe psycopg2 connection pool for one worker process. Waits up to
+    `timeout` for a free connection instead of failing right away, replaces
+    connections that are closed, too old or fail the ping, and leaves every
+    connection it takes back in a clean transaction state.
+    """
+
+    def __init__(
+        self,
+        dsn=None,
+        min_size=DB_POOL_MIN_SIZE,
+        max_size=DB_POOL_MAX_SIZE,
+        timeout=DB_POOL_TIMEOUT,
+        recycle=DB_POOL_RECYCLE_SECONDS,
+        pre_ping=DB_POOL_PRE_PING,
+        ping_idle=DB_POOL_PING_IDLE_SECONDS,
+    ):
+        self.pool = ThreadedConnectionPool(min_size, max_size, dsn or os.getenv("PSYCOPG2_DSN"))
+        self.max_size = max_size
+        self.timeout = timeout
+        self.recycle = recycle
+        self.pre_ping = pre_ping
+        self.ping_idle = ping_idle
+        # ThreadedConnectionPool raises as soon as it's exhausted, so waiting is done here
+        self.slots = threading.BoundedSemaphore(max_size)
+        self.lock = threading.Lock()
+        # id(conn) -> (opened at, last handed back at)
+        self.ages = {}
+        self.counters = {"checkouts": 0, "opened": 0, "replaced": 0, "waited": 0}
+
+    def _count(self, name):
+        with self.lock:
+            self.counters[name] += 1
+
+    def _ping(self, conn):
+        try:
+            # In autocommit the ping doesn't open a transaction that would need a rollback
+            conn.autocommit = True
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.autocommit = False
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _healthy(self, conn):
+        if conn.closed:
+            return False
+        now = time.monotonic()
+        with self.lock:
+            ages = self.ages.get(id(conn))
+            if ages is None:
+                # Fresh from psycopg2.connect
+                self.ages[id(conn)] = (now, now)
+                self.counters["opened"] += 1
+                return True
+        opened, last_used = ages
+        if now - opened > self.recycle:
+            return False
+        if self.pre_ping and now - last_used > self.ping_idle:
+            return self._ping(conn)
+        return True
+
+    def _discard(self, conn):
+        with self.lock:
+            self.ages.pop(id(conn), None)
+            self.counters["replaced"] += 1
+        self.pool.putconn(conn, close=True)
+
+    def getconn(self):
+        if not self.slots.acquire(blocking=False):
+            self._count("waited")
+            if not self.slots.acquire(timeout=self.timeout):
+                raise DBPoolTimeout(f"No database connection free after {self.timeout:.0f}s ({self.max_size} in use)")
+        try:
+            while True:
+                conn = self.pool.getconn()
+                if self._healthy(conn):
+                    self._count("checkouts")
+                    return conn
+                self._discard(conn)
+        except Exception:
+            self.slots.release()
+            raise
+
+    def putconn(self, conn):
+        try:
+            # Rolls back whatever the request left open, or closes it if the server went away
+            self.pool.putconn(conn)
+        finally:
+            with self.lock:
+                if conn.closed:
+                    self.ages.pop(id(conn), None)
+                elif id(conn) in self.ages:
+                    self.ages[id(conn)] = (self.ages[id(conn)][0], time.monotonic())
+            self.slots.release()
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counters, open=len(self.ages), max_size=self.max_size)
+
+    def close(self):
+        self.pool.closeall()
+
+
+_pool = None
+_pool_pid = None
+# Pools a forked worker inherited from its parent. They are kept referenced but never
+# used or closed here: closing them would end the parent's sessions on the shared sockets
+_inherited_pools = []
+_pool_lock = threading.Lock()
+
+# Returns this process's pool, starting a new one after a fork
+def get_db_pool():
+    global _pool, _pool_pid
+    if _pool is None or _pool_pid != os.getpid():
+        with _pool_lock:
+            if _pool is None or _pool_pid != os.getpid():
+                if _pool is not None:
+                    _inherited_pools.append(_pool)
+                _pool = DBPool()
+                _pool_pid = os.getpid()
+    return _pool
+
+# Checks a connection out of the pool for the block and always hands it back,
+# rolled back if the block didn't commit
+@contextmanager
+def db_connection():
+    pool = get_db_pool()
+    conn = pool.getconn()
+    try:
+        yield conn
+    finally:
+        pool.putconn(conn)
+
+# The same pool settings for Flask-SQLAlchemy's engine (SQLALCHEMY_ENGINE_OPTIONS)
+def sqlalchemy_engine_options():
+    return {
+        "pool_size": DB_POOL_MIN_SIZE,
+        "max_overflow": max(0, DB_POOL_MAX_SIZE - DB_POOL_MIN_SIZE),
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
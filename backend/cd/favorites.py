@@ -0,0 +1,182 @@
+import datetime as dt
+from flask import Blueprint, request, jsonify
+from cd.db_pool import db_connection
+
+# Bundles the favorites routes. They only touch the database, so the slim profile serves them too
+favorites = Blueprint('favorites', __name__)
+
+# Adds a stock to the user's favorites if it isn't already
+@favorites.route("/toggle_favorite", methods=["POST"])
+def toggle_favorite():
+    data = request.json
+    user_email = data.get("user_email")
+    symbol = data.get("symbol")
+    timeframe = data.get("timeframe")
+
+    if not user_email or not symbol or not timeframe:
+        return jsonify({"error": "Missing required fields"}), 400
+
+    with db_connection() as conn, conn.cursor() as cursor:
+        # Get the current stock insight's last_updated date
+        cursor.execute(
+            """
+            SELECT last_updated FROM stock_insights 
+            WHERE symbol = %s AND timeframe = %s
+            ORDER BY last_updated DESC
+            LIMIT 1
+            """,
+            (symbol, timeframe)
+        )
+        stock_insight = cursor.fetchone()
+        if not stock_insight:
+            return jsonify({"error": "Stock insight not found"}), 404
+
+        current_last_updated = stock_insight[0]
+
+        # Check if this favorite already exists
+        cursor.execute(
+            """
+            SELECT 1 FROM favorites 
+            WHERE user_email = %s AND symbol = %s AND timeframe = %s AND last_updated = %s
+            """,
+            (user_email, symbol, timeframe, current_last_updated)
+        )
+        existing_favorite = cursor.fetchone()
+
+        if existing_favorite:
+            return jsonify({"message": "Already in favorites"}), 200
+
+        current_timestamp = dt.datetime.now()
+
+        # Insert new favorite entry
+        cursor.execute(
+            """
+            INSERT INTO favorites (user_email, symbol, timeframe, visualization, analysis, forecasting, last_updated, added_timestamp)
+            SELECT 
+                %s, symbol, timeframe, visualization, analysis, forecasting, last_updated, %s
+            FROM stock_insights 
+            WHERE symbol = %s AND timeframe = %s
+            """,
+            (user_email, current_timestamp, symbol, timeframe)
+        )
+        conn.commit()
+
+    return jsonify({"message": "Added to favorites"}), 201
+
+# Returns all the user's saved favorite stocks
+@favorites.route("/get_favorites", methods=["GET"])
+def get_favorites():
+    user_email = request.args.get("user_email")
+
+    if not user_email:
+        return jsonify({"error": "User email is required"}), 400
+
+    with db_connection() as conn, conn.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT symbol, timeframe, added_timestamp FROM favorites WHERE user_email = %s
+            """,
+            (user_email,)
+        )
+        favorites = cursor.fetchall()
+
+    formatted_favorites = []
+    
+    for row in favorites:
+        timestamp = row[2]
+        formatted_favorites.append({
+            "symbol": row[0], 
+            "timeframe": row[1],
+            "added_time": timestamp.strftime("%m/%d/%y %I:%M%p") if timestamp else None,
+            "added_raw": timestamp.isoformat() if timestamp else None
+        })
+
+    return jsonify(formatted_favorites), 200
+
+# Checks if a specific stock/timeframe is already in favorites
+@favorites.route("/check_favorite", methods=["GET"])
+def check_favorite():
+    user_email = request.args.get("email")
+    symbol = request.args.get("symbol")
+    timeframe = request.args.get("timeframe")
+
+    if not user_email or not symbol or not timeframe:
+        return jsonify({"error": "Missing required fields"}), 400
+
+    with db_connection() as conn, conn.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT last_updated FROM stock_insights
+            WHERE symbol = %s AND timeframe = %s
+            ORDER BY last_updated DESC
+            LIMIT 1
+            """,
+            (symbol, timeframe)
+        )
+        result = cursor.fetchone()
+
+        if not result:
+            return jsonify({"error": "No stock insight found"}), 404
+
+        latest_last_updated = result[0]
+
+        cursor.execute(
+            """
+            SELECT 1 FROM favorites 
+            WHERE user_email = %s AND symbol = %s AND timeframe = %s AND last_updated = %s
+            """,
+            (user_email, symbol, timeframe, latest_last_updated)
+        )
+        existing_favorite = cursor.fetchone()
+
+    return jsonify({"is_favorite": existing_favorite is not None}), 200
+
+# Removes a specific favorite from the database
+@favorites.route("/remove_favorite", methods=["POST"])
+def remove_favorite():
+    data = request.json
+    user_email = data.get("user_email")
+    symbol = data.get("symbol")
+    timeframe = data.get("timeframe")
+    added_time = data.get("added_time")  # Expecting string
+
+    print(f"[REMOVE REQUEST] user_email={user_email}, symbol={symbol}, timeframe={timeframe}, added_time={added_time}")
+
+    if not user_email or not symbol or not timeframe or not added_time:
+        print("[ERROR] Missing required fields.")
+        return jsonify({"error": "Missing required fields"}), 400
+
+    try:
+        # Convert added_time string back into a datetime
+        added_timestamp = dt.datetime.fromisoformat(added_time)
+        print(f"[PARSED] added_timestamp={added_timestamp}")
+    except ValueError as e:
+        print(f"[ERROR] Invalid date format: {e}")
+        return jsonify({"error": "Invalid date format"}), 400
+
+    with db_connection() as conn, conn.cursor() as cursor:
+        # Previews existing records to debug mismatches
+        cursor.execute(
+            """
+            SELECT user_email, symbol, timeframe, added_timestamp
+            FROM favorites
+            WHERE user_email = %s AND symbol = %s AND timeframe = %s
+            """,
+            (user_email, symbol, timeframe)
+        )
+        existing_matches = cursor.fetchall()
+        print(f"[EXISTING MATCHES] {existing_matches}")
+
+        # Attempt deletion
+        cursor.execute(
+            """
+            DELETE FROM favorites 
+            WHERE user_email = %s AND symbol = %s AND timeframe = %s AND added_timestamp = %s
+            """,
+            (user_email, symbol, timeframe, added_timestamp)
+        )
+        deleted_rows = cursor.rowcount
+        print(f"[DELETE] Rows affected: {deleted_rows}")
+        conn.commit()
+
+    return jsonify({"message": "Favorite removed successfully"}), 200
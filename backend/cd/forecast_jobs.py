@@ -0,0 +1,162 @@
+import os
+import json
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+# A running job whose worker hasn't finished it within this long is handed to another worker
+FORECAST_JOB_STALE_SECONDS = int(os.getenv("FORECAST_JOB_STALE_SECONDS", 1800))
+FORECAST_JOB_MAX_ATTEMPTS = int(os.getenv("FORECAST_JOB_MAX_ATTEMPTS", 3))
+
+JOB_COLUMNS = ["id", "symbol", "timeframe", "job_day", "status", "attempts", "error", "created_at", "started_at", "finished_at"]
+
+
+def _job_row(row):
+    if row is None:
+        return None
+    job = dict(zip(JOB_COLUMNS, row))
+    for column in ("job_day", "created_at", "started_at", "finished_at"):
+        if job[column] is not None:
+            job[column] = job[column].isoformat()
+    return job
+
+# Queues a forecast for (symbol, timeframe, day). A second submission for the same key
+# returns the existing job instead of adding one; a failed job is queued again.
+# Returns (job, created)
+def enqueue_forecast_job(conn, symbol, timeframe, job_day):
+    with conn.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO forecast_jobs (symbol, timeframe, job_day, status, created_at)
+            VALUES (%s, %s, %s, 'queued', NOW())
+            ON CONFLICT (symbol, timeframe, job_day) DO UPDATE SET
+                status = CASE WHEN forecast_jobs.status = 'failed' THEN 'queued' ELSE forecast_jobs.status END,
+                attempts = CASE WHEN forecast_jobs.status = 'failed' THEN 0 ELSE forecast_jobs.attempts END,
+                error = CASE WHEN forecast_jobs.status = 'failed' THEN NULL ELSE forecast_jobs.error END
+            RETURNING {', '.join(JOB_COLUMNS)}, (xmax = 0) AS created
+            """,
+            (symbol, timeframe, job_day)
+        )
+        row = cursor.fetchone()
+    conn.commit()
+    return _job_row(row[:-1]), row[-1]
+
+def get_forecast_job(conn, job_id):
+    with conn.cursor() as cursor:
+        cursor.execute(f"SELECT {', '.join(JOB_COLUMNS)} FROM forecast_jobs WHERE id = %s", (job_id,))
+        return _job_row(cursor.fetchone())
+
+# Returns (job, forecast list or None)
+def get_forecast_job_result(conn, job_id):
+    with conn.cursor() as cursor:
+        cursor.execute(f"SELECT {', '.join(JOB_COLUMNS)}, result FROM forecast_jobs WHERE id = %s", (job_id,))
+        row = cursor.fetchone()
+    if row is None:
+        return None, None
+    result = row[-1]
+    if isinstance(result, str):
+        result = json.loads(result)
+    return _job_row(row[:-1]), result
+
+def claim_forecast_job(conn, worker):
+    """
+    Marks the oldest queued job as running for `worker` and returns it, or None when
+    the queue is empty. SKIP LOCKED lets any number of workers poll at once without
+    two of them ever picking the same job.
+    """
+    with conn.cursor() as cursor:
+        cursor.execute(
+            f"""
+            UPDATE forecast_jobs
+            SET status = 'running', started_at = NOW(), attempts = attempts + 1, worker = %s
+            WHERE id = (
+                SELECT id FROM forecast_jobs
+                WHERE status = 'queued'
+                ORDER BY created_at
+                FOR UPDATE SKIP LOCKED
+                LIMIT 1
+            )
+            RETURNING {', '.join(JOB_COLUMNS)}
+            """,
+            (worker,)
+        )
+        row = cursor.fetchone()
+    conn.commit()
+    return _job_row(row)
+
+# Stores the forecast on the job and in stock_insights, so /forecast serves it from then on
+def complete_forecast_job(conn, job, forecast_list):
+    payload = json.dumps(forecast_list, default=str)
+    with conn.cursor() as cursor:
+        cursor.execute(
+            """
+            UPDATE forecast_jobs
+            SET status = 'done', result = %s::jsonb, error = NULL, finished_at = NOW()
+            WHERE id = %s
+            """,
+            (payload, job["id"])
+        )
+        cursor.execute(
+            """
+            INSERT INTO stock_insights (symbol, timeframe, last_updated, forecasting)
+            VALUES (%s, %s, %s, %s::jsonb)
+            ON CONFLICT (symbol, timeframe)
+            DO UPDATE SET
+                forecasting = EXCLUDED.forecasting,
+                last_updated = EXCLUDED.last_updated
+            """,
+            (job["symbol"], job["timeframe"], job["job_day"], payload)
+        )
+    conn.commit()
+
+# Records the error; the job goes back in the queue until it has used up its attempts
+def fail_forecast_job(conn, job, error):
+    with conn.cursor() as cursor:
+        cursor.execute(
+            """
+            UPDATE forecast_jobs
+            SET status = CASE WHEN attempts >= %s THEN 'failed' ELSE 'queued' END,
+                error = %s, finished_at = NOW()
+            WHERE id = %s
+            """,
+            (FORECAST_JOB_MAX_ATTEMPTS, str(error), job["id"])
+        )
+    conn.commit()
+
+# Hands a job back to the queue without using up an attempt, when training was too busy to start it
+def release_forecast_job(conn, job):
+    with conn.cursor() as cursor:
+        cursor.execute(
+            """
+            UPDATE forecast_jobs
+            SET status = 'queued', attempts = GREATEST(attempts - 1, 0), worker = NULL
+            WHERE id = %s
+            """,
+            (job["id"],)
+        )
+    conn.commit()
+
+# Puts jobs whose worker died mid-training back in the queue, or fails them once they have
+# used up their attempts (a job that keeps killing its worker would otherwise loop forever).
+# Returns how many were requeued and how many failed
+def requeue_stale_jobs(conn, stale_seconds=FORECAST_JOB_STALE_SECONDS):
+    with conn.cursor() as cursor:
+        cursor.execute(
+            """
+            UPDATE forecast_jobs
+            SET status = CASE WHEN attempts >= %s THEN 'failed' ELSE 'queued' END,
+                error = CASE WHEN attempts >= %s THEN %s ELSE error END,
+                finished_at = CASE WHEN attempts >= %s THEN NOW() ELSE finished_at END,
+                worker = NULL
+            WHERE status = 'running' AND started_at < NOW() - make_interval(secs => %s)
+            RETURNING status
+            """,
+            (
+                FORECAST_JOB_MAX_ATTEMPTS, FORECAST_JOB_MAX_ATTEMPTS,
+                f"Worker stopped responding on all {FORECAST_JOB_MAX_ATTEMPTS} attempts",
+                FORECAST_JOB_MAX_ATTEMPTS, stale_seconds,
+            )
+        )
+        statuses = [row[0] for row in cursor.fetchall()]
+    conn.commit()
+    return statuses.count("queued"), statuses.count("failed")
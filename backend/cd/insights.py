@@ -0,0 +1,694 @@
+import os
+import re
+import json
+import datetime as dt
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+
+from ai_interaction.ai_logic import visualization_intent, forecasting_intent, forecast_universe, load_data_contexts
+from ai_interaction.ai_logic import prepare_analysis, stream_analysis_completion, ai_analysis_batch
+from ai_interaction.ai_logic import ANALYSIS_ENGINE, ANALYSIS_ENGINES, run_analysis
+from ai_interaction.local_analysis import local_analysis
+from ai_interaction.market_data import get_market_data_client
+from ai_interaction.llm_dispatch import get_llm_dispatcher
+from ai_interaction.training_policy import FORECAST_MAX_FIT_SECONDS
+from ai_interaction.training_scheduler import TrainingSlotTimeout
+from ai_interaction.bar_store import InvalidSymbol, checked_path_part
+from cd.db_pool import db_connection
+from cd.single_flight import SingleFlight, pg_advisory_lock
+from cd.analysis_cache import AnalysisCache
+from cd.forecast_jobs import enqueue_forecast_job, get_forecast_job, get_forecast_job_result
+
+# Load environment variables
+load_dotenv()
+
+# Bundles the stock insight routes (visualization, analysis, forecasts). Only registered
+# in the full profile, since importing this module pulls in the data and AI stack
+insights = Blueprint('insights', __name__)
+
+# Define static top symbols and timeframes used in our app
+TOP_10_SYMBOLS = ["MSFT", "AAPL", "AMZN", "GOOG", "GOOGL", "FB", "VOD", "INTC", "CMCSA", "PEP"]
+TIMEFRAMES = ["15min", "1W", "1M", "YTD"]
+
+# When on, a /forecast cache miss queues a job for forecast_worker.py and answers 202
+# instead of training inside the request
+FORECAST_JOBS_ENABLED = os.getenv("FORECAST_JOBS_ENABLED", "False") == "True"
+# Most stocks one /forecast/batch call may ask for. Every missing one is trained inside the
+# request, so the batch has to stay small enough to finish within the request budget
+FORECAST_BATCH_MAX_SYMBOLS = int(os.getenv("FORECAST_BATCH_MAX_SYMBOLS", 20))
+
+# Collapses concurrent cache misses for the same insight inside this worker
+insight_flight = SingleFlight()
+
+# Symbols and timeframes become folder names in the bar store, indicator engine and model
+# registry, so anything that isn't a plain ticker is turned away before a route runs
+@insights.before_request
+def reject_invalid_symbols():
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        data = request.args
+    values = [data.get("symbol"), data.get("timeframe"), *request.args.get("symbols", "").split(",")]
+    for value in values:
+        if value and str(value).strip():
+            checked_path_part(str(value).strip())
+
+@insights.errorhandler(InvalidSymbol)
+def invalid_symbol(e):
+    print(f"[WARNING] {e}")
+    return jsonify({"error": str(e)}), 400
+
+# Replace any NaNs in data before saving to DB
+def clean_nan_values(data):
+    if isinstance(data, dict):
+        return {key: clean_nan_values(value) for key, value in data.items()}
+    elif isinstance(data, list):
+        return [clean_nan_values(item) for item in data]
+    elif isinstance(data, float) and np.isnan(data):
+        return None
+    return data
+
+# Same as jsonify, except a body that is already JSON text (straight from a JSONB column)
+# is sent as it is instead of being parsed and serialized again. JSONB doesn't keep the
+# stored text: whitespace is normalized and object keys come back sorted by length, then
+# bytes. Responses are only equal as JSON, so clients must look fields up by name and
+# never rely on key order (array order is kept)
+def json_response(body, status=200):
+    if isinstance(body, str):
+        return Response(body, status=status, mimetype="application/json")
+    return jsonify(body), status
+
+# last_updated may come back as a date or a timestamp
+def updated_today(last_updated, today):
+    if isinstance(last_updated, dt.datetime):
+        last_updated = last_updated.date()
+    return last_updated == today
+
+# ========== ROUTES START BELOW ========== #
+
+# Returns today's stored visualization for a stock/timeframe as JSON text, or None if it has to be rebuilt
+def fetch_cached_visualization(cursor, symbol, timeframe, today):
+    # ::text hands back the stored document as a string, so psycopg2 doesn't parse it
+    cursor.execute(
+        """
+        SELECT visualization::text, last_updated FROM stock_insights 
+        WHERE symbol = %s AND timeframe = %s
+        """,
+        (symbol, timeframe)
+    )
+    result = cursor.fetchone()
+
+    if result and result[0] and updated_today(result[1], today):
+        return result[0]
+
+    return None
+
+# Endpoint to get chart data for a given stock/timeframe
+@insights.route("/visualization_intent", methods=["GET"])
+def get_timeframe_dataframe():
+    symbol = request.args.get("symbol")
+    timeframe = request.args.get("timeframe")
+
+    if not symbol or not timeframe:
+        return jsonify({"error": "Both 'symbol' and 'timeframe' are required"}), 400
+
+    today = dt.date.today()
+    with db_connection() as conn, conn.cursor() as cursor:
+        cleaned_visualization = fetch_cached_visualization(cursor, symbol, timeframe, today)
+        if cleaned_visualization is not None:
+            print(f"[INFO] Successful fetched previous visualization for {symbol} ({timeframe})...")
+            return json_response(cleaned_visualization)
+
+        def refresh_visualization():
+            with pg_advisory_lock(conn, "visualization", symbol, timeframe):
+                # Another worker may have stored it while we were waiting on the lock
+                cached_visualization = fetch_cached_visualization(cursor, symbol, timeframe, today)
+                if cached_visualization is not None:
+                    return cached_visualization, 200
+
+                print(f"[INFO] Fetching fresh visualization for {symbol} ({timeframe})...")
+                visualization_data = visualization_intent(symbol, timeframe)
+
+                if visualization_data is None or visualization_data.empty:
+                    return {"error": f"No data found for {symbol} ({timeframe})"}, 404
+
+                visualization_json = visualization_data.to_dict(orient="records")
+                cleaned_visualization_json = json.dumps(clean_nan_values(visualization_json), default=str)
+
+                cursor.execute(
+                    """
+                    INSERT INTO stock_insights (symbol, timeframe, last_updated, visualization)
+                    VALUES (%s, %s, %s, %s::jsonb)
+                    ON CONFLICT (symbol, timeframe) 
+                    DO UPDATE SET 
+                        visualization = EXCLUDED.visualization,
+                        last_updated = EXCLUDED.last_updated
+                    """,
+                    (symbol, timeframe, today, cleaned_visualization_json)
+                )
+                conn.commit()
+                # The JSON we just stored. Cache hits send JSONB's normalized text of it instead,
+                # which has the same values and array order but different whitespace and key order
+                return cleaned_visualization_json, 200
+
+        # Concurrent misses for the same stock/timeframe share one refresh
+        body, status = insight_flight.do(("visualization", symbol, timeframe, today), refresh_visualization)
+
+    return json_response(body, status)
+
+# Returns today's stored analysis as a (body, status) pair, or None if it has to be regenerated.
+# On a hit the body is the finished {"analysis": ...} response as JSON text, built in SQL
+def fetch_cached_analysis(cursor, symbol, timeframe, today):
+    cursor.execute(
+        """
+        SELECT
+            jsonb_build_object('analysis', regexp_replace(analysis #>> '{}', '[*#]', '', 'g'))::text,
+            btrim(coalesce(analysis #>> '{}', '')) = '',
+            last_updated
+        FROM stock_insights 
+        WHERE symbol = %s AND timeframe = %s
+        """,
+        (symbol, timeframe)
+    )
+    result = cursor.fetchone()
+
+    if result and updated_today(result[2], today):
+        if result[1]:
+            print(f"[WARNING] Stored analysis for {symbol} ({timeframe}) is empty.")
+            return {"error": "No AI analysis available"}, 404
+        return result[0], 200
+
+    return None
+
+# Saves an analysis for a stock/timeframe (the caller commits)
+def store_analysis(cursor, symbol, timeframe, today, cleaned_analysis):
+    cursor.execute(
+        """
+        INSERT INTO stock_insights (symbol, timeframe, last_updated, analysis)
+        VALUES (%s, %s, %s, %s::jsonb)
+        ON CONFLICT (symbol, timeframe) 
+        DO UPDATE SET 
+            analysis = EXCLUDED.analysis,
+            last_updated = EXCLUDED.last_updated
+        """,
+        (symbol, timeframe, today, json.dumps(cleaned_analysis, default=str))
+    )
+
+# Keeps a completion that missed the auto-mode SLO: the request already answered from the
+# template, so the LLM text goes into the analysis cache and stock_insights for the next one.
+# Runs on the dispatcher's thread after the request's connection went back to the pool
+def store_late_analysis(symbol, timeframe, today):
+    def store(analysis_data, features):
+        try:
+            with db_connection() as conn:
+                AnalysisCache(conn).put(symbol, timeframe, features, analysis_data)
+                with conn.cursor() as cursor:
+                    store_analysis(cursor, symbol, timeframe, today, re.sub(r'[*#]', '', analysis_data))
+                conn.commit()
+            print(f"[INFO] Stored the late LLM analysis for {symbol} ({timeframe})")
+        except Exception as e:
+            print(f"[ERROR] Could not store the late LLM analysis for {symbol} ({timeframe}): {e}")
+    return store
+
+# Endpoint to get OpenAI-based AI analysis summary
+@insights.route("/ai_analysis_intent", methods=["GET"])
+def get_ai_analysis():
+    symbol = request.args.get("symbol")
+    timeframe = request.args.get("timeframe")
+    # llm, local or auto (see ANALYSIS_ENGINES in ai_logic)
+    engine = request.args.get("engine", ANALYSIS_ENGINE)
+
+    if not symbol or not timeframe:
+        return jsonify({"error": "Both 'symbol' and 'timeframe' are required"}), 400
+    if engine not in ANALYSIS_ENGINES:
+        return jsonify({"error": f"'engine' must be one of {', '.join(ANALYSIS_ENGINES)}"}), 400
+
+    # The template analyzer is cheap and deterministic, so it skips the stored insights and locks
+    if engine == "local":
+        analysis_data, _ = run_analysis(symbol, timeframe, engine="local")
+        if not analysis_data:
+            return jsonify({"error": f"AI analysis could not be generated for {symbol} ({timeframe})"}), 500
+        return jsonify({"analysis": analysis_data, "engine": "local"}), 200
+
+    today = dt.date.today()
+    with db_connection() as conn, conn.cursor() as cursor:
+        cached = fetch_cached_analysis(cursor, symbol, timeframe, today)
+        if cached is not None:
+            print(f"[INFO] Successful fetched previous analysis for {symbol} ({timeframe})...")
+            return json_response(*cached)
+
+        def refresh_analysis():
+            with pg_advisory_lock(conn, "analysis", symbol, timeframe):
+                # Another worker may have stored it while we were waiting on the lock
+                cached_analysis = fetch_cached_analysis(cursor, symbol, timeframe, today)
+                if cached_analysis is not None:
+                    return cached_analysis
+
+                print(f"[INFO] Fetching fresh AI analysis for {symbol} ({timeframe})...")
+                analysis_data, used_engine = run_analysis(
+                    symbol, timeframe, engine=engine, cache=AnalysisCache(conn),
+                    on_late=store_late_analysis(symbol, timeframe, today)
+                )
+
+                if not analysis_data:
+                    return {"error": f"AI analysis could not be generated for {symbol} ({timeframe})"}, 500
+
+                cleaned_analysis = re.sub(r'[*#]', '', analysis_data)
+                # A fallback answer isn't stored; the late LLM answer (if any) is, by store_late_analysis
+                if used_engine == "local":
+                    return {"analysis": cleaned_analysis, "engine": "local"}, 200
+
+                store_analysis(cursor, symbol, timeframe, today, cleaned_analysis)
+                conn.commit()
+                return {"analysis": cleaned_analysis, "engine": "llm"}, 200
+
+        # Concurrent misses for the same stock/timeframe share one completion
+        body, status = insight_flight.do(("analysis", symbol, timeframe, today, engine), refresh_analysis)
+
+    return json_response(body, status)
+
+# Formats one Server-Sent Event. The payload is JSON so newlines in the text survive
+def sse_event(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+# Streaming variant of /ai_analysis_intent: sends the analysis as Server-Sent Events
+# while the model generates it, then stores the full text in stock_insights
+@insights.route("/ai_analysis_intent/stream", methods=["GET"])
+def stream_ai_analysis():
+    symbol = request.args.get("symbol")
+    timeframe = request.args.get("timeframe")
+
+    if not symbol or not timeframe:
+        return jsonify({"error": "Both 'symbol' and 'timeframe' are required"}), 400
+
+    # Connections are only checked out around the reads and the final write: holding one
+    # while the model streams would tie up a pool slot for as long as the client reads
+    def generate():
+        today = dt.date.today()
+        try:
+            with db_connection() as conn, conn.cursor() as cursor:
+                cached = fetch_cached_analysis(cursor, symbol, timeframe, today)
+            if cached is not None:
+                body, status = cached
+                if status == 200:
+                    print(f"[INFO] Successful fetched previous analysis for {symbol} ({timeframe})...")
+                    stored_analysis = json.loads(body)["analysis"]
+                    yield sse_event("token", {"text": stored_analysis})
+                    yield sse_event("done", {"analysis": stored_analysis})
+                else:
+                    yield sse_event("error", body)
+                return
+
+            print(f"[INFO] Streaming fresh AI analysis for {symbol} ({timeframe})...")
+            prepared = prepare_analysis(symbol, timeframe)
+            if prepared is None:
+                yield sse_event("error", {"error": f"AI analysis could not be generated for {symbol} ({timeframe})"})
+                return
+            features, messages = prepared
+
+            with db_connection() as conn:
+                analysis_data = AnalysisCache(conn).get(symbol, timeframe, features)
+            streamed = not analysis_data
+            if analysis_data:
+                yield sse_event("token", {"text": re.sub(r'[*#]', '', analysis_data)})
+            else:
+                # Clean each piece as it arrives; the markers are single characters so nothing spans chunks
+                pieces = []
+                try:
+                    for piece in stream_analysis_completion(messages):
+                        pieces.append(piece)
+                        cleaned_piece = re.sub(r'[*#]', '', piece)
+                        if cleaned_piece:
+                            yield sse_event("token", {"text": cleaned_piece})
+                except Exception as e:
+                    if pieces:
+                        raise
+                    # Nothing was sent yet, so the template answer can stand in for the model
+                    print(f"[WARNING] LLM stream failed for {symbol} ({timeframe}), answering from the local analyzer: {e}")
+                    fallback = local_analysis(symbol, timeframe, features)
+                    yield sse_event("token", {"text": fallback})
+                    yield sse_event("done", {"analysis": fallback, "engine": "local"})
+                    return
+                analysis_data = "".join(pieces)
+                if not analysis_data:
+                    yield sse_event("error", {"error": f"AI analysis could not be generated for {symbol} ({timeframe})"})
+                    return
+
+            cleaned_analysis = re.sub(r'[*#]', '', analysis_data)
+            with db_connection() as conn:
+                if streamed:
+                    AnalysisCache(conn).put(symbol, timeframe, features, analysis_data)
+                with conn.cursor() as cursor:
+                    store_analysis(cursor, symbol, timeframe, today, cleaned_analysis)
+                conn.commit()
+            yield sse_event("done", {"analysis": cleaned_analysis, "engine": "llm"})
+        except Exception as e:
+            print(f"[ERROR] Streaming analysis failed for {symbol} ({timeframe}): {e}")
+            yield sse_event("error", {"error": f"AI analysis could not be generated for {symbol} ({timeframe})"})
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+def get_next_tradingday(startDate, availableDates):
+    sorted_dates = sorted(availableDates)
+    for date in sorted_dates:
+        if date > startDate:
+            return date
+    return sorted_dates[-1] if sorted_dates else None
+
+# Picks the forecast for the next trading day out of a stored or fresh forecast list
+def select_next_forecast(symbol, forecast_list, missing_error):
+    forecast_df = pd.DataFrame(forecast_list)
+
+    if forecast_df.empty or "date" not in forecast_df.columns or "predicted_price" not in forecast_df.columns:
+        return {"error": missing_error}, 500
+
+    forecast_df["date"] = pd.to_datetime(forecast_df["date"]).dt.date
+    forecast_dates = set(forecast_df["date"])
+    selected_date = get_next_tradingday(dt.datetime.today().date(), forecast_dates)
+
+    if not selected_date:
+        return {"error": "No available forecast for selected date"}, 404
+
+    forecast_for_day = forecast_df[forecast_df["date"] == selected_date]
+
+    if forecast_for_day.empty:
+        return {"error": "No available forecast for selected date"}, 404
+
+    forecast_data = {
+        "symbol": symbol,
+        "date": str(selected_date),
+        "predicted_price": forecast_for_day.iloc[0]["predicted_price"]
+    }
+    return forecast_data, 200
+
+# Returns today's stored forecast as a (body, status) pair, or None if it has to be retrained.
+# The next trading day is picked in SQL (the first date after today, else the last one), so a
+# hit comes back as the finished {"symbol", "date", "predicted_price"} response as JSON text
+def fetch_cached_forecast(cursor, symbol, timeframe, today):
+    cursor.execute(
+        """
+        SELECT insight.last_updated, next_forecast.body
+        FROM stock_insights insight
+        LEFT JOIN LATERAL (
+            SELECT jsonb_build_object(
+                'symbol', insight.symbol,
+                'date', forecast.day::text,
+                'predicted_price', forecast.value -> 'predicted_price'
+            )::text AS body
+            FROM jsonb_array_elements(
+                CASE WHEN jsonb_typeof(insight.forecasting) = 'array' THEN insight.forecasting ELSE '[]'::jsonb END
+            ) AS element(value)
+            CROSS JOIN LATERAL (SELECT element.value, (element.value ->> 'date')::date AS day) AS forecast
+            WHERE forecast.value ? 'date' AND forecast.value ? 'predicted_price'
+            ORDER BY forecast.day > %s DESC, CASE WHEN forecast.day > %s THEN forecast.day END, forecast.day DESC
+            LIMIT 1
+        ) AS next_forecast ON TRUE
+        WHERE insight.symbol = %s AND insight.timeframe = %s AND insight.forecasting IS NOT NULL
+        """,
+        (today, today, symbol, timeframe)
+    )
+    result = cursor.fetchone()
+
+    if result and updated_today(result[0], today):
+        if result[1] is None:
+            return {"error": "Invalid stored forecast data"}, 500
+        return result[1], 200
+
+    return None
+
+# Saves a fresh forecast list for a stock/timeframe (the caller commits)
+def store_forecast(cursor, symbol, timeframe, today, forecast_list):
+    cleaned_forecast_data = clean_nan_values(forecast_list)
+
+    cursor.execute(
+        """
+        INSERT INTO stock_insights (symbol, timeframe, last_updated, forecasting)
+        VALUES (%s, %s, %s, %s::jsonb)
+        ON CONFLICT (symbol, timeframe) 
+        DO UPDATE SET 
+            forecasting = EXCLUDED.forecasting,
+            last_updated = EXCLUDED.last_updated
+        """,
+        (symbol, timeframe, today, json.dumps(cleaned_forecast_data, default=str))
+    )
+
+# Get forecasted price prediction for next day
+@insights.route("/forecast", methods=["GET"])
+def get_forecast():
+    symbol = request.args.get("symbol")
+    timeframe = request.args.get("timeframe")
+
+    if not symbol or not timeframe:
+        return jsonify({"error": "Both 'symbol' and 'timeframe' are required"}), 400
+
+    today = dt.date.today()
+    with db_connection() as conn, conn.cursor() as cursor:
+        cached = fetch_cached_forecast(cursor, symbol, timeframe, today)
+        if cached is not None:
+            print(f"[INFO] Successful fetched previous forecast for {symbol} ({timeframe})...")
+            return json_response(*cached)
+
+        if FORECAST_JOBS_ENABLED:
+            job, _ = enqueue_forecast_job(conn, symbol, timeframe, today)
+            return forecast_job_accepted(job)
+
+        def refresh_forecast():
+            with pg_advisory_lock(conn, "forecast", symbol, timeframe):
+                # Another worker may have trained it while we were waiting on the lock
+                cached_forecast = fetch_cached_forecast(cursor, symbol, timeframe, today)
+                if cached_forecast is not None:
+                    return cached_forecast
+
+                print(f"[INFO] Fetching fresh forecast for {symbol} ({timeframe})...")
+                forecastResults = forecasting_intent(symbol, timeframe)
+
+                if not forecastResults:
+                    return {"error": "No forecast data available"}, 404
+
+                forecast_list = forecastResults.get("forecast")
+                if not forecast_list:
+                    return {"error": "No forecast data available"}, 404
+
+                forecast_data, status = select_next_forecast(symbol, forecast_list, "Missing forecast data")
+                if status != 200:
+                    return forecast_data, status
+
+                store_forecast(cursor, symbol, timeframe, today, forecast_list)
+                conn.commit()
+                return forecast_data, 200
+
+        # Concurrent misses for the same stock/timeframe share one LSTM training
+        body, status = insight_flight.do(("forecast", symbol, timeframe, today), refresh_forecast)
+
+    return json_response(body, status)
+
+# A forecast that had to train found every training slot busy for its whole wait budget
+# and had no saved model to answer with. A slot frees up within one capped fit
+@insights.errorhandler(TrainingSlotTimeout)
+def training_busy(e):
+    print(f"[WARNING] {e}")
+    response = jsonify({"error": "Forecast training is busy, try again shortly"})
+    response.status_code = 503
+    response.headers["Retry-After"] = str(FORECAST_MAX_FIT_SECONDS)
+    return response
+
+# 202 response pointing the client at a queued forecast job
+def forecast_job_accepted(job):
+    response = jsonify({"job": job, "status_url": f"/forecast/jobs/{job['id']}", "result_url": f"/forecast/jobs/{job['id']}/result"})
+    response.status_code = 202
+    response.headers["Location"] = f"/forecast/jobs/{job['id']}"
+    return response
+
+# Queues a forecast for forecast_worker.py. Submitting the same stock/timeframe again on
+# the same day returns the job that already exists
+@insights.route("/forecast/jobs", methods=["POST"])
+def submit_forecast_job():
+    data = request.get_json(silent=True) or request.args
+    symbol = data.get("symbol")
+    timeframe = data.get("timeframe")
+
+    if not symbol or not timeframe:
+        return jsonify({"error": "Both 'symbol' and 'timeframe' are required"}), 400
+
+    with db_connection() as conn:
+        job, created = enqueue_forecast_job(conn, symbol, timeframe, dt.date.today())
+
+    print(f"[INFO] Forecast job {job['id']} for {symbol} ({timeframe}) {'queued' if created else 'already exists'} ({job['status']})")
+    return forecast_job_accepted(job)
+
+# Job status: queued, running, done or failed
+@insights.route("/forecast/jobs/<int:job_id>", methods=["GET"])
+def get_forecast_job_status(job_id):
+    with db_connection() as conn:
+        job = get_forecast_job(conn, job_id)
+
+    if job is None:
+        return jsonify({"error": "Forecast job not found"}), 404
+    return jsonify({"job": job})
+
+# The next-day forecast of a finished job, same shape as /forecast
+@insights.route("/forecast/jobs/<int:job_id>/result", methods=["GET"])
+def get_forecast_job_output(job_id):
+    with db_connection() as conn:
+        job, forecast_list = get_forecast_job_result(conn, job_id)
+
+    if job is None:
+        return jsonify({"error": "Forecast job not found"}), 404
+    if job["status"] == "failed":
+        return jsonify({"error": job["error"] or "Forecast job failed", "job": job}), 500
+    if job["status"] != "done":
+        return jsonify({"error": "Forecast job has not finished yet", "job": job}), 409
+
+    forecast_data, status = select_next_forecast(job["symbol"], forecast_list, "Missing forecast data")
+    return jsonify(forecast_data), status
+
+# Next-day forecasts for several stocks of one timeframe, e.g. /forecast/batch?symbols=AAPL,MSFT&timeframe=1M.
+# Stocks without a forecast for today are trained together as one global model
+@insights.route("/forecast/batch", methods=["GET"])
+def get_forecast_batch():
+    symbols = [symbol.strip() for symbol in request.args.get("symbols", "").split(",") if symbol.strip()]
+    timeframe = request.args.get("timeframe")
+
+    if not symbols or not timeframe:
+        return jsonify({"error": "Both 'symbols' and 'timeframe' are required"}), 400
+    if len(set(symbols)) > FORECAST_BATCH_MAX_SYMBOLS:
+        return jsonify({"error": f"At most {FORECAST_BATCH_MAX_SYMBOLS} symbols per batch"}), 400
+
+    today = dt.date.today()
+    with db_connection() as conn, conn.cursor() as cursor:
+        forecasts = {}
+        errors = {}
+        missing = []
+        for symbol in symbols:
+            cached = fetch_cached_forecast(cursor, symbol, timeframe, today)
+            if cached is None:
+                missing.append(symbol)
+            elif cached[1] == 200:
+                # A hit is one small object of JSON text; the batch response nests it
+                forecasts[symbol] = json.loads(cached[0])
+            else:
+                errors[symbol] = cached[0]["error"]
+
+        def refresh_forecasts():
+            with pg_advisory_lock(conn, "forecast_batch", timeframe, *sorted(missing)):
+                fresh, fresh_errors = {}, {}
+                still_missing = []
+                # Another worker may have trained some of them while we were waiting on the lock
+                for symbol in missing:
+                    cached = fetch_cached_forecast(cursor, symbol, timeframe, today)
+                    if cached is None:
+                        still_missing.append(symbol)
+                    elif cached[1] == 200:
+                        fresh[symbol] = json.loads(cached[0])
+                    else:
+                        fresh_errors[symbol] = cached[0]["error"]
+
+                if still_missing:
+                    print(f"[INFO] Fetching fresh forecasts for {', '.join(still_missing)} ({timeframe})...")
+                    for symbol, forecastResults in forecast_universe(still_missing, timeframe).items():
+                        forecast_list = (forecastResults or {}).get("forecast")
+                        if not forecast_list:
+                            fresh_errors[symbol] = "No forecast data available"
+                            continue
+
+                        forecast_data, status = select_next_forecast(symbol, forecast_list, "Missing forecast data")
+                        if status != 200:
+                            fresh_errors[symbol] = forecast_data["error"]
+                            continue
+                        store_forecast(cursor, symbol, timeframe, today, forecast_list)
+                        fresh[symbol] = forecast_data
+                    conn.commit()
+                return fresh, fresh_errors
+
+        if missing:
+            # Concurrent misses for the same set of stocks share one training run
+            fresh, fresh_errors = insight_flight.do(("forecast_batch", timeframe, tuple(sorted(missing)), today), refresh_forecasts)
+            forecasts.update(fresh)
+            errors.update(fresh_errors)
+
+    return jsonify({"forecasts": forecasts, "errors": errors}), 200
+
+# Goes through top stocks and timeframes and saves fresh data into the database
+@insights.route("/preprocess_stocks", methods=["GET"])
+def preprocess_stocks():
+    today = dt.date.today().isoformat() 
+    with db_connection() as conn, conn.cursor() as cursor:
+        # Pull the whole universe up front in a few batched requests
+        contexts = load_data_contexts(TOP_10_SYMBOLS, TIMEFRAMES)
+        analysis_cache = AnalysisCache(conn)
+
+        pending = []
+        for symbol in TOP_10_SYMBOLS:
+            for timeframe in TIMEFRAMES:
+                cursor.execute(
+                    """
+                    SELECT 1 FROM stock_insights
+                    WHERE symbol = %s AND timeframe = %s AND last_updated = %s
+                    """,
+                    (symbol, timeframe, today)
+                )
+                existing_entry = cursor.fetchone()
+
+                if existing_entry:
+                    print(f"[INFO] Data for {symbol} ({timeframe}) already exists for today. Skipping...")
+                    continue
+                pending.append((symbol, timeframe))
+
+        # Send every analysis completion out at once instead of one after another
+        analyses = ai_analysis_batch(
+            [(symbol, timeframe, contexts[(symbol, timeframe)]) for symbol, timeframe in pending],
+            cache=analysis_cache
+        )
+
+        # One global model per timeframe instead of one LSTM per stock
+        forecasts = {}
+        for timeframe in TIMEFRAMES:
+            if any(pending_timeframe == timeframe for _, pending_timeframe in pending):
+                for symbol, forecast in forecast_universe(TOP_10_SYMBOLS, timeframe, contexts=contexts).items():
+                    forecasts[(symbol, timeframe)] = forecast
+
+        for symbol, timeframe in pending:
+            print(f"[INFO] Processing {symbol} ({timeframe})...")
+            # Share the bars (and their indicators) across all three intents
+            context = contexts[(symbol, timeframe)]
+            visualization_data = visualization_intent(symbol, timeframe, context=context)
+            analysis_data = analyses.get((symbol, timeframe))
+            forecast_data = forecasts.get((symbol, timeframe))
+
+            if visualization_data is not None and not visualization_data.empty:
+                visualization_data_json = visualization_data.copy()
+                visualization_data_json["date"] = visualization_data_json["date"].astype(str) 
+                visualization_data_json = visualization_data_json.to_dict(orient="records")
+            else:
+                visualization_data_json = None
+
+            cleaned_visualization_data = clean_nan_values(visualization_data_json)
+            cleaned_analysis_data = clean_nan_values(analysis_data)
+            cleaned_forecast_data = clean_nan_values(forecast_data)
+
+            if cleaned_visualization_data and cleaned_analysis_data and cleaned_forecast_data:
+                cursor.execute(
+                    """
+                    INSERT INTO stock_insights (symbol, timeframe, last_updated, visualization, analysis, forecasting)
+                    VALUES (%s, %s, %s, %s::jsonb, %s::jsonb, %s::jsonb)
+                    """,
+                    (symbol, timeframe, today, 
+                    json.dumps(cleaned_visualization_data, default=str), 
+                    json.dumps(cleaned_analysis_data, default=str), 
+                    json.dumps(cleaned_forecast_data, default=str))
+                )
+                conn.commit()
+                print(f"[SUCCESS] Stored insights for {symbol} ({timeframe})")
+            else:
+                print(f"[WARNING] Skipped {symbol} ({timeframe}) due to missing data.")
+
+    fetch_stats = get_market_data_client().scheduler.stats()
+    llm_stats = get_llm_dispatcher().stats()
+    print(f"[INFO] Marketstack fetch stats: {fetch_stats}")
+    print(f"[INFO] LLM dispatch stats: {llm_stats}")
+    return jsonify({"message": "Stock insights processing completed.", "fetch_stats": fetch_stats, "llm_stats": llm_stats})
@@ -0,0 +1,107 @@
+import os
+import time
+import hashlib
+import threading
+from contextlib import contextmanager
+from psycopg2.extensions import TRANSACTION_STATUS_INERROR
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+# How long a request waits for another worker to finish the same insight. It holds a pooled
+# connection meanwhile, so this stays finite; a forecast refresh is bounded by its request budget
+ADVISORY_LOCK_TIMEOUT = float(os.getenv("ADVISORY_LOCK_TIMEOUT", 120))
+ADVISORY_LOCK_POLL_SECONDS = 0.05
+ADVISORY_LOCK_MAX_POLL_SECONDS = 0.5
+
+
+class AdvisoryLockTimeout(Exception):
+    pass
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls for the same key into one. The first caller runs
+    the function, everyone else who shows up while it is running just waits for
+    that result instead of starting their own fetch / completion / training.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+
+# Turns a key like ("forecast", "AAPL", "1W") into the signed 64-bit integer Postgres advisory locks take
+def advisory_lock_key(*parts):
+    digest = hashlib.blake2b("|".join(str(part) for part in parts).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+@contextmanager
+def pg_advisory_lock(conn, *parts, timeout=ADVISORY_LOCK_TIMEOUT):
+    """
+    Holds a session-level Postgres advisory lock for the key while the block runs,
+    so only one gunicorn worker at a time computes the same (kind, symbol, timeframe).
+    Polls pg_try_advisory_lock instead of blocking in pg_advisory_lock, and raises
+    AdvisoryLockTimeout once `timeout` seconds pass without getting it.
+    """
+    key = advisory_lock_key(*parts)
+    deadline = time.monotonic() + timeout
+    poll = ADVISORY_LOCK_POLL_SECONDS
+    while True:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT pg_try_advisory_lock(%s)", (key,))
+            locked = cursor.fetchone()[0]
+        if locked:
+            break
+        # Don't sit idle in a transaction between attempts
+        conn.rollback()
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise AdvisoryLockTimeout(f"Still waiting for {' '.join(str(part) for part in parts)} after {timeout:g}s")
+        time.sleep(min(poll, remaining))
+        poll = min(poll * 2, ADVISORY_LOCK_MAX_POLL_SECONDS)
+    try:
+        yield
+    finally:
+        # Session-level locks survive a rollback, so clear a failed transaction before unlocking
+        if conn.get_transaction_status() == TRANSACTION_STATUS_INERROR:
+            conn.rollback()
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_unlock(%s)", (key,))
+        conn.commit()
@@ -0,0 +1,99 @@
+# Runs queued forecast jobs outside the web workers.
+#
+#   cd backend && python forecast_worker.py
+#
+# Starts FORECAST_WORKERS processes. Each one imports the forecasting stack (torch,
+# Lightning, NeuralForecast and the model registry) up front and keeps it warm, then
+# claims jobs from the forecast_jobs table until it is stopped.
+import os
+import math
+import time
+import socket
+import signal
+import multiprocessing as mp
+import psycopg2
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+FORECAST_WORKERS = int(os.getenv("FORECAST_WORKERS", max(1, (os.cpu_count() or 2) // 2)))
+FORECAST_WORKER_POLL_SECONDS = float(os.getenv("FORECAST_WORKER_POLL_SECONDS", 2))
+
+
+def _clean_forecast(forecast_list):
+    return [
+        {**row, "predicted_price": None if isinstance(row["predicted_price"], float) and math.isnan(row["predicted_price"]) else row["predicted_price"]}
+        for row in forecast_list
+    ]
+
+def run_worker(index, stop):
+    # Imported here so only the worker processes load torch and NeuralForecast. ai_logic and
+    # the registry import them lazily, so they are loaded explicitly before the first job
+    import neuralforecast.models
+    from ai_interaction.model_registry import get_model_registry
+    from ai_interaction.ai_logic import forecasting_intent
+    from ai_interaction.training_scheduler import TrainingSlotTimeout
+    from cd.forecast_jobs import claim_forecast_job, complete_forecast_job, fail_forecast_job, release_forecast_job, requeue_stale_jobs
+
+    # Ctrl+C goes to the whole process group, let the parent decide when we stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    conn = psycopg2.connect(os.getenv("PSYCOPG2_DSN"))
+    get_model_registry()
+    print(f"[INFO] Forecast worker {index} ({worker}) ready.")
+
+    try:
+        while not stop.is_set():
+            if index == 0:
+                requeued, failed = requeue_stale_jobs(conn)
+                if requeued:
+                    print(f"[WARNING] Re-queued {requeued} stale forecast jobs.")
+                if failed:
+                    print(f"[ERROR] Failed {failed} stale forecast jobs that used up their attempts.")
+
+            job = claim_forecast_job(conn, worker)
+            if job is None:
+                stop.wait(FORECAST_WORKER_POLL_SECONDS)
+                continue
+
+            print(f"[INFO] Worker {index} running forecast job {job['id']} for {job['symbol']} ({job['timeframe']})...")
+            start = time.perf_counter()
+            try:
+                forecastResults = forecasting_intent(job["symbol"], job["timeframe"])
+                forecast_list = (forecastResults or {}).get("forecast")
+                if not forecast_list:
+                    fail_forecast_job(conn, job, "No forecast data available")
+                    continue
+                complete_forecast_job(conn, job, _clean_forecast(forecast_list))
+                print(f"[SUCCESS] Forecast job {job['id']} done in {time.perf_counter() - start:.1f}s")
+            except TrainingSlotTimeout as e:
+                # Every slot stayed busy for the request budget; back in the queue for another round
+                print(f"[WARNING] Forecast job {job['id']} re-queued: {e}")
+                conn.rollback()
+                release_forecast_job(conn, job)
+                stop.wait(FORECAST_WORKER_POLL_SECONDS)
+            except Exception as e:
+                print(f"[ERROR] Forecast job {job['id']} failed: {e}")
+                conn.rollback()
+                fail_forecast_job(conn, job, e)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    # Fresh interpreters rather than forks, so no torch state is ever shared between workers
+    context = mp.get_context("spawn")
+    stop = context.Event()
+    processes = [context.Process(target=run_worker, args=(index, stop), name=f"forecast-worker-{index}") for index in range(FORECAST_WORKERS)]
+    for process in processes:
+        process.start()
+    print(f"[INFO] Started {len(processes)} forecast workers.")
+
+    def shutdown(*_):
+        print("[INFO] Stopping forecast workers after their current job...")
+        stop.set()
+
+    signal.signal(signal.SIGINT, shutdown)
+    signal.signal(signal.SIGTERM, shutdown)
+    for process in processes:
+        process.join()
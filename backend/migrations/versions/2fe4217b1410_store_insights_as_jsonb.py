@@ -0,0 +1,47 @@
+"""Store insight columns as JSONB
+
+Revision ID: 2fe4217b1410
+Revises: 72057fa8ae4e
+Create Date: 2026-10-17 19:41:08.264517
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2fe4217b1410'
+down_revision = '72057fa8ae4e'
+branch_labels = None
+depends_on = None
+
+INSIGHT_COLUMNS = ('visualization', 'analysis', 'forecasting')
+TABLES = ('stock_insights', 'favorites')
+
+
+def upgrade():
+    # Rows written before the insights were always json.dumps'd may hold bare text,
+    # which is kept as a JSON string instead of failing the cast
+    op.execute(
+        """
+        CREATE FUNCTION pg_temp.insight_to_jsonb(value text) RETURNS jsonb AS $$
+        BEGIN
+            RETURN value::jsonb;
+        EXCEPTION WHEN others THEN
+            RETURN to_jsonb(value);
+        END
+        $$ LANGUAGE plpgsql IMMUTABLE
+        """
+    )
+    for table in TABLES:
+        for column in INSIGHT_COLUMNS:
+            op.execute(
+                f"ALTER TABLE {table} ALTER COLUMN {column} TYPE JSONB "
+                f"USING pg_temp.insight_to_jsonb({column}::text)"
+            )
+
+
+def downgrade():
+    for table in TABLES:
+        for column in INSIGHT_COLUMNS:
+            op.execute(f"ALTER TABLE {table} ALTER COLUMN {column} TYPE TEXT USING {column}::text")
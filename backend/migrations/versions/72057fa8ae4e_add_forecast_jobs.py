@@ -0,0 +1,43 @@
+"""Add forecast_jobs table
+
+Revision ID: 72057fa8ae4e
+Revises: 9a914f1b1f38
+Create Date: 2026-10-17 14:03:27.530912
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '72057fa8ae4e'
+down_revision = '9a914f1b1f38'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('forecast_jobs',
+    sa.Column('id', sa.BigInteger(), nullable=False),
+    sa.Column('symbol', sa.String(length=16), nullable=False),
+    sa.Column('timeframe', sa.String(length=8), nullable=False),
+    sa.Column('job_day', sa.Date(), nullable=False),
+    sa.Column('status', sa.String(length=16), server_default='queued', nullable=False),
+    sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('worker', sa.String(length=64), nullable=True),
+    sa.Column('result', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('symbol', 'timeframe', 'job_day', name='uq_forecast_jobs_symbol_timeframe_day')
+    )
+    # Workers claim the oldest queued job, so keep that lookup cheap
+    op.create_index('ix_forecast_jobs_status_created', 'forecast_jobs', ['status', 'created_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_forecast_jobs_status_created', table_name='forecast_jobs')
+    op.drop_table('forecast_jobs')
@@ -0,0 +1,35 @@
+"""Add analysis_cache table
+
+Revision ID: 9a914f1b1f38
+Revises: 386f500036c0
+Create Date: 2026-10-17 10:12:41.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '9a914f1b1f38'
+down_revision = '386f500036c0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('analysis_cache',
+    sa.Column('feature_hash', sa.String(length=64), nullable=False),
+    sa.Column('symbol', sa.String(length=16), nullable=False),
+    sa.Column('timeframe', sa.String(length=8), nullable=False),
+    sa.Column('features', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('analysis', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('feature_hash')
+    )
+    op.create_index('ix_analysis_cache_symbol_timeframe_created', 'analysis_cache', ['symbol', 'timeframe', 'created_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_analysis_cache_symbol_timeframe_created', table_name='analysis_cache')
+    op.drop_table('analysis_cache')
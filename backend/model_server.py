@@ -0,0 +1,141 @@
+# Long-lived forecasting model server. Keeps fitted models in memory and answers
+# predict requests from the web workers over a local socket, so they never import
+# torch themselves.
+#
+#   cd backend && MODEL_SERVER_AUTHKEY=<secret> MODEL_SERVER_ADDRESS=data/model_server.sock python model_server.py
+#
+# Point the Flask app at the same MODEL_SERVER_ADDRESS and MODEL_SERVER_AUTHKEY. The server
+# won't start without an authkey, and its default Unix socket is only accessible to its owner.
+import os
+import time
+import signal
+import threading
+from multiprocessing.connection import Listener
+from dotenv import load_dotenv
+from ai_interaction.model_client import MODEL_SERVER_AUTHKEY, parse_address, require_authkey
+from ai_interaction.training_scheduler import TrainingSlotTimeout
+
+# Load environment variables
+load_dotenv()
+MODEL_SERVER_ADDRESS = os.getenv(
+    "MODEL_SERVER_ADDRESS",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "model_server.sock"),
+)
+MODEL_SERVER_MAX_MODELS = int(os.getenv("MODEL_SERVER_MAX_MODELS", 32))
+
+
+class ModelServer:
+    """
+    Serves "predict" and "stats" requests. Models come from the model registry with
+    up to `max_models` of them resident in memory (least recently used are evicted),
+    so a request with no new bars is a plain predict() on a model that is already loaded.
+    """
+
+    def __init__(self, address=MODEL_SERVER_ADDRESS, authkey=MODEL_SERVER_AUTHKEY, max_models=MODEL_SERVER_MAX_MODELS):
+        # Imported here so the registry (and torch) load in the server process only
+        from ai_interaction.model_registry import ModelRegistry
+
+        self.address = parse_address(address)
+        self.authkey = require_authkey(authkey)
+        self.registry = ModelRegistry(resident_models=max_models)
+        # One request at a time per model, since a refit updates the weights in place
+        self.key_locks = {}
+        self.lock = threading.Lock()
+        self.counters = {"requests": 0, "errors": 0, "connections": 0}
+        self.listener = None
+
+    def _key_lock(self, key, timeframe):
+        with self.lock:
+            return self.key_locks.setdefault((key, timeframe), threading.Lock())
+
+    def _count(self, name):
+        with self.lock:
+            self.counters[name] += 1
+
+    def predict(self, key, timeframe, df):
+        with self._key_lock(key, timeframe):
+            return self.registry.predict(key, timeframe, df)
+
+    def stats(self):
+        from ai_interaction.training_artifacts import recent_runs
+
+        with self.lock:
+            counters = dict(self.counters)
+        return dict(counters, resident_models=self.registry.resident_count(), training=recent_runs()["totals"])
+
+    def handle(self, op, params):
+        if op == "predict":
+            return self.predict(params["key"], params["timeframe"], params["df"])
+        if op == "stats":
+            return self.stats()
+        raise ValueError(f"Unknown operation '{op}'")
+
+    # One thread per client connection; a connection carries any number of requests
+    def serve_connection(self, connection):
+        self._count("connections")
+        try:
+            while True:
+                try:
+                    message = connection.recv()
+                except (EOFError, OSError):
+                    return
+
+                self._count("requests")
+                start = time.perf_counter()
+                op = message.pop("op", None)
+                try:
+                    response = {"ok": True, "result": self.handle(op, message)}
+                except Exception as e:
+                    self._count("errors")
+                    print(f"[ERROR] Model server '{op}' failed: {e}")
+                    # busy tells the client it was the training queue, not a broken model
+                    response = {"ok": False, "error": str(e), "busy": isinstance(e, TrainingSlotTimeout)}
+                print(f"[DEBUG] {op} {message.get('key', '')} {message.get('timeframe', '')} took {(time.perf_counter() - start) * 1000:.1f}ms")
+                connection.send(response)
+        finally:
+            connection.close()
+
+    def serve_forever(self):
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            # Left over from a previous run that didn't shut down cleanly
+            os.unlink(self.address)
+        if isinstance(self.address, str):
+            os.makedirs(os.path.dirname(os.path.abspath(self.address)), exist_ok=True)
+
+        if isinstance(self.address, str):
+            # Create the socket owner-only (0600) from the start, not chmod it after it's reachable
+            umask = os.umask(0o177)
+            try:
+                self.listener = Listener(self.address, authkey=self.authkey)
+            finally:
+                os.umask(umask)
+        else:
+            self.listener = Listener(self.address, authkey=self.authkey)
+        print(f"[INFO] Model server listening on {self.address} (up to {self.registry.resident_models} resident models)")
+        while True:
+            try:
+                connection = self.listener.accept()
+            except OSError:
+                # The listener was closed by stop()
+                return
+            except Exception as e:
+                # Usually a client with the wrong authkey
+                print(f"[WARNING] Rejected a model server connection: {e}")
+                continue
+            threading.Thread(target=self.serve_connection, args=(connection,), daemon=True).start()
+
+    def stop(self):
+        if self.listener is not None:
+            self.listener.close()
+
+
+if __name__ == "__main__":
+    server = ModelServer()
+
+    def shutdown(*_):
+        print("[INFO] Stopping model server...")
+        server.stop()
+
+    signal.signal(signal.SIGINT, shutdown)
+    signal.signal(signal.SIGTERM, shutdown)
+    server.serve_forever()
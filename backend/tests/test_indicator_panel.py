@@ -0,0 +1,21 @@
+# The vectorized indicator panel must match compute_technical_indicators symbol by symbol,
+# including symbols that start late or skip days.
+#
+#   cd backend && python -m unittest discover tests
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.indicator_panel import HAS_PANDAS_TA, PANDAS_TA_MISSING, check_parity
+
+
+@unittest.skipUnless(HAS_PANDAS_TA, PANDAS_TA_MISSING)
+class IndicatorPanelParityTest(unittest.TestCase):
+    def test_matches_compute_technical_indicators(self):
+        check_parity()
+
+
+if __name__ == "__main__":
+    unittest.main()